@@ -5,12 +5,17 @@ Helps find tunes that might be on albums under different names.
 """
 
 import csv
+import os
+from bisect import bisect_right
 from pathlib import Path
 from collections import defaultdict
 from typing import List, Dict, Set, Tuple, Optional
-from thesession_data import get_tune_aliases
-from local_file_search import search_local_files, find_audio_files
-from fuzzy_match import fuzzy_match_tune, normalize_tune_name
+from thesession_data import (
+    get_tune_aliases, get_data_revision, read_snapshot, write_snapshot, CACHE_DIR
+)
+from local_file_search import search_local_files
+from library_index import get_library_files
+from fuzzy_match import normalize_tune_name, TuneNameIndex
 
 
 RECORDINGS_FILE = Path("TheSession-data/csv/recordings.csv")
@@ -58,13 +63,71 @@ def load_recordings_data() -> Dict[str, List[Dict]]:
         return {}
 
 
+RECORDINGS_SNAPSHOT = CACHE_DIR / "recordings_index.pickle"
+
+
+def build_recordings_index() -> Dict[str, List[Tuple[int, Dict]]]:
+    """
+    Index recordings by normalized tune name.
+    
+    Returns dict mapping normalized tune name to (position, album hit) tuples.
+    Positions follow album-by-album, track-by-track order.
+    """
+    album_data = load_recordings_data()
+    
+    tune_index = defaultdict(list)
+    position = 0
+    for album_key, tunes in album_data.items():
+        for tune_info in tunes:
+            position += 1
+            tune_index[normalize_tune_name(tune_info['tune'])].append((position, {
+                'artist': tune_info['artist'],
+                'album': tune_info['album'],
+                'track': tune_info['track'],
+                'album_key': album_key,
+                'tune_as_listed': tune_info['tune']
+            }))
+    
+    return dict(tune_index)
+
+
+# Cache the recordings index, keyed on the CSV's data revision
+_recordings_index = None
+_recordings_revision = None
+
+
+def get_recordings_index() -> Dict[str, List[Tuple[int, Dict]]]:
+    """
+    Get the recordings index, loading it from the on-disk snapshot or building
+    it from recordings.csv. Rebuilt whenever the CSV changes.
+    """
+    global _recordings_index, _recordings_revision
+    
+    revision = get_data_revision(RECORDINGS_FILE)
+    if revision is None:
+        # No CSV - let load_recordings_data() report it
+        return build_recordings_index()
+    
+    if _recordings_index is not None and _recordings_revision == revision:
+        return _recordings_index
+    
+    tune_index = read_snapshot(RECORDINGS_SNAPSHOT, revision)
+    if tune_index is None:
+        tune_index = build_recordings_index()
+        write_snapshot(RECORDINGS_SNAPSHOT, revision, tune_index)
+    
+    _recordings_index = tune_index
+    _recordings_revision = revision
+    return tune_index
+
+
 def find_albums_with_tune(tune_name: str, use_aliases: bool = True) -> List[Dict]:
     """
     Find all albums that contain a specific tune.
     
     Returns list of dicts with album info.
     """
-    album_data = load_recordings_data()
+    tune_index = get_recordings_index()
     
     # Get all variations of the tune name
     if use_aliases:
@@ -75,25 +138,102 @@ def find_albums_with_tune(tune_name: str, use_aliases: bool = True) -> List[Dict
     # Normalize search names
     normalized_search = {normalize_tune_name(name) for name in search_names}
     
-    matching_albums = []
+    # Each track is listed under exactly one normalized name, so the hits
+    # for different search names never overlap
+    hits = []
+    for search_name in normalized_search:
+        hits.extend(tune_index.get(search_name, ()))
     
-    for album_key, tunes in album_data.items():
-        for tune_info in tunes:
-            tune_on_album = normalize_tune_name(tune_info['tune'])
-            
-            # Check if any search name matches
-            for search_name in normalized_search:
-                if search_name == tune_on_album:
-                    matching_albums.append({
-                        'artist': tune_info['artist'],
-                        'album': tune_info['album'],
-                        'track': tune_info['track'],
-                        'album_key': album_key,
-                        'tune_as_listed': tune_info['tune']
-                    })
-                    break
+    # Restore album/track order across the different search names
+    hits.sort(key=lambda hit: hit[0])
     
-    return matching_albums
+    return [dict(album_info) for _, album_info in hits]
+
+
+class PathComponentIndex:
+    """
+    Index of the distinct path components (folder and file names) in a library.
+    
+    An artist or album name is matched once against the distinct components,
+    with a substring scan and the n-gram TuneNameIndex, and the hits are then
+    expanded to the files under them. Cost scales with the number of distinct
+    folders rather than the number of files.
+    """
+    
+    # Fuzzy threshold for matching an artist/album against a path component
+    PART_THRESHOLD = 0.8
+    
+    def __init__(self, file_paths: List[Path]):
+        self.file_paths = list(file_paths)
+        
+        part_owners = defaultdict(list)
+        for i, file_path in enumerate(self.file_paths):
+            for part in set(file_path.parts):
+                part_owners[part].append(i)
+        
+        self.parts = list(part_owners)
+        self.part_owners = list(part_owners.values())
+        self.part_index = TuneNameIndex(self.parts)
+        
+        # All components in one lowercase string for fast substring scans.
+        # Offsets come from the lowered strings: lower() can change a
+        # string's length (e.g. 'İ' becomes 'i̇').
+        lowered = [part.lower() for part in self.parts]
+        self._blob = '\0'.join(lowered)
+        self._offsets = []
+        offset = 0
+        for part in lowered:
+            self._offsets.append(offset)
+            offset += len(part) + 1
+        
+        self._cache: Dict[str, Set[int]] = {}
+    
+    def _parts_containing(self, needle: str) -> Set[int]:
+        """Component ids whose lowercase form contains needle."""
+        hits = set()
+        if not needle:
+            return set(range(len(self.parts)))
+        start = self._blob.find(needle)
+        while start != -1:
+            hits.add(bisect_right(self._offsets, start) - 1)
+            start = self._blob.find(needle, start + 1)
+        return hits
+    
+    def files_matching(self, name: str) -> Set[int]:
+        """
+        File positions whose path contains name (case insensitive) or has a
+        component fuzzy matching name.
+        """
+        if name in self._cache:
+            return self._cache[name]
+        
+        name_lower = name.lower()
+        if os.sep in name_lower or '\0' in name_lower:
+            # Could span components - check each full path
+            files = {i for i, file_path in enumerate(self.file_paths)
+                     if name_lower in str(file_path).lower()}
+        else:
+            files = set()
+            for part_id in self._parts_containing(name_lower):
+                files.update(self.part_owners[part_id])
+        
+        for part_id, _ in self.part_index.search_ids(name, self.PART_THRESHOLD):
+            files.update(self.part_owners[part_id])
+        
+        self._cache[name] = files
+        return files
+
+
+# Most recently built component index, reused while the library is unchanged
+_path_component_index = None
+
+
+def get_path_component_index(file_paths: List[Path]) -> PathComponentIndex:
+    """Get a PathComponentIndex for these files, reusing the last one if unchanged."""
+    global _path_component_index
+    if _path_component_index is None or _path_component_index.file_paths != file_paths:
+        _path_component_index = PathComponentIndex(file_paths)
+    return _path_component_index
 
 
 def search_by_album_context(
@@ -113,10 +253,9 @@ def search_by_album_context(
     if not albums:
         return []
     
-    # Get all audio files
-    all_files = []
-    for directory in directories:
-        all_files.extend(find_audio_files(directory, recursive=True))
+    # Get all audio files from the library index
+    all_files = [f.path for f in get_library_files(directories, recursive=True)]
+    component_index = get_path_component_index(all_files)
     
     matches = []
     
@@ -124,33 +263,16 @@ def search_by_album_context(
         artist = album_info['artist']
         album = album_info['album']
         
+        # Match artist and album once against the distinct path components,
+        # then expand the hits to files
+        artist_files = component_index.files_matching(artist)
+        album_files = component_index.files_matching(album)
+        
         # Look for files that might be from this album
-        for file_path in all_files:
-            # Check if artist name appears in path
-            path_str = str(file_path).lower()
-            
-            artist_match = False
-            album_match = False
-            
-            # Fuzzy match artist in path
-            if artist.lower() in path_str:
-                artist_match = True
-            else:
-                # Try fuzzy matching on directory names
-                for part in file_path.parts:
-                    if fuzzy_match_tune(artist, [part], threshold=0.8):
-                        artist_match = True
-                        break
-            
-            # Fuzzy match album in path
-            if album.lower() in path_str:
-                album_match = True
-            else:
-                # Try fuzzy matching on directory names
-                for part in file_path.parts:
-                    if fuzzy_match_tune(album, [part], threshold=0.8):
-                        album_match = True
-                        break
+        for i in sorted(artist_files | album_files):
+            file_path = all_files[i]
+            artist_match = i in artist_files
+            album_match = i in album_files
             
             # If we have a good match, add it
             if artist_match and album_match:
@@ -163,7 +285,7 @@ def search_by_album_context(
                     score = 0.85  # Good confidence
                 
                 matches.append((file_path, score, reason))
-            elif artist_match or album_match:
+            else:
                 # Partial match
                 reason = f"Possible album: {artist} - {album}"
                 score = 0.75
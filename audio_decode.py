@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Audio decoding for BPM analysis.
+Streams mono float32 PCM straight from ffmpeg at the analysis sample rate,
+seeking to the requested window instead of decoding the whole file, and
+reads durations from the container header with ffprobe.
+"""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+
+# librosa.load's default sample rate
+DEFAULT_SAMPLE_RATE = 22050
+
+_ffmpeg_available = None
+
+
+def has_ffmpeg() -> bool:
+    """Check if ffmpeg and ffprobe are on the PATH."""
+    global _ffmpeg_available
+    if _ffmpeg_available is None:
+        _ffmpeg_available = bool(shutil.which('ffmpeg') and shutil.which('ffprobe'))
+    return _ffmpeg_available
+
+
+def get_duration(file_path) -> Optional[float]:
+    """
+    Get a file's duration in seconds from its container header.
+
+    Args:
+        file_path: Audio file
+
+    Returns:
+        Duration in seconds, or None if it can't be determined
+    """
+    if has_ffmpeg():
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', str(file_path)],
+            capture_output=True, text=True
+        )
+        try:
+            return float(result.stdout.strip())
+        except ValueError:
+            pass
+
+    try:
+        import librosa
+        return librosa.get_duration(path=str(file_path))
+    except Exception:
+        return None
+
+
+def load_audio(
+    file_path,
+    sr: int = DEFAULT_SAMPLE_RATE,
+    offset: Optional[float] = None,
+    duration: Optional[float] = None
+) -> Tuple["np.ndarray", int]:
+    """
+    Decode a window of a file to mono float32 samples.
+
+    ffmpeg seeks on the input side, so the audio before the window is never
+    decoded, and resamples to sr while decoding. Without ffmpeg this falls
+    back to librosa.load with the same arguments.
+
+    Args:
+        file_path: Audio file
+        sr: Sample rate to decode at
+        offset: Start of the window in seconds
+        duration: Length of the window in seconds (None for the rest of the file)
+
+    Returns:
+        (samples, sample rate) tuple, like librosa.load
+
+    Raises:
+        RuntimeError: If ffmpeg can't decode the file
+    """
+    import numpy as np
+
+    if not has_ffmpeg():
+        import librosa
+        return librosa.load(str(file_path), sr=sr, offset=offset or 0.0, duration=duration)
+
+    cmd = ['ffmpeg', '-nostdin', '-v', 'error']
+    if offset:
+        cmd.extend(['-ss', f"{offset:.6f}"])
+    if duration:
+        cmd.extend(['-t', f"{duration:.6f}"])
+    cmd.extend(['-i', str(Path(file_path)), '-map', '0:a:0', '-vn',
+                '-ac', '1', '-ar', str(sr), '-f', 'f32le', '-'])
+
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        error = result.stderr.decode(errors='replace').strip().splitlines()
+        raise RuntimeError(f"ffmpeg could not decode {file_path}: {error[-1] if error else 'unknown error'}")
+
+    # Copy into a writable array, like librosa.load returns
+    return np.frombuffer(result.stdout, dtype=np.float32).copy(), sr
+
+
+def stream_audio(
+    file_path,
+    sr: int = DEFAULT_SAMPLE_RATE,
+    block_seconds: float = 60.0
+) -> Iterator["np.ndarray"]:
+    """
+    Decode a whole file as a stream of mono float32 blocks.
+
+    Only one block is held at a time, so memory stays bounded however long
+    the recording is. Every block is block_seconds long except the last.
+    Without ffmpeg, blocks are decoded one window at a time with load_audio.
+
+    Args:
+        file_path: Audio file
+        sr: Sample rate to decode at
+        block_seconds: Length of each block in seconds
+
+    Yields:
+        Blocks of samples in order
+
+    Raises:
+        RuntimeError: If ffmpeg can't decode the file
+    """
+    import numpy as np
+
+    block_samples = int(block_seconds * sr)
+
+    if not has_ffmpeg():
+        offset = 0.0
+        while True:
+            y, _ = load_audio(file_path, sr=sr, offset=offset, duration=block_seconds)
+            if len(y) == 0:
+                return
+            yield y
+            if len(y) < block_samples:
+                return
+            offset += block_seconds
+
+    cmd = ['ffmpeg', '-nostdin', '-v', 'error', '-i', str(Path(file_path)),
+           '-map', '0:a:0', '-vn', '-ac', '1', '-ar', str(sr), '-f', 'f32le', '-']
+    # stderr goes to a file rather than a pipe: nothing reads it until stdout
+    # is done, and a corrupt file can log enough errors to fill a pipe and
+    # block ffmpeg
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+    try:
+        block_bytes = block_samples * 4
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            # Drop a trailing partial sample if the pipe closed mid-sample
+            usable = len(data) - len(data) % 4
+            yield np.frombuffer(data[:usable], dtype=np.float32).copy()
+        process.wait()
+        if process.returncode != 0:
+            # Only the last message is reported
+            errors.seek(max(0, errors.seek(0, 2) - 4096))
+            error = errors.read().decode(errors='replace').strip().splitlines()
+            raise RuntimeError(f"ffmpeg could not decode {file_path}: {error[-1] if error else 'unknown error'}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors.close()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) < 2:
+        print("Usage: python audio_decode.py <audio file> [offset] [duration]")
+        sys.exit(1)
+
+    test_file = sys.argv[1]
+    test_offset = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    test_duration = float(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    start = time.time()
+    print(f"Duration: {get_duration(test_file)}s ({(time.time() - start)*1000:.1f}ms)")
+
+    start = time.time()
+    y, rate = load_audio(test_file, offset=test_offset, duration=test_duration)
+    print(f"ffmpeg: {len(y)} samples at {rate} Hz in {time.time() - start:.2f}s")
+
+    try:
+        import librosa
+        start = time.time()
+        y, rate = librosa.load(test_file, offset=test_offset or 0.0, duration=test_duration)
+        print(f"librosa.load: {len(y)} samples at {rate} Hz in {time.time() - start:.2f}s")
+    except ImportError:
+        pass
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Single-pass directory walker for audio files.
+Visits each directory once with os.scandir and yields matching files as it goes.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+
+# Supported audio file extensions
+AUDIO_EXTENSIONS = {'.mp3', '.mp4', '.m4a', '.flac', '.wav', '.ogg', '.opus', '.aac', '.wma'}
+
+
+def _list_dir(path: str, extensions: Set) -> Tuple[List[str], List[str]]:
+    """
+    Read one directory.
+    Returns (audio file paths, subdirectory paths) using DirEntry type info,
+    so no extra stat calls are made for regular entries.
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        # Unreadable directory - skip it like rglob does
+        pass
+    return files, subdirs
+
+
+def walk_audio_files(
+    directory: str,
+    recursive: bool = True,
+    extensions: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None
+) -> Iterator[Path]:
+    """
+    Yield audio files under a directory, visiting each directory once.
+
+    Args:
+        directory: Directory path to search
+        recursive: Whether to search subdirectories
+        extensions: File extensions to match (default: AUDIO_EXTENSIONS), case-insensitive
+        max_workers: If set, read directories in a thread pool of this size.
+                     Helps on network and Dropbox-mounted volumes where each
+                     directory read is slow.
+
+    Yields:
+        Path objects for audio files, as soon as each directory has been read
+    """
+    if extensions is None:
+        extensions = AUDIO_EXTENSIONS
+    extensions = {ext.lower() for ext in extensions}
+
+    root = str(Path(directory).expanduser())
+
+    if not max_workers:
+        stack = [root]
+        while stack:
+            files, subdirs = _list_dir(stack.pop(), extensions)
+            for file_path in files:
+                yield Path(file_path)
+            if recursive:
+                # Reverse so directories are visited in listing order
+                stack.extend(reversed(subdirs))
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_list_dir, root, extensions)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                if recursive:
+                    for subdir in subdirs:
+                        pending.add(executor.submit(_list_dir, subdir, extensions))
+                for file_path in files:
+                    yield Path(file_path)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    test_dir = sys.argv[1] if len(sys.argv) > 1 else "/Users/pk/Dropbox/Dreadlap"
+
+    start = time.time()
+    count = sum(1 for _ in walk_audio_files(test_dir))
+    print(f"Serial walk: {count} files in {time.time() - start:.2f}s")
+
+    start = time.time()
+    count = sum(1 for _ in walk_audio_files(test_dir, max_workers=8))
+    print(f"Threaded walk (8 workers): {count} files in {time.time() - start:.2f}s")
@@ -15,6 +15,11 @@ from pathlib import Path
 import subprocess
 import re
 
+from audio_decode import load_audio
+from audio_walker import walk_audio_files
+from bpm_batch import run_batch
+from bpm_cache import cached_bpm
+
 
 def check_aubio():
     """Check if aubio is installed."""
@@ -25,45 +30,90 @@ def check_aubio():
         return False
 
 
+# aubio tempo tracking parameters
+AUBIO_SAMPLERATE = 44100
+AUBIO_WIN_SIZE = 1024
+AUBIO_HOP_SIZE = 512
+# Hops read from the source per call - large reads keep the Python loop thin
+AUBIO_BLOCK_HOPS = 256
+
+# Inter-beat intervals further than this many (scaled) MADs from the median are dropped
+IBI_OUTLIER_MADS = 3.0
+
+
+def bpm_from_beats(beats):
+    """
+    Calculate BPM from beat times using the median inter-beat interval.
+    
+    Intervals far from the median (missed or doubled beats) are rejected
+    before taking the median, so a few tracking errors don't skew the result.
+    
+    Args:
+        beats: Beat times in seconds
+        
+    Returns:
+        BPM, or None if there are fewer than two beats
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        # Without numpy just take the plain median interval
+        import statistics
+        intervals = [b - a for a, b in zip(beats, beats[1:]) if b > a]
+        return 60.0 / statistics.median(intervals) if intervals else None
+    
+    intervals = np.diff(np.asarray(beats, dtype=np.float64))
+    intervals = intervals[intervals > 0]
+    if len(intervals) == 0:
+        return None
+    
+    median = np.median(intervals)
+    # 1.4826 * MAD estimates the standard deviation for normally distributed intervals
+    mad = 1.4826 * np.median(np.abs(intervals - median))
+    tolerance = max(IBI_OUTLIER_MADS * mad, 1e-3 * median)
+    inliers = intervals[np.abs(intervals - median) <= tolerance]
+    
+    return float(60.0 / np.median(inliers))
+
+
+def get_aubio_beats(file_path):
+    """
+    Track beats with the aubio Python library.
+    
+    Reads AUBIO_BLOCK_HOPS hops per source call and steps the tempo object
+    over views of that buffer, so the per-hop Python work is one call and a
+    check of its result.
+    
+    Returns:
+        NumPy array of beat times in seconds
+    """
+    import aubio
+    import numpy as np
+    
+    hop_size = AUBIO_HOP_SIZE
+    block_size = hop_size * AUBIO_BLOCK_HOPS
+    
+    s = aubio.source(str(file_path), AUBIO_SAMPLERATE, block_size)
+    tempo = aubio.tempo("default", AUBIO_WIN_SIZE, hop_size, s.samplerate)
+    
+    beats = []
+    while True:
+        samples, read = s()
+        # The tempo object takes exactly hop_size samples; a partial last hop is zero-padded
+        for start in range(0, max(read, 1), hop_size):
+            if tempo(samples[start:start + hop_size]):
+                beats.append(tempo.get_last_s())
+        if read < block_size:
+            break
+    
+    return np.array(beats, dtype=np.float64)
+
+
 def get_bpm_with_aubio(file_path):
     """Get BPM using aubio Python library or command line tool."""
     # Try Python aubio first
     try:
-        import aubio
-        import numpy as np
-        
-        # Read audio file
-        samplerate = 44100
-        hop_size = 512
-        
-        # Create aubio source
-        s = aubio.source(str(file_path), samplerate, hop_size)
-        samplerate = s.samplerate
-        
-        # Create tempo detection
-        tempo = aubio.tempo("default", 1024, hop_size, samplerate)
-        
-        # Process file
-        beats = []
-        total_frames = 0
-        while True:
-            samples, read = s()
-            is_beat = tempo(samples)
-            if is_beat:
-                this_beat = tempo.get_last_s()
-                beats.append(this_beat)
-            total_frames += read
-            if read < hop_size:
-                break
-        
-        # Calculate BPM
-        if len(beats) > 1:
-            # Calculate average interval between beats
-            intervals = np.diff(beats)
-            avg_interval = np.mean(intervals)
-            bpm = 60.0 / avg_interval
-            return float(bpm)
-        return None
+        return bpm_from_beats(get_aubio_beats(file_path))
         
     except ImportError:
         # Fall back to command line tool
@@ -78,13 +128,7 @@ def get_bpm_with_aubio(file_path):
             lines = result.stdout.strip().split('\n')
             beats = [float(line) for line in lines if line.strip()]
             
-            if len(beats) > 1:
-                # Calculate average interval between beats
-                intervals = [beats[i+1] - beats[i] for i in range(len(beats)-1)]
-                avg_interval = sum(intervals) / len(intervals)
-                bpm = 60.0 / avg_interval
-                return float(bpm)
-            return None
+            return bpm_from_beats(beats)
         except (subprocess.CalledProcessError, FileNotFoundError):
             return None
 
@@ -94,7 +138,7 @@ def get_bpm_with_librosa(file_path):
     try:
         import librosa
         import numpy as np
-        y, sr = librosa.load(file_path)
+        y, sr = load_audio(file_path)
         tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
         # Handle numpy array to scalar conversion
         if isinstance(tempo, np.ndarray):
@@ -108,16 +152,20 @@ def get_bpm_with_librosa(file_path):
         return None
 
 
-def process_file(file_path, use_aubio=True):
-    """Process a single audio file and return BPM info."""
+def process_file(file_path, use_aubio=True, refresh=False):
+    """
+    Process a single audio file and return BPM info.
+    
+    Results are looked up in the BPM cache first; refresh=True recomputes them.
+    """
     file_path = Path(file_path)
     if not file_path.exists():
         return None
     
     if use_aubio:
-        bpm = get_bpm_with_aubio(file_path)
+        bpm = cached_bpm(file_path, 'aubio', lambda: get_bpm_with_aubio(file_path), refresh=refresh)
     else:
-        bpm = get_bpm_with_librosa(file_path)
+        bpm = cached_bpm(file_path, 'librosa', lambda: get_bpm_with_librosa(file_path), refresh=refresh)
     
     return {
         'file': str(file_path),
@@ -126,21 +174,39 @@ def process_file(file_path, use_aubio=True):
     }
 
 
-def process_directory(directory, extensions=None, use_aubio=True):
+def failed_result(file_path):
+    """Result recorded for a file whose analysis errored, timed out or crashed."""
+    return {
+        'file': str(file_path),
+        'filename': file_path.name,
+        'bpm': None
+    }
+
+
+def process_files(file_paths, use_aubio=True, jobs=1, timeout=None, checkpoint=None, refresh=False):
+    """
+    Process audio files, optionally in parallel worker processes.
+    
+    With a checkpoint, each finished file is appended to it as JSONL and a
+    re-run skips files that are already there. refresh=True ignores both the
+    checkpoint and the BPM cache.
+    """
+    tasks = [(Path(file_path), (use_aubio, refresh)) for file_path in file_paths]
+    settings = {'tool': 'bpm', 'use_aubio': use_aubio}
+    return run_batch(process_file, tasks, jobs=jobs, timeout=timeout,
+                     checkpoint=checkpoint, settings=settings,
+                     failed_result=failed_result, resume=not refresh)
+
+
+def process_directory(directory, extensions=None, use_aubio=True, jobs=1, timeout=None, checkpoint=None,
+                      refresh=False):
     """Process all audio files in a directory."""
     if extensions is None:
         extensions = ['.mp3', '.wav', '.flac', '.m4a', '.ogg']
     
-    directory = Path(directory)
-    results = []
-    
-    for file_path in directory.rglob('*'):
-        if file_path.is_file() and file_path.suffix.lower() in extensions:
-            result = process_file(file_path, use_aubio)
-            if result:
-                results.append(result)
-    
-    return results
+    file_paths = list(walk_audio_files(directory, extensions=extensions))
+    return process_files(file_paths, use_aubio, jobs=jobs, timeout=timeout, checkpoint=checkpoint,
+                         refresh=refresh)
 
 
 def output_results(results, format='plain', output_file=None):
@@ -183,6 +249,9 @@ Examples:
   %(prog)s -d music/                   # Analyze all files in directory
   %(prog)s -d music/ -f json           # Output as JSON
   %(prog)s *.mp3 -o results.csv -f csv # Save multiple files to CSV
+  %(prog)s -d music/ -j 8 --checkpoint bpm.jsonl  # 8 processes, resumable
+  %(prog)s -d music/ --refresh         # Ignore cached results
+  python bpm_cache.py gc               # Evict cache entries for changed/removed files
         """
     )
     
@@ -196,6 +265,14 @@ Examples:
     parser.add_argument('-e', '--extensions', nargs='+', 
                         default=['.mp3', '.wav', '.flac', '.m4a', '.ogg'],
                         help='File extensions to process (default: .mp3 .wav .flac .m4a .ogg)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes (default: 1)')
+    parser.add_argument('--timeout', type=float, default=300,
+                        help='Seconds allowed per file with --jobs > 1 (default: 300)')
+    parser.add_argument('--checkpoint',
+                        help='JSONL file to record results in and resume an interrupted run from')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Recompute BPMs instead of using cached results')
     
     args = parser.parse_args()
     
@@ -206,11 +283,11 @@ Examples:
         print("Falling back to librosa...")
         use_aubio = False
     
-    results = []
+    file_paths = []
     
     # Process directory if specified
     if args.directory:
-        results.extend(process_directory(args.directory, args.extensions, use_aubio))
+        file_paths.extend(walk_audio_files(args.directory, extensions=args.extensions))
     
     # Process individual files
     for file_path in args.files:
@@ -218,14 +295,13 @@ Examples:
         from glob import glob
         matched_files = glob(file_path)
         if matched_files:
-            for matched_file in matched_files:
-                result = process_file(matched_file, use_aubio)
-                if result:
-                    results.append(result)
+            file_paths.extend(matched_files)
         else:
-            result = process_file(file_path, use_aubio)
-            if result:
-                results.append(result)
+            file_paths.append(file_path)
+    
+    results = process_files(file_paths, use_aubio, jobs=args.jobs,
+                            timeout=args.timeout, checkpoint=args.checkpoint,
+                            refresh=args.refresh)
     
     if not results:
         print("No audio files found or processed.", file=sys.stderr)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Batch runner for the BPM tools.
+Analyses files in a pool of worker processes with per-file timeouts, and
+records every finished file in an append-only JSONL checkpoint so an
+interrupted run picks up where it stopped.
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# A task is a file path plus the extra positional arguments for the worker function
+Task = Tuple[Path, tuple]
+
+
+def _file_key(file_path: Path) -> Optional[Tuple[str, int, int]]:
+    """Identify a file by path, size and mtime so edited files are re-analysed."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return str(file_path), st.st_size, st.st_mtime_ns
+
+
+def load_checkpoint(checkpoint_path: Path, settings: Optional[dict] = None) -> Dict[str, dict]:
+    """
+    Read finished records from a checkpoint.
+
+    The first line holds the settings the run was started with. If they don't
+    match the current settings the checkpoint is stale and is ignored. A
+    truncated last line (from a killed run) is skipped.
+
+    Returns:
+        Dictionary mapping file path to its checkpoint record
+    """
+    records = {}
+    checkpoint_path = Path(checkpoint_path)
+    if not checkpoint_path.exists():
+        return records
+
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        header = f.readline()
+        try:
+            saved_settings = json.loads(header).get('settings')
+        except (json.JSONDecodeError, AttributeError):
+            return records
+        if settings is not None and saved_settings != settings:
+            print(f"Checkpoint {checkpoint_path} was made with different settings - starting over",
+                  file=sys.stderr)
+            return records
+
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record['file']] = record
+
+    return records
+
+
+def _open_checkpoint(checkpoint_path: Path, settings: Optional[dict], records: Dict[str, dict]):
+    """Open a checkpoint for appending, rewriting it first if it was stale or missing."""
+    checkpoint_path = Path(checkpoint_path)
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if checkpoint_path.exists() and records:
+        return open(checkpoint_path, 'a', encoding='utf-8')
+
+    f = open(checkpoint_path, 'w', encoding='utf-8')
+    f.write(json.dumps({'settings': settings}) + '\n')
+    f.flush()
+    return f
+
+
+def _worker_main(conn, func: Callable):
+    """Worker process loop: receive (index, path, args), send back (index, result, error)."""
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        index, file_path, args = task
+        try:
+            conn.send((index, func(file_path, *args), None))
+        except Exception as e:
+            conn.send((index, None, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """One worker process and the task it is currently running."""
+
+    def __init__(self, ctx, func: Callable):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, func), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.index = None
+        self.deadline = None
+
+    def submit(self, index: int, task: Task, timeout: Optional[float]):
+        file_path, args = task
+        self.index = index
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.conn.send((index, file_path, args))
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+
+
+def _run_pool(func: Callable, tasks: List[Task], todo: List[int], jobs: int,
+              timeout: Optional[float], on_done: Callable):
+    """
+    Run tasks in a pool of worker processes.
+
+    A worker that times out is killed, and a worker that dies is replaced,
+    so one bad file only costs its own result.
+    """
+    ctx = multiprocessing.get_context()
+    workers = [_Worker(ctx, func) for _ in range(min(jobs, len(todo)))]
+    queue = list(reversed(todo))
+
+    try:
+        while True:
+            for i, worker in enumerate(workers):
+                if worker.index is None and queue:
+                    try:
+                        worker.submit(queue[-1], tasks[queue[-1]], timeout)
+                        queue.pop()
+                    except (BrokenPipeError, OSError):
+                        worker.kill()
+                        workers[i] = _Worker(ctx, func)
+
+            busy = [w for w in workers if w.index is not None]
+            if not busy:
+                break
+
+            deadlines = [w.deadline for w in busy if w.deadline is not None]
+            wait_for = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait([w.conn for w in busy], wait_for)
+
+            for i, worker in enumerate(workers):
+                if worker.index is None:
+                    continue
+
+                if worker.conn in ready:
+                    try:
+                        index, result, error = worker.conn.recv()
+                    except (EOFError, OSError):
+                        code = worker.process.exitcode
+                        on_done(worker.index, None, f"worker crashed (exit code {code})")
+                        worker.kill()
+                        workers[i] = _Worker(ctx, func)
+                        continue
+                    worker.index = None
+                    on_done(index, result, error)
+
+                elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                    on_done(worker.index, None, f"timed out after {timeout:g}s")
+                    worker.kill()
+                    workers[i] = _Worker(ctx, func)
+    finally:
+        for worker in workers:
+            if worker.index is None:
+                worker.stop()
+            else:
+                worker.kill()
+
+
+def run_batch(
+    func: Callable,
+    tasks: Sequence[Task],
+    jobs: int = 1,
+    timeout: Optional[float] = None,
+    checkpoint: Optional[str] = None,
+    settings: Optional[dict] = None,
+    failed_result: Optional[Callable[[Path], dict]] = None,
+    resume: bool = True
+) -> List[dict]:
+    """
+    Analyse files, optionally in parallel and resumably.
+
+    Args:
+        func: Top-level function called as func(path, *args), returning a result dict or None
+        tasks: (path, args) pairs
+        jobs: Number of worker processes. 1 runs in this process, without timeouts.
+        timeout: Seconds allowed per file before its worker is killed (jobs > 1 only)
+        checkpoint: JSONL file to append finished files to and resume from
+        settings: Analysis settings stored in the checkpoint; a mismatch discards it
+        failed_result: Builds the result recorded for a file that errored,
+                       timed out or crashed its worker
+        resume: Skip files the checkpoint has a result for; files recorded with
+                an error are retried. False starts the checkpoint over.
+
+    Returns:
+        Result dicts in task order, read back from the checkpoint when one is used
+    """
+    tasks = list(tasks)
+    keys = [_file_key(Path(file_path)) for file_path, _ in tasks]
+
+    records = load_checkpoint(checkpoint, settings) if checkpoint and resume else {}
+    checkpoint_file = _open_checkpoint(checkpoint, settings, records) if checkpoint else None
+
+    # Files that errored, timed out or crashed last time are tried again
+    todo = []
+    retries = 0
+    for index, key in enumerate(keys):
+        if key is None:
+            continue
+        record = records.get(key[0])
+        if record is None or (record.get('size'), record.get('mtime_ns')) != key[1:]:
+            todo.append(index)
+        elif record.get('error') is not None:
+            todo.append(index)
+            retries += 1
+
+    resumed = sum(1 for key in keys if key is not None) - len(todo)
+    if resumed or retries:
+        print(f"Resuming from checkpoint: {resumed} files already analysed, {len(todo)} to go"
+              + (f" ({retries} retrying after errors)" if retries else ""),
+              file=sys.stderr)
+
+    finished = [0]
+
+    def on_done(index, result, error):
+        file_path, _ = tasks[index]
+        finished[0] += 1
+        if error:
+            print(f"Error processing {file_path}: {error}", file=sys.stderr)
+            result = failed_result(Path(file_path)) if failed_result else None
+        else:
+            print(f"[{finished[0]}/{len(todo)}] {Path(file_path).name}", file=sys.stderr)
+
+        path_str, size, mtime_ns = keys[index]
+        record = {'file': path_str, 'size': size, 'mtime_ns': mtime_ns,
+                  'result': result, 'error': error}
+        records[path_str] = record
+        if checkpoint_file:
+            checkpoint_file.write(json.dumps(record) + '\n')
+            checkpoint_file.flush()
+
+    try:
+        if jobs > 1 and todo:
+            _run_pool(func, tasks, todo, jobs, timeout, on_done)
+        else:
+            for index in todo:
+                file_path, args = tasks[index]
+                try:
+                    result = func(file_path, *args)
+                except Exception as e:
+                    on_done(index, None, f"{type(e).__name__}: {e}")
+                    continue
+                on_done(index, result, None)
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    # Feed the writers from the checkpoint records, in task order
+    results = []
+    for key in keys:
+        if key is None:
+            continue
+        record = records.get(key[0])
+        if record and record['result']:
+            results.append(record['result'])
+    return results
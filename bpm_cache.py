@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of BPM results.
+Results are keyed on a fingerprint of the file's content plus the method,
+the analysed window and the analysis library version, so unchanged files
+are never decoded twice - even after being renamed or moved.
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from audio_decode import has_ffmpeg
+from library_index import CACHE_DIR
+
+
+BPM_CACHE_DB = CACHE_DIR / "bpm_cache.sqlite"
+
+# Bump when a method's analysis code changes in a way that changes its output
+# (2: audio decoded by ffmpeg instead of librosa.load/MonoLoader,
+#  3: aubio BPM from the median inter-beat interval instead of the mean)
+BPM_CACHE_VERSION = 3
+
+# Bytes hashed from each end of the file for the content fingerprint
+FINGERPRINT_CHUNK = 256 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    fingerprint TEXT NOT NULL,
+    method TEXT NOT NULL,
+    params TEXT NOT NULL,
+    bpm REAL,
+    created REAL,
+    last_used REAL,
+    PRIMARY KEY (fingerprint, method, params)
+);
+"""
+
+
+def file_fingerprint(file_path: Path) -> str:
+    """
+    Hash the size and the first and last FINGERPRINT_CHUNK bytes of a file.
+
+    Reading both ends catches re-encodes and tag edits without reading the
+    whole file.
+    """
+    size = os.path.getsize(file_path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(file_path, 'rb') as f:
+        h.update(f.read(FINGERPRINT_CHUNK))
+        if size > FINGERPRINT_CHUNK:
+            f.seek(max(FINGERPRINT_CHUNK, size - FINGERPRINT_CHUNK))
+            h.update(f.read(FINGERPRINT_CHUNK))
+    return h.hexdigest()
+
+
+_library_versions: Dict[str, str] = {}
+
+
+def library_version(method: str) -> str:
+    """Version of the library a method runs on, so upgrades invalidate old results."""
+    family = method.split('_')[0]
+    if family not in _library_versions:
+        version = 'unavailable'
+        try:
+            if family == 'librosa':
+                import librosa
+                version = librosa.__version__
+            elif family == 'essentia':
+                import essentia
+                version = essentia.__version__
+            elif family == 'aubio':
+                try:
+                    import aubio
+                    version = aubio.version
+                except ImportError:
+                    version = 'aubiotempo-cli'
+        except (ImportError, AttributeError):
+            pass
+        _library_versions[family] = f"{family}-{version}"
+    return _library_versions[family]
+
+
+def method_params(method: str, duration: Optional[float] = None, offset: Optional[float] = None) -> str:
+    """Cache key for everything besides the file content that affects a result."""
+    # load_audio decodes with ffmpeg when it's installed and librosa otherwise,
+    # and the two don't produce identical samples
+    decoder = 'ffmpeg' if has_ffmpeg() else 'librosa'
+    return (f"v{BPM_CACHE_VERSION}|{library_version(method)}|decoder={decoder}"
+            f"|duration={duration}|offset={offset}")
+
+
+class BPMCache:
+    """SQLite store of BPM results keyed by content fingerprint, method and parameters."""
+
+    def __init__(self, db_path: Path = BPM_CACHE_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Batch workers share the database, so wait on locks instead of failing
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def fingerprint(self, file_path: Path) -> Optional[str]:
+        """Content fingerprint of a file, only re-hashed when its size or mtime changed."""
+        path = str(Path(file_path).absolute())
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, fingerprint FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+
+        try:
+            fingerprint = file_fingerprint(path)
+        except OSError:
+            return None
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, fingerprint)
+            )
+        return fingerprint
+
+    def get(self, fingerprint: str, method: str, params: str) -> Tuple[bool, Optional[float]]:
+        """
+        Look up a result.
+
+        Returns:
+            (found, bpm) tuple
+        """
+        row = self.conn.execute(
+            "SELECT bpm FROM results WHERE fingerprint = ? AND method = ? AND params = ?",
+            (fingerprint, method, params)
+        ).fetchone()
+        if row is None:
+            return False, None
+        with self.conn:
+            self.conn.execute(
+                "UPDATE results SET last_used = ? WHERE fingerprint = ? AND method = ? AND params = ?",
+                (time.time(), fingerprint, method, params)
+            )
+        return True, row[0]
+
+    def put(self, fingerprint: str, method: str, params: str, bpm: float):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, method, params, bpm, now, now)
+            )
+
+    def gc(self, max_age_days: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Evict stale entries.
+
+        Forgets files that no longer exist or have changed, then drops results
+        no remaining file refers to, and (with max_age_days) results that
+        haven't been used for that long.
+
+        Returns:
+            (files removed, results removed)
+        """
+        stale = []
+        for path, size, mtime_ns in self.conn.execute("SELECT path, size, mtime_ns FROM files"):
+            try:
+                st = os.stat(path)
+                if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    stale.append((path,))
+            except OSError:
+                stale.append((path,))
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", stale)
+            removed = self.conn.execute(
+                "DELETE FROM results WHERE fingerprint NOT IN (SELECT fingerprint FROM files)"
+            ).rowcount
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                removed += self.conn.execute(
+                    "DELETE FROM results WHERE last_used < ?", (cutoff,)
+                ).rowcount
+        self.conn.execute("VACUUM")
+        return len(stale), removed
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM results")
+        self.conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, int]:
+        files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        results = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {'files': files, 'results': results}
+
+
+# One cache connection per process - batch workers each open their own
+_bpm_cache = None
+_bpm_cache_pid = None
+
+
+def get_bpm_cache() -> BPMCache:
+    """Get this process's BPM cache, opening it on first use."""
+    global _bpm_cache, _bpm_cache_pid
+    if _bpm_cache is None or _bpm_cache_pid != os.getpid():
+        _bpm_cache = BPMCache()
+        _bpm_cache_pid = os.getpid()
+    return _bpm_cache
+
+
+def cached_bpm(file_path: Path, method: str, compute, duration=None, offset=None,
+               refresh: bool = False) -> Optional[float]:
+    """
+    Get a method's BPM for a file from the cache, computing and storing it on a miss.
+
+    Args:
+        file_path: Audio file
+        method: Method name, part of the cache key
+        compute: Called with no arguments to compute the BPM on a miss
+        duration: Analysed duration, part of the cache key
+        offset: Analysed offset, part of the cache key
+        refresh: Recompute even if a cached result exists
+
+    Returns:
+        BPM, or None if the method failed (failures are not cached)
+    """
+    try:
+        cache = get_bpm_cache()
+        fingerprint = cache.fingerprint(file_path)
+    except sqlite3.Error as e:
+        print(f"Warning: BPM cache unavailable: {e}", file=sys.stderr)
+        return compute()
+
+    if fingerprint is None:
+        return compute()
+
+    params = method_params(method, duration, offset)
+    if not refresh:
+        try:
+            found, bpm = cache.get(fingerprint, method, params)
+        except sqlite3.Error as e:
+            print(f"Warning: BPM cache read failed: {e}", file=sys.stderr)
+            found = False
+        if found:
+            return bpm
+
+    bpm = compute()
+    if bpm is not None:
+        try:
+            cache.put(fingerprint, method, params, bpm)
+        except sqlite3.Error as e:
+            print(f"Warning: BPM cache write failed: {e}", file=sys.stderr)
+    return bpm
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the BPM result cache')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    gc_parser = subparsers.add_parser('gc', help='Evict results for missing or changed files')
+    gc_parser.add_argument('--max-age', type=float, metavar='DAYS',
+                           help='Also evict results not used in this many days')
+    subparsers.add_parser('stats', help='Show cache size')
+    subparsers.add_parser('clear', help='Remove all cached results')
+
+    args = parser.parse_args()
+    cache = get_bpm_cache()
+
+    if args.command == 'gc':
+        files, results = cache.gc(args.max_age)
+        print(f"Removed {files} stale files and {results} cached results")
+    elif args.command == 'clear':
+        cache.clear()
+        print("BPM cache cleared")
+
+    stats = cache.stats()
+    print(f"BPM cache: {stats['results']} results for {stats['files']} files ({cache.db_path})")
+
+
+if __name__ == '__main__':
+    main()
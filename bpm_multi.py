@@ -14,86 +14,164 @@ from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+from audio_decode import get_duration, load_audio
+from audio_walker import walk_audio_files
+from bpm_batch import run_batch
+from bpm_cache import cached_bpm
 
-def get_bpm_librosa_standard(file_path, duration=None, offset=None):
+
+class AnalysisContext:
+    """
+    Shared analysis state for running several BPM methods on one file.
+    
+    The window is decoded once per sample rate, and the STFT, percussive (HPSS)
+    signal, mel spectrograms and onset envelopes are computed on first use
+    and reused by every method that needs them. Each intermediate is
+    computed exactly as librosa would inside the method, so results match
+    running the methods separately.
+    """
+    
+    HOP_LENGTH = 512
+    ESSENTIA_SAMPLE_RATE = 44100
+    
+    def __init__(self, file_path, duration=None, offset=None):
+        self.file_path = Path(file_path)
+        self.duration = duration
+        self.offset = offset
+        self._cache = {}
+    
+    def _cached(self, key, compute):
+        """Compute a value once. Failures are cached too so they aren't retried per method."""
+        if key not in self._cache:
+            try:
+                self._cache[key] = (True, compute())
+            except Exception as e:
+                self._cache[key] = (False, e)
+        ok, value = self._cache[key]
+        if not ok:
+            raise value
+        return value
+    
+    def audio(self):
+        """Mono audio and sample rate, decoded from just the analysis window."""
+        return self._cached('audio', lambda: load_audio(
+            self.file_path, offset=self.offset, duration=self.duration))
+    
+    @property
+    def sr(self):
+        return self.audio()[1]
+    
+    def signal(self, name='full'):
+        """The full signal, or its percussive component from HPSS (margin 3.0)."""
+        if name == 'full':
+            return self.audio()[0]
+        
+        def percussive():
+            import librosa
+            y = self.audio()[0]
+            stft_perc = librosa.decompose.hpss(self.stft('full'), margin=3.0)[1]
+            return librosa.istft(stft_perc, dtype=y.dtype, length=y.shape[-1])
+        return self._cached(('signal', name), percussive)
+    
+    def stft(self, signal='full'):
+        """Complex STFT with librosa's defaults."""
+        def compute():
+            import librosa
+            return librosa.stft(self.signal(signal))
+        return self._cached(('stft', signal), compute)
+    
+    def mel_db(self, signal='full', fmax=None):
+        """Log-power mel spectrogram, as onset_strength computes it."""
+        def compute():
+            import librosa
+            import numpy as np
+            power = np.abs(self.stft(signal)) ** 2
+            kwargs = {'fmax': fmax} if fmax is not None else {}
+            mel = librosa.feature.melspectrogram(S=power, sr=self.sr, **kwargs)
+            return librosa.power_to_db(mel)
+        return self._cached(('mel_db', signal, fmax), compute)
+    
+    def onset_envelope(self, signal='full', aggregate='mean', fmax=None):
+        """Onset strength envelope at HOP_LENGTH."""
+        def compute():
+            import librosa
+            import numpy as np
+            return librosa.onset.onset_strength(
+                S=self.mel_db(signal, fmax),
+                sr=self.sr,
+                hop_length=self.HOP_LENGTH,
+                aggregate=np.median if aggregate == 'median' else np.mean
+            )
+        return self._cached(('onset', signal, aggregate, fmax), compute)
+    
+    def essentia_audio(self):
+        """Mono audio at essentia's sample rate, decoded from just the analysis window."""
+        return self._cached('essentia_audio', lambda: load_audio(
+            self.file_path, sr=self.ESSENTIA_SAMPLE_RATE,
+            offset=self.offset, duration=self.duration)[0])
+
+
+def _beat_track_tempo(onset_env, sr, hop_length):
+    """Tempo from librosa beat tracking over an onset envelope, as a float."""
+    import librosa
+    import numpy as np
+    
+    tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
+    
+    if isinstance(tempo, np.ndarray):
+        tempo = tempo.item()
+    
+    return float(tempo)
+
+
+def get_bpm_librosa_standard(file_path, duration=None, offset=None, context=None):
     """Standard librosa beat tracking."""
     try:
-        import librosa
-        import numpy as np
-        
-        y, sr = librosa.load(str(file_path), duration=duration, offset=offset)
-        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-        
-        if isinstance(tempo, np.ndarray):
-            tempo = tempo.item()
+        ctx = context or AnalysisContext(file_path, duration, offset)
         
-        return float(tempo)
+        # beat_track(y=...) tracks a median-aggregated onset envelope
+        onset_env = ctx.onset_envelope('full', aggregate='median')
+        return _beat_track_tempo(onset_env, ctx.sr, ctx.HOP_LENGTH)
     except Exception as e:
         print(f"Error with librosa_standard on {file_path}: {e}", file=sys.stderr)
         return None
 
 
-def get_bpm_librosa_percussive(file_path, duration=None, offset=None):
+def get_bpm_librosa_percussive(file_path, duration=None, offset=None, context=None):
     """Librosa with percussive separation."""
     try:
-        import librosa
-        import numpy as np
-        
-        y, sr = librosa.load(str(file_path), duration=duration, offset=offset)
-        y_percussive = librosa.effects.percussive(y, margin=3.0)
-        tempo, _ = librosa.beat.beat_track(y=y_percussive, sr=sr)
+        ctx = context or AnalysisContext(file_path, duration, offset)
         
-        if isinstance(tempo, np.ndarray):
-            tempo = tempo.item()
-        
-        return float(tempo)
+        onset_env = ctx.onset_envelope('percussive', aggregate='median')
+        return _beat_track_tempo(onset_env, ctx.sr, ctx.HOP_LENGTH)
     except Exception as e:
         print(f"Error with librosa_percussive on {file_path}: {e}", file=sys.stderr)
         return None
 
 
-def get_bpm_librosa_onset(file_path, duration=None, offset=None):
+def get_bpm_librosa_onset(file_path, duration=None, offset=None, context=None):
     """Librosa with onset-based detection."""
     try:
-        import librosa
-        import numpy as np
-        
-        y, sr = librosa.load(str(file_path), duration=duration, offset=offset)
+        ctx = context or AnalysisContext(file_path, duration, offset)
         
         # Calculate onset strength with specific parameters
-        onset_env = librosa.onset.onset_strength(
-            y=y, 
-            sr=sr,
-            aggregate=np.median,
-            fmax=8000
-        )
-        
-        tempo, _ = librosa.beat.beat_track(
-            onset_envelope=onset_env,
-            sr=sr,
-            hop_length=512
-        )
-        
-        if isinstance(tempo, np.ndarray):
-            tempo = tempo.item()
-        
-        return float(tempo)
+        onset_env = ctx.onset_envelope('full', aggregate='median', fmax=8000)
+        return _beat_track_tempo(onset_env, ctx.sr, ctx.HOP_LENGTH)
     except Exception as e:
         print(f"Error with librosa_onset on {file_path}: {e}", file=sys.stderr)
         return None
 
 
-def get_bpm_librosa_tempogram(file_path, duration=None, offset=None):
+def get_bpm_librosa_tempogram(file_path, duration=None, offset=None, context=None):
     """Librosa using tempogram method."""
     try:
         import librosa
         import numpy as np
         
-        y, sr = librosa.load(str(file_path), duration=duration, offset=offset)
-        hop_length = 512
+        ctx = context or AnalysisContext(file_path, duration, offset)
         
-        onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
-        tempo = librosa.beat.tempo(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
+        onset_env = ctx.onset_envelope('full', aggregate='mean')
+        tempo = librosa.beat.tempo(onset_envelope=onset_env, sr=ctx.sr, hop_length=ctx.HOP_LENGTH)
         
         if isinstance(tempo, np.ndarray):
             tempo = tempo[0]
@@ -104,28 +182,13 @@ def get_bpm_librosa_tempogram(file_path, duration=None, offset=None):
         return None
 
 
-def get_bpm_essentia(file_path, duration=None, offset=None):
+def get_bpm_essentia(file_path, duration=None, offset=None, context=None):
     """Essentia RhythmExtractor2013 method."""
     try:
         import essentia.standard as es
         
-        # Load audio
-        if duration or offset:
-            # Load full audio first
-            loader = es.MonoLoader(filename=str(file_path), sampleRate=44100)
-            audio = loader()
-            
-            # Calculate sample indices
-            sr = 44100
-            start_sample = int(offset * sr) if offset else 0
-            end_sample = int((offset + duration) * sr) if duration and offset else (
-                int(duration * sr) if duration else len(audio)
-            )
-            
-            # Slice audio
-            audio = audio[start_sample:end_sample]
-        else:
-            audio = es.MonoLoader(filename=str(file_path), sampleRate=44100)()
+        ctx = context or AnalysisContext(file_path, duration, offset)
+        audio = ctx.essentia_audio()
         
         # Use RhythmExtractor2013
         rhythm_extractor = es.RhythmExtractor2013(method="multifeature")
@@ -137,25 +200,13 @@ def get_bpm_essentia(file_path, duration=None, offset=None):
         return None
 
 
-def get_bpm_essentia_percival(file_path, duration=None, offset=None):
+def get_bpm_essentia_percival(file_path, duration=None, offset=None, context=None):
     """Essentia using Percival method."""
     try:
         import essentia.standard as es
         
-        # Load audio
-        if duration or offset:
-            loader = es.MonoLoader(filename=str(file_path), sampleRate=44100)
-            audio = loader()
-            
-            sr = 44100
-            start_sample = int(offset * sr) if offset else 0
-            end_sample = int((offset + duration) * sr) if duration and offset else (
-                int(duration * sr) if duration else len(audio)
-            )
-            
-            audio = audio[start_sample:end_sample]
-        else:
-            audio = es.MonoLoader(filename=str(file_path), sampleRate=44100)()
+        ctx = context or AnalysisContext(file_path, duration, offset)
+        audio = ctx.essentia_audio()
         
         # Use PercivalBpmEstimator
         bpm_estimator = es.PercivalBpmEstimator()
@@ -201,8 +252,14 @@ def check_dependencies():
     return available_methods
 
 
-def process_file(file_path, methods, duration=None, offset=None):
-    """Process a single file with multiple methods."""
+def process_file(file_path, methods, duration=None, offset=None, refresh=False):
+    """
+    Process a single file with multiple methods.
+    
+    Each method's result is looked up in the BPM cache first, so the file is
+    only decoded if some method has no cached result. refresh=True recomputes
+    them all.
+    """
     file_path = Path(file_path)
     if not file_path.exists():
         return None
@@ -214,30 +271,86 @@ def process_file(file_path, methods, duration=None, offset=None):
         'offset': offset
     }
     
+    # Decode at most once and share intermediate features across all methods
+    context = AnalysisContext(file_path, duration=duration, offset=offset)
+    
     for method_name in methods:
         if method_name in METHODS:
-            bpm = METHODS[method_name](file_path, duration=duration, offset=offset)
+            method = METHODS[method_name]
+            bpm = cached_bpm(
+                file_path, method_name,
+                lambda: method(file_path, duration=duration, offset=offset, context=context),
+                duration=duration, offset=offset, refresh=refresh
+            )
             results[method_name] = round(bpm, 2) if bpm else None
     
     return results
 
 
-def process_directory(directory, extensions=None, methods=None, duration=None, offset=None):
+def failed_result(file_path, methods, duration=None, offset=None):
+    """Result recorded for a file whose analysis errored, timed out or crashed."""
+    result = {
+        'file': str(file_path),
+        'filename': file_path.name,
+        'duration': duration,
+        'offset': offset
+    }
+    for method_name in methods:
+        result[method_name] = None
+    return result
+
+
+def resolve_offset(file_path, duration, offset):
+    """Turn the --middle placeholder offset (-1) into the offset of the middle of the file."""
+    if offset != -1:
+        return offset
+    file_duration = get_duration(file_path)
+    if file_duration is None:
+        return 30  # Default to 30 seconds if can't determine
+    return max(0, (file_duration - duration) / 2)
+
+
+def analyse_file(file_path, methods, duration=None, offset=None, refresh=False):
+    """Batch worker: resolve a --middle offset for the file, then process it."""
+    return process_file(file_path, methods, duration=duration,
+                        offset=resolve_offset(file_path, duration, offset), refresh=refresh)
+
+
+def process_files(file_paths, methods, duration=None, offset=None, jobs=1, timeout=None,
+                  checkpoint=None, refresh=False):
+    """
+    Process audio files with multiple methods, optionally in parallel worker processes.
+    
+    With a checkpoint, each finished file is appended to it as JSONL and a
+    re-run skips files that are already there. refresh=True ignores both the
+    checkpoint and the BPM cache.
+    """
+    tasks = [(Path(file_path), (methods, duration, offset, refresh)) for file_path in file_paths]
+    
+    settings = {
+        'tool': 'bpm_multi',
+        'methods': sorted(methods),
+        'duration': duration,
+        'offset': offset
+    }
+    return run_batch(
+        analyse_file, tasks, jobs=jobs, timeout=timeout,
+        checkpoint=checkpoint, settings=settings,
+        failed_result=lambda path: failed_result(path, methods, duration,
+                                                 None if offset == -1 else offset),
+        resume=not refresh
+    )
+
+
+def process_directory(directory, extensions=None, methods=None, duration=None, offset=None,
+                      jobs=1, timeout=None, checkpoint=None, refresh=False):
     """Process all audio files in a directory."""
     if extensions is None:
         extensions = ['.mp3', '.wav', '.flac', '.m4a', '.ogg']
     
-    directory = Path(directory)
-    results = []
-    
-    for file_path in sorted(directory.rglob('*')):
-        if file_path.is_file() and file_path.suffix.lower() in extensions:
-            print(f"Processing {file_path.name}...", file=sys.stderr)
-            result = process_file(file_path, methods, duration=duration, offset=offset)
-            if result:
-                results.append(result)
-    
-    return results
+    file_paths = sorted(walk_audio_files(directory, extensions=extensions))
+    return process_files(file_paths, methods, duration=duration, offset=offset,
+                         jobs=jobs, timeout=timeout, checkpoint=checkpoint, refresh=refresh)
 
 
 def generate_summary_report(results, methods, output_file):
@@ -400,6 +513,9 @@ Examples:
   %(prog)s -d music/ --methods librosa_percussive essentia
   %(prog)s song.mp3 --middle            # Use middle 30 seconds
   %(prog)s song.mp3 --duration 60 --offset 30  # Custom segment
+  %(prog)s -d music/ -j 8               # 8 worker processes, resumable
+  %(prog)s -d music/ --refresh          # Ignore cached results
+  python bpm_cache.py gc                # Evict cache entries for changed/removed files
         """
     )
     
@@ -418,6 +534,15 @@ Examples:
     parser.add_argument('-e', '--extensions', nargs='+', 
                         default=['.mp3', '.wav', '.flac', '.m4a', '.ogg'],
                         help='File extensions to process')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes (default: 1)')
+    parser.add_argument('--timeout', type=float, default=600,
+                        help='Seconds allowed per file with --jobs > 1 (default: 600)')
+    parser.add_argument('--checkpoint',
+                        help='JSONL checkpoint to resume from '
+                             '(default: bpm-results/<prefix>_checkpoint.jsonl)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Recompute BPMs instead of using cached results')
     
     args = parser.parse_args()
     
@@ -448,46 +573,33 @@ Examples:
         # For now, we'll use a placeholder
         offset = -1  # Special value to indicate "calculate middle"
     
-    results = []
+    file_paths = []
     
     # Process directory if specified
     if args.directory:
-        results.extend(process_directory(
-            args.directory, 
-            args.extensions, 
-            methods_to_use,
-            duration=duration,
-            offset=offset
-        ))
+        file_paths.extend(sorted(walk_audio_files(args.directory, extensions=args.extensions)))
     
     # Process individual files
     for file_path in args.files:
         from glob import glob
         matched_files = glob(file_path)
         if matched_files:
-            for matched_file in matched_files:
-                # Handle middle calculation if needed
-                actual_offset = offset
-                if offset == -1:  # Middle flag
-                    try:
-                        import librosa
-                        file_duration = librosa.get_duration(filename=str(matched_file))
-                        actual_offset = max(0, (file_duration - 30) / 2)
-                    except:
-                        actual_offset = 30  # Default to 30 seconds if can't determine
-                
-                print(f"Processing {matched_file}...", file=sys.stderr)
-                result = process_file(
-                    matched_file, 
-                    methods_to_use,
-                    duration=duration,
-                    offset=actual_offset if actual_offset != -1 else None
-                )
-                if result:
-                    results.append(result)
+            file_paths.extend(matched_files)
         else:
             print(f"Warning: No files matched pattern: {file_path}", file=sys.stderr)
     
+    checkpoint = args.checkpoint or str(Path('bpm-results') / f"{args.output}_checkpoint.jsonl")
+    results = process_files(
+        file_paths,
+        methods_to_use,
+        duration=duration,
+        offset=offset,
+        jobs=args.jobs,
+        timeout=args.timeout,
+        checkpoint=checkpoint,
+        refresh=args.refresh
+    )
+    
     if not results:
         print("No audio files processed.", file=sys.stderr)
         sys.exit(1)
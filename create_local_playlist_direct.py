@@ -4,10 +4,11 @@ Create a local file playlist directly from target.md without requiring source fi
 """
 
 import argparse
+import asyncio
 import sys
 from pathlib import Path
 from local_file_search import find_tunes_for_set
-from vlc_playlist import create_playlist_from_sets
+from vlc_playlist import create_playlist_from_sets, StreamingSetPlaylist
 from album_search import print_album_info
 from tune_disambiguation import get_tune_types, format_tune_type_info
 
@@ -34,6 +35,52 @@ def read_target_file_direct(target_file: str):
     return sets
 
 
+async def search_and_write_async(
+    matched_sets,
+    tunes,
+    directories,
+    output_file: str,
+    playlist_format: str,
+    threshold: float,
+    overload=None,
+    max_workers=None
+):
+    """
+    Run the async search pipeline, printing each tune as it completes and
+    writing sets to the playlist as soon as all their tunes are found.
+    
+    Returns:
+        Tuple of (file_results, playlist_path)
+    """
+    from local_file_search_async import stream_tunes_for_set
+    
+    playlist = StreamingSetPlaylist(matched_sets, output_file, playlist_format=playlist_format)
+    file_results = {}
+    
+    try:
+        async for tune, matches in stream_tunes_for_set(
+            tunes,
+            directories,
+            use_aliases=True,
+            threshold=threshold,
+            overload=overload,
+            max_workers=max_workers
+        ):
+            file_results[tune] = [match[0] for match in matches]
+            playlist.add_tune_result(tune, file_results[tune])
+            
+            status = f"{len(matches)} match(es)" if matches else "no matches"
+            print(f"  [{len(file_results)}/{len(tunes)}] {tune}: {status} ({playlist.written} tracks written)")
+            for path, score in matches[:3]:
+                print(f"    - {path.name} (score: {score:.2f})")
+    except BaseException:
+        # Includes Ctrl-C and cancellation; keep the previous playlist
+        playlist.abort()
+        raise
+    
+    return file_results, playlist.close()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Create a local file playlist directly from target.md"
@@ -90,6 +137,12 @@ def main():
         type=int,
         help="Maximum number of parallel workers (default: CPU count)"
     )
+    parser.add_argument(
+        "--partition",
+        choices=["tunes", "files"],
+        default="tunes",
+        help="With --async, split work across workers by tune or by shard of the library (default: tunes)"
+    )
     parser.add_argument(
         "--exclude-unknown",
         action="store_true",
@@ -137,24 +190,51 @@ def main():
     # Search for files
     print(f"\nSearching for audio files in: {', '.join(args.directories)}")
     
-    if args.use_async:
-        from local_file_search_async import find_tunes_for_set_optimized
-        file_results = find_tunes_for_set_optimized(
+    # Create playlist
+    if args.output:
+        output_file = args.output
+    else:
+        output_file = f"irish_tunes.{args.playlist}"
+    
+    if args.use_async and args.partition == "tunes":
+        # Stream results: print progress and write finished sets as tunes complete
+        file_results, playlist_path = asyncio.run(search_and_write_async(
+            matched_sets,
             list(all_tunes),
             args.directories,
-            use_aliases=True,
+            output_file,
+            args.playlist,
             threshold=args.threshold,
             overload=args.overload,
-            use_async=True,
             max_workers=args.max_workers
-        )
+        ))
     else:
-        file_results = find_tunes_for_set(
-            list(all_tunes),
-            args.directories,
-            use_aliases=True,
-            threshold=args.threshold,
-            overload=args.overload
+        if args.use_async:
+            from local_file_search_async import find_tunes_for_set_optimized
+            file_results = find_tunes_for_set_optimized(
+                list(all_tunes),
+                args.directories,
+                use_aliases=True,
+                threshold=args.threshold,
+                overload=args.overload,
+                use_async=True,
+                max_workers=args.max_workers,
+                partition=args.partition
+            )
+        else:
+            file_results = find_tunes_for_set(
+                list(all_tunes),
+                args.directories,
+                use_aliases=True,
+                threshold=args.threshold,
+                overload=args.overload
+            )
+        
+        playlist_path = create_playlist_from_sets(
+            matched_sets,
+            file_results,
+            output_file,
+            playlist_format=args.playlist
         )
     
     # Count found files
@@ -168,19 +248,6 @@ def main():
         for tune in missing:
             print(f"  - {tune}")
     
-    # Create playlist
-    if args.output:
-        output_file = args.output
-    else:
-        output_file = f"irish_tunes.{args.playlist}"
-    
-    playlist_path = create_playlist_from_sets(
-        matched_sets,
-        file_results,
-        output_file,
-        playlist_format=args.playlist
-    )
-    
     if playlist_path:
         print(f"\nPlaylist created: {playlist_path}")
         
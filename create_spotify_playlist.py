@@ -12,6 +12,7 @@ import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from irish_playlist_manager import IrishPlaylistManager
 from spotify_integration import SpotifyPlaylistCreator
+from spotify_search_executor import SpotifySearchExecutor
 
 def write_songs_to_file(matching_sets, filename="single-songs.md"):
     """Write all individual song names to a file"""
@@ -48,42 +49,19 @@ def read_songs_from_file(filename="single-songs.md"):
                 songs.append(line[2:])
     return songs
 
-def create_overload_playlist(songs, n_versions=3, auth_manager=None, client_id=None, client_secret=None, redirect_uri=None):
-    """Create a playlist with N versions of each song"""
-    import time
+def find_overload_versions(songs, n_versions=3, sp=None, offline=False):
+    """
+    Find up to N versions of each song, by different artists.
+    Songs are searched concurrently through the shared search executor, which
+    answers from the search cache when possible; offline=True uses only
+    cached results.
     
-    # Create SpotifyOAuth if not provided
-    if not auth_manager:
-        auth_manager = SpotifyOAuth(
-            client_id=client_id,
-            client_secret=client_secret,
-            redirect_uri=redirect_uri,
-            scope="playlist-modify-public playlist-modify-private",
-            cache_path=".spotify_cache",
-            open_browser=False
-        )
+    Returns:
+        List of track URIs
+    """
+    searcher = SpotifySearchExecutor(sp, offline=offline)
     
-    # Create Spotify client
-    sp = spotipy.Spotify(auth_manager=auth_manager)
-    
-    # Create playlist
-    user_id = sp.current_user()['id']
-    playlist_name = f"Irish Practice Overload - {time.strftime('%Y-%m-%d')}"
-    playlist = sp.user_playlist_create(
-        user_id,
-        playlist_name,
-        public=False,
-        description=f"Multiple versions of Irish traditional tunes ({n_versions} versions each)"
-    )
-    
-    print(f"\nCreated playlist: {playlist_name}")
-    print(f"Playlist URL: {playlist['external_urls']['spotify']}")
-    
-    track_uris = []
-    
-    for song in songs:
-        print(f"\nSearching for {n_versions} versions of: {song}")
-        
+    def search_song(song):
         # Search for multiple versions
         search_queries = [
             f'"{song}" irish traditional',
@@ -100,7 +78,7 @@ def create_overload_playlist(songs, n_versions=3, auth_manager=None, client_id=N
             if len(found_versions) >= n_versions:
                 break
                 
-            results = sp.search(q=query, type='track', limit=50)
+            results = searcher.search(query, limit=50)
             
             for track in results['tracks']['items']:
                 if len(found_versions) >= n_versions:
@@ -113,14 +91,58 @@ def create_overload_playlist(songs, n_versions=3, auth_manager=None, client_id=N
                 if song.lower() in track_name and artist_name not in seen_artists:
                     found_versions.append(track)
                     seen_artists.add(artist_name)
-                    track_uris.append(track['uri'])
-                    print(f"  ✓ Found: {track['name']} by {artist_name}")
-            
-            time.sleep(0.1)  # Be nice to Spotify API
+        
+        return found_versions
+    
+    track_uris = []
+    
+    for song, found_versions in zip(songs, searcher.map(search_song, songs)):
+        print(f"\nSearching for {n_versions} versions of: {song}")
+        
+        for track in found_versions:
+            track_uris.append(track['uri'])
+            artist_name = track['artists'][0]['name'] if track['artists'] else "Unknown"
+            print(f"  ✓ Found: {track['name']} by {artist_name}")
         
         if len(found_versions) < n_versions:
             print(f"  ⚠ Only found {len(found_versions)} versions of {song}")
     
+    searcher.print_stats()
+    return track_uris
+
+def create_overload_playlist(songs, n_versions=3, auth_manager=None, client_id=None, client_secret=None, redirect_uri=None):
+    """Create a playlist with N versions of each song"""
+    import time
+    
+    # Create SpotifyOAuth if not provided
+    if not auth_manager:
+        auth_manager = SpotifyOAuth(
+            client_id=client_id,
+            client_secret=client_secret,
+            redirect_uri=redirect_uri,
+            scope="playlist-modify-public playlist-modify-private",
+            cache_path=".spotify_cache",
+            open_browser=False
+        )
+    
+    # Create Spotify client
+    sp = spotipy.Spotify(auth_manager=auth_manager)
+    
+    # Create playlist
+    user_id = sp.current_user()['id']
+    playlist_name = f"Irish Practice Overload - {time.strftime('%Y-%m-%d')}"
+    playlist = sp.user_playlist_create(
+        user_id,
+        playlist_name,
+        public=False,
+        description=f"Multiple versions of Irish traditional tunes ({n_versions} versions each)"
+    )
+    
+    print(f"\nCreated playlist: {playlist_name}")
+    print(f"Playlist URL: {playlist['external_urls']['spotify']}")
+    
+    track_uris = find_overload_versions(songs, n_versions, sp)
+    
     # Add tracks to playlist
     if track_uris:
         for i in range(0, len(track_uris), 100):
@@ -204,10 +226,10 @@ def main():
             print(f"\nFound {len(songs)} songs in single-songs.md")
             
             if args.dry_run:
-                print(f"\nDry-run mode: Would create playlist with {args.versions} versions of each song:")
-                for i, song in enumerate(songs, 1):
-                    print(f"  {i}. {song}")
-                print(f"\nTotal tracks: ~{len(songs) * args.versions}")
+                print(f"\nDry-run mode: Would create playlist with {args.versions} versions of each song")
+                print("(using cached search results only)")
+                track_uris = find_overload_versions(songs, args.versions, offline=True)
+                print(f"\nTotal tracks: {len(track_uris)} (~{len(songs) * args.versions} requested)")
             else:
                 playlist_url = create_overload_playlist(songs, args.versions, auth_manager, CLIENT_ID, CLIENT_SECRET, REDIRECT_URI)
                 
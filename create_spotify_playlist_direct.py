@@ -15,38 +15,41 @@ from dotenv import load_dotenv
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 
-from fuzzy_match import normalize_tune_name, calculate_similarity
+from spotify_matching import TrackMatcher, type_keywords_for
+from spotify_playlist_sync import sync_playlist
+from spotify_query_planner import QueryPlanner
+from spotify_search_executor import SpotifySearchExecutor
 from thesession_data import get_tune_aliases
 from tune_disambiguation import get_tune_types, format_tune_type_info
 
 
 class DirectSpotifyPlaylistCreator:
-    def __init__(self, client_id, client_secret, redirect_uri="http://127.0.0.1:8888/callback"):
+    def __init__(self, client_id, client_secret, redirect_uri="http://127.0.0.1:8888/callback",
+                 offline: bool = False):
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
         self.scope = "playlist-modify-public playlist-modify-private"
         
-        self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-            client_id=self.client_id,
-            client_secret=self.client_secret,
-            redirect_uri=self.redirect_uri,
-            scope=self.scope,
-            open_browser=True
-        ))
+        # Offline mode answers searches from the cache only and never authenticates
+        self.offline = offline
+        if offline:
+            self.sp = None
+        else:
+            self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
+                client_id=self.client_id,
+                client_secret=self.client_secret,
+                redirect_uri=self.redirect_uri,
+                scope=self.scope,
+                open_browser=True
+            ))
         
-    def fuzzy_match_track(self, tune_name: str, track_name: str, threshold: float = 0.85) -> bool:
-        """Check if a track name matches the tune name using fuzzy matching."""
-        norm_tune = normalize_tune_name(tune_name)
-        norm_track = normalize_tune_name(track_name)
+        # Cached, rate-limited searches that can run on several threads
+        self.searcher = SpotifySearchExecutor(self.sp, offline=offline)
         
-        # Direct substring match
-        if norm_tune in norm_track or norm_track in norm_tune:
-            return True
+        # Picks and orders each tune's queries, learning which phrasings find matches
+        self.planner = QueryPlanner()
         
-        # Check similarity
-        return calculate_similarity(norm_tune, norm_track) >= threshold
-    
     def search_tune_with_context(self, tune_name: str, tune_type: Optional[str] = None, 
                                 overload: int = 1, threshold: float = 0.85) -> List[Dict]:
         """
@@ -59,112 +62,52 @@ class DirectSpotifyPlaylistCreator:
         found_tracks = []
         seen_tracks = set()
         
-        # If we have tune type info, use it in search
-        type_keywords = []
-        if tune_type:
-            type_keywords = [tune_type.lower()]
-            # Add variations
-            if tune_type.lower() == 'reel':
-                type_keywords.extend(['reels'])
-            elif tune_type.lower() == 'jig':
-                type_keywords.extend(['jigs'])
+        # If we have tune type info, use it in search and scoring
+        type_keywords = type_keywords_for(tune_type)
+        matcher = TrackMatcher(threshold, type_keywords)
         
-        # Try each alias
-        for alias in aliases:
-            # Build search queries
-            searches = []
-            
-            # If we have type, include it
-            if type_keywords:
-                for tk in type_keywords:
-                    searches.append(f'"{alias}" {tk} irish')
-                    searches.append(f'{alias} {tk} irish')
-            
-            # Standard searches
-            searches.extend([
-                f'"{alias}" irish traditional',
-                f'{alias} irish traditional',
-                f'{alias} irish trad',
-                f'{alias} irish',
-                alias
-            ])
+        # Queries for every alias, de-duplicated and ordered by past hit rate
+        queries = self.planner.plan(aliases, type_keywords)
+        
+        # Queries whose results were not cut off by the limit
+        complete = []
+        
+        for query in queries:
+            if len(found_tracks) >= overload:
+                break
+            if self.planner.is_redundant(query, complete):
+                continue
             
-            for search_query in searches:
-                if len(found_tracks) >= overload:
-                    break
-                    
-                try:
-                    results = self.sp.search(q=search_query, type='track', limit=30)
-                    
-                    if results['tracks']['items']:
-                        # Score and rank results
-                        scored_tracks = []
-                        
-                        for track in results['tracks']['items']:
-                            track_name = track['name']
-                            artist_name = track['artists'][0]['name'] if track['artists'] else ""
-                            track_uri = track['uri']
-                            album_name = track['album']['name'] if track.get('album') else ""
-                            
-                            # Skip if we've already found this track
-                            if track_uri in seen_tracks:
-                                continue
-                            
-                            # Calculate match score
-                            score = 0
-                            
-                            # Check if tune name matches using fuzzy matching
-                            if self.fuzzy_match_track(alias, track_name, threshold):
-                                score += 10
-                            
-                            # Bonus for tune type in track/album name
-                            if type_keywords:
-                                for tk in type_keywords:
-                                    if tk in track_name.lower() or tk in album_name.lower():
-                                        score += 3
-                            
-                            # Bonus for Irish/traditional keywords
-                            lower_track = track_name.lower()
-                            lower_artist = artist_name.lower()
-                            lower_album = album_name.lower()
-                            
-                            irish_keywords = ['irish', 'traditional', 'trad', 'celtic', 'session']
-                            for keyword in irish_keywords:
-                                if keyword in lower_track or keyword in lower_artist or keyword in lower_album:
-                                    score += 2
-                            
-                            # Penalty for non-traditional indicators
-                            modern_keywords = ['remix', 'cover', 'rock', 'pop', 'jazz', 'metal', 'techno']
-                            for keyword in modern_keywords:
-                                if keyword in lower_track or keyword in lower_artist:
-                                    score -= 3
-                            
-                            if score > 0:
-                                scored_tracks.append((score, track))
-                        
-                        # Sort by score and add best matches
-                        scored_tracks.sort(key=lambda x: x[0], reverse=True)
-                        
-                        for score, track in scored_tracks[:overload - len(found_tracks)]:
-                            if track['uri'] not in seen_tracks:
-                                found_tracks.append({
-                                    'uri': track['uri'],
-                                    'name': track['name'],
-                                    'artist': track['artists'][0]['name'] if track['artists'] else 'Unknown',
-                                    'album': track['album']['name'] if track.get('album') else 'Unknown',
-                                    'score': score,
-                                    'matched_alias': alias
-                                })
-                                seen_tracks.add(track['uri'])
-                                
-                except Exception as e:
-                    print(f"    Search error: {e}")
-                    time.sleep(1)
+            found_before = len(found_tracks)
+            try:
+                results = self.searcher.search(query.query, limit=30)
                 
-                time.sleep(0.1)  # Be nice to Spotify API
+                # Score and rank the whole page at once
+                scored_tracks = matcher.rank_page(query.alias, results['tracks']['items'], seen_tracks)
                 
-            if len(found_tracks) >= overload:
-                break
+                # Add best matches
+                for score, track in scored_tracks[:overload - len(found_tracks)]:
+                    if track['uri'] not in seen_tracks:
+                        found_tracks.append({
+                            'uri': track['uri'],
+                            'name': track['name'],
+                            'artist': track['artists'][0]['name'] if track['artists'] else 'Unknown',
+                            'album': track['album']['name'] if track.get('album') else 'Unknown',
+                            'score': score,
+                            'matched_alias': query.alias
+                        })
+                        seen_tracks.add(track['uri'])
+                        
+            except Exception as e:
+                print(f"    Search error: {e}")
+                continue
+            
+            # Offline misses come back empty, which says nothing about the query
+            if self.offline:
+                continue
+            if len(results['tracks']['items']) < 30:
+                complete.append(query)
+            self.planner.record(query, len(found_tracks) > found_before)
         
         return found_tracks[:overload]
 
@@ -223,6 +166,16 @@ def main():
         action="store_true",
         help="Show tune type information"
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Search offline from cached results only, without creating a playlist"
+    )
+    parser.add_argument(
+        "--sync",
+        metavar="PLAYLIST_ID",
+        help="Update this existing playlist in place (only the changed tracks) instead of creating a new one"
+    )
     
     args = parser.parse_args()
     
@@ -230,7 +183,7 @@ def main():
     CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID')
     CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
     
-    if not CLIENT_ID or not CLIENT_SECRET:
+    if not args.dry_run and (not CLIENT_ID or not CLIENT_SECRET):
         print("Please set SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in .env file")
         print("Example .env file:")
         print("SPOTIFY_CLIENT_ID=your_client_id")
@@ -253,22 +206,33 @@ def main():
     print(f"Found {len(matched_sets)} sets containing {len(all_tunes)} unique tunes")
     
     # Initialize Spotify client
-    spotify_creator = DirectSpotifyPlaylistCreator(CLIENT_ID, CLIENT_SECRET)
-    
-    # Get current user ID
-    user_id = spotify_creator.sp.current_user()['id']
+    spotify_creator = DirectSpotifyPlaylistCreator(CLIENT_ID, CLIENT_SECRET, offline=args.dry_run)
     
-    # Create playlist
     playlist_name = args.playlist_name or f"Irish Session Practice - {time.strftime('%Y-%m-%d')}"
-    playlist = spotify_creator.sp.user_playlist_create(
-        user_id, 
-        playlist_name,
-        public=False,
-        description=f"Irish traditional music sets (threshold={args.threshold}, overload={args.overload})"
-    )
     
-    print(f"\nCreated playlist: {playlist_name}")
-    print(f"Playlist URL: {playlist['external_urls']['spotify']}")
+    if args.dry_run:
+        print("\nRunning in dry-run mode (searching cached results only, no playlist will be created)")
+        playlist = None
+    elif args.sync:
+        playlist = spotify_creator.sp.playlist(args.sync, fields='id,name,external_urls')
+        playlist_name = playlist['name']
+        
+        print(f"\nSyncing playlist: {playlist_name}")
+        print(f"Playlist URL: {playlist['external_urls']['spotify']}")
+    else:
+        # Get current user ID
+        user_id = spotify_creator.sp.current_user()['id']
+        
+        # Create playlist
+        playlist = spotify_creator.sp.user_playlist_create(
+            user_id, 
+            playlist_name,
+            public=False,
+            description=f"Irish traditional music sets (threshold={args.threshold}, overload={args.overload})"
+        )
+        
+        print(f"\nCreated playlist: {playlist_name}")
+        print(f"Playlist URL: {playlist['external_urls']['spotify']}")
     
     # Search for tunes
     print(f"\nSearching for tunes on Spotify...")
@@ -277,25 +241,33 @@ def main():
     not_found = []
     stats = {'exact': 0, 'alias': 0, 'fuzzy': 0, 'total': 0}
     
-    # Process each set
-    for set_idx, set_data in enumerate(matched_sets):
-        print(f"\nSet {set_idx + 1}: {set_data['set_name']}")
-        
+    # Get tune types if requested
+    tune_jobs = []
+    for set_data in matched_sets:
         for tune in set_data['tunes']:
-            # Get tune type if available
             tune_type = None
             if args.show_types:
                 tune_types = get_tune_types(tune)
                 if tune_types and len(tune_types) == 1:
                     tune_type = tune_types[0]['type']
+            tune_jobs.append((tune, tune_type))
+    
+    # Search all tunes concurrently - the executor keeps within Spotify's rate limit
+    search_results = spotify_creator.searcher.map(
+        lambda job: spotify_creator.search_tune_with_context(job[0], job[1], args.overload, args.threshold),
+        tune_jobs
+    )
+    results_iter = iter(zip(tune_jobs, search_results))
+    
+    # Process each set
+    for set_idx, set_data in enumerate(matched_sets):
+        print(f"\nSet {set_idx + 1}: {set_data['set_name']}")
+        
+        for _ in set_data['tunes']:
+            (tune, tune_type), tracks = next(results_iter)
             
             print(f"  Searching: {tune}" + (f" ({tune_type})" if tune_type else ""))
             
-            # Search with context
-            tracks = spotify_creator.search_tune_with_context(
-                tune, tune_type, args.overload, args.threshold
-            )
-            
             if tracks:
                 for track_info in tracks:
                     all_track_uris.append(track_info['uri'])
@@ -328,11 +300,20 @@ def main():
                 seen.add(uri)
                 unique_uris.append(uri)
         
-        for i in range(0, len(unique_uris), 100):
-            batch = unique_uris[i:i+100]
-            spotify_creator.sp.playlist_add_items(playlist['id'], batch)
-        
-        print(f"\n✓ Added {len(unique_uris)} unique tracks to playlist")
+        if args.dry_run:
+            print(f"\nDry-run mode: would add {len(unique_uris)} unique tracks to {playlist_name}")
+        elif args.sync:
+            plan = sync_playlist(spotify_creator.sp, playlist['id'], unique_uris)
+            if plan.is_empty:
+                print(f"\n✓ Playlist already up to date ({len(unique_uris)} tracks)")
+            else:
+                print(f"\n✓ Synced {len(unique_uris)} unique tracks: {plan.summary()}")
+        else:
+            for i in range(0, len(unique_uris), 100):
+                batch = unique_uris[i:i+100]
+                spotify_creator.sp.playlist_add_items(playlist['id'], batch)
+            
+            print(f"\n✓ Added {len(unique_uris)} unique tracks to playlist")
         print(f"\nMatch statistics:")
         print(f"  Total matches: {stats['total']}")
         print(f"  - Exact: {stats['exact']}")
@@ -346,8 +327,13 @@ def main():
         if len(not_found) > 10:
             print(f"  ... and {len(not_found) - 10} more")
     
-    print(f"\n✓ Done! Your playlist is ready:")
-    print(f"  {playlist['external_urls']['spotify']}")
+    spotify_creator.searcher.print_stats()
+    spotify_creator.planner.print_stats()
+    spotify_creator.planner.stats.save()
+    
+    if playlist:
+        print(f"\n✓ Done! Your playlist is ready:")
+        print(f"  {playlist['external_urls']['spotify']}")
 
 
 if __name__ == "__main__":
@@ -8,27 +8,21 @@ Supports filtering by format (vinyl, LP, etc.)
 import requests
 import argparse
 import os
-import time
 from dotenv import load_dotenv
 from urllib.parse import quote
 
+from discogs_client import DiscogsClient
+
 # Load environment variables
 load_dotenv()
 
 class DiscogsSearcher:
-    def __init__(self, user_token):
-        self.base_url = "https://api.discogs.com"
-        self.headers = {
-            "User-Agent": "DiscogsAlbumSearcher/1.0",
-            "Authorization": f"Discogs token={user_token}"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+    def __init__(self, user_token, refresh=False):
+        # Pooled, cached and paced by Discogs' rate-limit headers
+        self.client = DiscogsClient(user_token, user_agent="DiscogsAlbumSearcher/1.0", refresh=refresh)
     
     def search_releases(self, query, artist=None, title=None, format_filter=None, page=1, per_page=50):
         """Search for releases on Discogs"""
-        url = f"{self.base_url}/database/search"
-        
         params = {
             "page": page,
             "per_page": per_page,
@@ -48,23 +42,17 @@ class DiscogsSearcher:
         print(f"Searching with params: {params}")
         
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            return self.client.get_json("/database/search", params=params)
         except Exception as e:
             print(f"Search error: {e}")
             return None
     
     def get_release_details(self, release_id):
         """Get detailed release information"""
-        url = f"{self.base_url}/releases/{release_id}"
-        
         try:
-            response = self.session.get(url, timeout=30)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return None
+            return self.client.get_json(f"/releases/{release_id}")
+        except requests.exceptions.HTTPError:
+            return None
         except Exception as e:
             print(f"Release details error: {e}")
             return None
@@ -125,9 +113,6 @@ class DiscogsSearcher:
                     print(f"    {release_info['num_for_sale']} copies for sale, lowest: {release_info['lowest_price']}")
                 
                 all_results.append(release_info)
-                
-                # Rate limiting
-                time.sleep(0.5)
             
             # Check if there are more pages
             pagination = data.get('pagination', {})
@@ -135,7 +120,6 @@ class DiscogsSearcher:
                 break
             
             page += 1
-            time.sleep(1)  # Rate limiting between pages
         
         return all_results
 
@@ -214,6 +198,8 @@ def main():
     parser.add_argument('-m', '--max-results', type=int, default=20, help='Maximum number of results (default: 20)')
     parser.add_argument('-o', '--output', help='Output CSV filename')
     parser.add_argument('-d', '--details', action='store_true', help='Show detailed listing URLs')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached Discogs responses and download everything in full')
     
     args = parser.parse_args()
     
@@ -235,7 +221,7 @@ def main():
     print("You can combine: -f \"LP\" for LPs only, -f \"12\\\"\" for 12-inch singles\n")
     
     # Initialize searcher
-    searcher = DiscogsSearcher(api_token)
+    searcher = DiscogsSearcher(api_token, refresh=args.refresh)
     
     # Perform search
     results = searcher.search_and_get_sellers(
@@ -248,6 +234,7 @@ def main():
     
     # Display results
     format_results(results, show_details=args.details)
+    searcher.client.print_stats()
     
     # Save to CSV if requested
     if args.output:
@@ -5,40 +5,35 @@ Fetches all vinyl/LP records from a Discogs seller using the official API
 """
 
 import requests
+import argparse
 import csv
-import time
 import os
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from discogs_client import DiscogsClient
+
 # Load environment variables
 load_dotenv()
 
 class DiscogsAPI:
-    def __init__(self, user_token):
-        self.base_url = "https://api.discogs.com"
-        self.headers = {
-            "User-Agent": "DiscogsVinylFetcher/1.0",
-            "Authorization": f"Discogs token={user_token}"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+    def __init__(self, user_token, refresh=False):
+        # Pooled, cached and paced by Discogs' rate-limit headers. Inventory
+        # pages are revalidated on every request so listings stay current.
+        self.client = DiscogsClient(user_token, user_agent="DiscogsVinylFetcher/1.0", refresh=refresh)
     
     def get_seller_inventory(self, seller_username, format_filter="Vinyl", page=1, per_page=100):
         """Fetch a page of seller's inventory"""
         # Use the user inventory endpoint
-        url = f"{self.base_url}/users/{seller_username}/inventory"
+        path = f"/users/{seller_username}/inventory"
         params = {
             "page": page,
             "per_page": per_page
         }
         
-        print(f"Requesting: {url} page {page}")
+        print(f"Requesting: {path} page {page}")
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            print(f"Response status: {response.status_code}")
-            response.raise_for_status()
-            return response.json()
+            return self.client.get_json(path, params=params)
         except requests.exceptions.Timeout:
             print("Request timed out")
             return None
@@ -114,16 +109,7 @@ class DiscogsAPI:
                 #     break
                 
                 page += 1
-                time.sleep(1)  # Rate limit: 60 requests per minute
                 
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:
-                    print("Rate limited. Waiting 60 seconds...")
-                    time.sleep(60)
-                    continue
-                else:
-                    print(f"Error: {e}")
-                    break
             except Exception as e:
                 print(f"Unexpected error: {e}")
                 break
@@ -160,6 +146,11 @@ def save_to_csv(records, filename='discogs_vinyl_inventory.csv'):
     print(f"Saved {len(records)} records to {filename}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Fetch all vinyl/LP records from a Discogs seller')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached Discogs responses and fetch every page in full')
+    args = parser.parse_args()
+    
     # Get API token from environment
     api_token = os.environ.get('DISCOGS_TOKEN')
     
@@ -186,10 +177,11 @@ def main():
     print(f"\nFetching vinyl records from seller: {seller_username}")
     
     # Initialize API client
-    api = DiscogsAPI(api_token)
+    api = DiscogsAPI(api_token, refresh=args.refresh)
     
     # Fetch all vinyl records
     records = api.get_all_vinyl_records(seller_username)
+    api.client.print_stats()
     
     if records:
         save_to_csv(records)
@@ -198,8 +198,11 @@ def main():
     parser.add_argument('-o', '--output', help='Output CSV filename (default: batch_search_results_[timestamp].csv)')
     parser.add_argument('-m', '--max-results', type=int, default=5, 
                        help='Maximum results per item (default: 5)')
-    parser.add_argument('-d', '--delay', type=float, default=1.0,
-                       help='Delay between searches in seconds (default: 1.0)')
+    parser.add_argument('-d', '--delay', type=float, default=0.0,
+                       help='Extra delay between searches in seconds; requests are already '
+                            'paced from Discogs\' rate-limit headers (default: 0)')
+    parser.add_argument('--refresh', action='store_true',
+                       help='Ignore cached Discogs responses and download everything in full')
     parser.add_argument('-s', '--summary', action='store_true',
                        help='Show summary only, no detailed results')
     
@@ -225,7 +228,7 @@ def main():
     print(f"Loaded {len(wishlist)} items to search")
     
     # Initialize searcher
-    searcher = DiscogsSearcher(api_token)
+    searcher = DiscogsSearcher(api_token, refresh=args.refresh)
     
     # Search for each item
     all_results = []
@@ -236,12 +239,13 @@ def main():
         if results:
             all_results.extend(results)
         
-        # Rate limiting
-        if i < len(wishlist):
+        # Optional extra spacing on top of the client's pacing
+        if args.delay and i < len(wishlist):
             time.sleep(args.delay)
     
     # Print summary
     print_summary(wishlist, all_results)
+    searcher.client.print_stats()
     
     # Save results
     if not args.summary:
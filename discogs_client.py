@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Shared client for the Discogs API.
+Keeps one pooled HTTP session, paces requests from Discogs' rate-limit
+headers instead of fixed sleeps, and keeps responses in an on-disk cache
+that is revalidated with a conditional request (ETag / Last-Modified) every
+time, so listings and prices are always current.
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+DISCOGS_API = "https://api.discogs.com"
+
+# Same cache directory as the other tools, defined here so the Discogs tools
+# don't import the local library modules
+CACHE_DIR = Path(".cache")
+DISCOGS_CACHE_DB = CACHE_DIR / "discogs_http.sqlite"
+
+# Discogs counts requests over a moving 60 second window
+RATE_LIMIT_WINDOW = 60.0
+
+# Requests left in the window below which pacing starts
+RATE_LIMIT_RESERVE = 10
+
+# How often to retry one request after a 429 before giving up
+MAX_RATE_LIMIT_RETRIES = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body TEXT NOT NULL,
+    fetched REAL NOT NULL
+);
+"""
+
+
+class DiscogsHTTPCache:
+    """SQLite store of Discogs JSON responses with their validators."""
+
+    def __init__(self, db_path: Path = DISCOGS_CACHE_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Returns:
+            {'etag', 'last_modified', 'body', 'fetched'} or None
+        """
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body, fetched FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'body': row[2], 'fetched': row[3]}
+
+    def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, time.time())
+            )
+
+
+class RateLimitPacer:
+    """
+    Spaces requests using the X-Discogs-Ratelimit headers.
+
+    Requests go out back to back while plenty of the window is left. Once
+    fewer than RATE_LIMIT_RESERVE remain, the rest are spread over the
+    window so the limit is never hit.
+    """
+
+    def __init__(self, window: float = RATE_LIMIT_WINDOW, reserve: int = RATE_LIMIT_RESERVE):
+        self.window = window
+        self.reserve = reserve
+        self.limit = None
+        self.remaining = None
+        self.next_request = 0.0
+
+    def wait(self):
+        """Block until the next request may be made."""
+        delay = self.next_request - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(self, headers):
+        """Read the rate-limit headers of a response."""
+        try:
+            self.limit = int(headers['X-Discogs-Ratelimit'])
+            self.remaining = int(headers['X-Discogs-Ratelimit-Remaining'])
+        except (KeyError, TypeError, ValueError):
+            return
+        if self.remaining >= self.reserve:
+            self.next_request = 0.0
+        else:
+            self.next_request = time.monotonic() + self.window / (self.remaining + 1)
+
+    def backoff(self, headers, attempt: int):
+        """Hold off after a 429, using Retry-After if Discogs sent one."""
+        try:
+            delay = float(headers['Retry-After'])
+        except (KeyError, TypeError, ValueError):
+            # One request slot, doubling on each consecutive 429
+            slot = self.window / (self.limit or 60)
+            delay = min(self.window, slot * 2 ** attempt)
+        self.next_request = time.monotonic() + delay
+        return delay
+
+
+class DiscogsClient:
+    """
+    GETs from the Discogs API for the Discogs tools.
+
+    Cached responses are revalidated with If-None-Match / If-Modified-Since
+    on every request, so an unchanged resource costs a bodiless 304 and
+    listings, prices and paginated inventories are always current. 429s are
+    retried after backing off.
+    """
+
+    def __init__(
+        self,
+        user_token: str,
+        user_agent: str = "DiscogsTools/1.0",
+        cache: Optional[DiscogsHTTPCache] = None,
+        refresh: bool = False
+    ):
+        """
+        Args:
+            user_token: Discogs personal access token
+            user_agent: User-Agent to send (Discogs requires one)
+            cache: Response cache (default: .cache/discogs_http.sqlite)
+            refresh: Ignore cached responses and fetch everything in full
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = DISCOGS_API
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers.update({
+            "User-Agent": user_agent,
+            "Authorization": f"Discogs token={user_token}"
+        })
+        self.cache = cache or DiscogsHTTPCache()
+        self.refresh = refresh
+        self.pacer = RateLimitPacer()
+
+        self.requests = 0
+        self.revalidated = 0
+        self.rate_limited = 0
+
+    def get_json(self, path: str, params: Optional[Dict] = None, timeout: float = 30) -> Dict:
+        """
+        GET an API path (e.g. '/releases/123') and return the decoded JSON.
+
+        Raises:
+            requests.HTTPError: On error responses, or 429s past MAX_RATE_LIMIT_RETRIES
+            requests.RequestException: On connection errors and timeouts
+        """
+        import requests
+
+        prepared = requests.Request('GET', self.base_url + path, params=params).prepare()
+        url = prepared.url
+
+        cached = None if self.refresh else self.cache.get(url)
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.pacer.wait()
+            response = self.session.get(url, headers=headers, timeout=timeout)
+            self.requests += 1
+            self.pacer.update(response.headers)
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            self.rate_limited += 1
+            delay = self.pacer.backoff(response.headers, attempt)
+            print(f"Discogs rate limit reached, waiting {delay:.0f}s...")
+
+        if response.status_code == 304 and cached:
+            self.revalidated += 1
+            return json.loads(cached['body'])
+
+        response.raise_for_status()
+        self.cache.put(url, response.text, response.headers.get('ETag'),
+                       response.headers.get('Last-Modified'))
+        return response.json()
+
+    def print_stats(self):
+        """Print requests made, unchanged (304) answers and rate-limit responses for this run."""
+        print(f"\nDiscogs API: {self.requests} requests "
+              f"({self.revalidated} unchanged and answered from cache, {self.rate_limited} rate-limited)")
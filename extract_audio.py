@@ -1,43 +1,52 @@
 #!/usr/bin/env python3
 """
 Extract audio segments from the YouTube MP3 based on target.md sets
-Usage: python extract_audio.py <input_mp3_file>
+Usage: python extract_audio.py <input_mp3_file> [--sets-dir extracted_sets]
 """
 
-import sys
+import argparse
 from irish_playlist_manager import IrishPlaylistManager
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python extract_audio.py <input_mp3_file>")
-        print("Example: python extract_audio.py foinn1_audio.mp3")
-        return
-        
-    input_file = sys.argv[1]
-    
+    parser = argparse.ArgumentParser(
+        description='Build a practice file of the target.md sets from a session recording',
+        epilog='Example: python extract_audio.py foinn1_audio.mp3'
+    )
+    parser.add_argument('input_file', help='Source recording (e.g. foinn1_audio.mp3)')
+    parser.add_argument('-o', '--output', default='my_practice_sets.mp3',
+                        help='Combined output file (default: my_practice_sets.mp3)')
+    parser.add_argument('--sets-dir', nargs='?', const='extracted_sets',
+                        help='Also write each set to its own file in this directory '
+                             '(default if given without a value: extracted_sets)')
+
+    args = parser.parse_args()
+    input_file = args.input_file
+
     manager = IrishPlaylistManager()
-    
+
     # Parse target sets
     target_sets = manager.parse_target_file("target.md")
-    
+
     if not target_sets:
         print("No target sets found in target.md")
         return
-        
+
     # Find matching sets
     matching_sets = manager.find_matching_sets(target_sets)
-    
+
     print(f"\nExtracting {len(matching_sets)} sets from {input_file}...")
-    
-    # Extract audio segments
-    manager.extract_audio_segments(input_file, "extracted_sets", matching_sets)
-    
-    # Combine into single file
-    manager.create_combined_audio("extracted_sets", "my_practice_sets.mp3")
-    
+
+    # Individual set files are optional
+    if args.sets_dir:
+        manager.extract_audio_segments(input_file, args.sets_dir, matching_sets)
+
+    # Combine straight from the source recording in one pass
+    manager.create_combined_audio_direct(input_file, matching_sets, args.output)
+
     print("\n✓ Done! Created:")
-    print("  - Individual sets in extracted_sets/")
-    print("  - Combined file: my_practice_sets.mp3")
+    if args.sets_dir:
+        print(f"  - Individual sets in {args.sets_dir}/")
+    print(f"  - Combined file: {args.output}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
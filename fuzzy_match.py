@@ -4,27 +4,38 @@ Fuzzy matching utilities for Irish tune names.
 Handles common variations like capitalization, spacing, and minor spelling differences.
 """
 
+import math
 import re
+from collections import Counter, defaultdict
 from difflib import SequenceMatcher
-from typing import List, Tuple, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Optional
 
 
-def normalize_tune_name(name: str) -> str:
-    """
-    Normalize a tune name for comparison.
-    - Convert to lowercase
-    - Remove extra spaces
-    - Remove common punctuation
-    - Normalize "The" at the beginning
-    """
+# Patterns used by normalize_tune_name, compiled once at import
+_APOSTROPHE_RE = re.compile(r"[''`']")
+_PUNCTUATION_RE = re.compile(r'[,\.\!\?;:]')
+_SEPARATOR_RE = re.compile(r'[-_]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Bound on memoized normalizations (filenames and aliases repeat heavily)
+NORMALIZE_CACHE_SIZE = 65536
+
+# Bump whenever normalize_tune_name's output changes; persisted indexes of
+# normalized names (library_index) are rebuilt when it does
+NORMALIZE_VERSION = 1
+
+
+def _normalize_tune_name(name: str) -> str:
+    """Uncached implementation of normalize_tune_name."""
     # Convert to lowercase
     name = name.lower().strip()
     
     # Remove apostrophes entirely
-    name = re.sub(r"[''`']", '', name)  # Remove all apostrophes
-    name = re.sub(r'[,\.\!\?;:]', '', name)  # Remove punctuation
-    name = re.sub(r'[-_]', ' ', name)  # Replace hyphens and underscores with spaces
-    name = re.sub(r'\s+', ' ', name)  # Normalize whitespace
+    name = _APOSTROPHE_RE.sub('', name)  # Remove all apostrophes
+    name = _PUNCTUATION_RE.sub('', name)  # Remove punctuation
+    name = _SEPARATOR_RE.sub(' ', name)  # Replace hyphens and underscores with spaces
+    name = _WHITESPACE_RE.sub(' ', name)  # Normalize whitespace
     
     # Handle "The" at the beginning (common in Irish tune names)
     if name.startswith('the '):
@@ -34,6 +45,37 @@ def normalize_tune_name(name: str) -> str:
     return name
 
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_tune_name(name: str) -> str:
+    """
+    Normalize a tune name for comparison.
+    - Convert to lowercase
+    - Remove extra spaces
+    - Remove common punctuation
+    - Normalize "The" at the beginning
+    
+    Results are memoized in a bounded LRU cache keyed on the raw string.
+    """
+    return _normalize_tune_name(name)
+
+
+def normalize_many(names: Iterable[str]) -> List[str]:
+    """
+    Normalize a batch of names, e.g. every filename in a library.
+    
+    Each distinct string is normalized once. Bypasses the LRU cache so a
+    large one-off batch doesn't evict the hot aliases and search terms.
+    """
+    seen: Dict[str, str] = {}
+    result = []
+    for name in names:
+        norm = seen.get(name)
+        if norm is None:
+            norm = seen[name] = _normalize_tune_name(name)
+        result.append(norm)
+    return result
+
+
 def calculate_similarity(str1: str, str2: str) -> float:
     """
     Calculate similarity score between two strings.
@@ -84,6 +126,266 @@ def fuzzy_match_tune(
     return matches
 
 
+class TuneNameIndex:
+    """
+    Inverted n-gram index over a fixed list of candidate tune names.
+
+    Candidates are normalized once up front. A query only runs the exact
+    SequenceMatcher score on candidates that survive a length filter and a
+    shared-gram count filter, and both filters are derived from the ratio
+    formula so nothing that fuzzy_match_tune() would return is dropped:
+
+    - ratio = 2*M / (len_a + len_b), so M <= min(len_a, len_b) bounds ratio
+      by length alone.
+    - The M matched characters come in k blocks separated by at least one
+      unmatched character, so k <= unmatched + 1 and the strings share at
+      least M - (q-1)*k q-grams.
+
+    Trigrams give the tighter filter, but at thresholds around 0.8 the
+    trigram bound drops to zero, so bigrams are used for those lengths.
+    Buckets where neither bound is positive (very short names, or a low
+    threshold) are scored in full.
+    """
+
+    GRAM_SIZES = (3, 2)
+    EPSILON = 1e-9
+
+    def __init__(self, candidates: Iterable[str], normalized: Optional[Iterable[str]] = None):
+        """
+        Args:
+            candidates: Candidate tune names
+            normalized: Pre-normalized candidate names, if already available
+        """
+        self.candidates = list(candidates)
+        if normalized is None:
+            self.normalized = normalize_many(self.candidates)
+        else:
+            self.normalized = list(normalized)
+
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._by_length: Dict[int, List[int]] = defaultdict(list)
+        self._postings = {q: defaultdict(list) for q in self.GRAM_SIZES}
+
+        for i, norm in enumerate(self.normalized):
+            self._exact[norm].append(i)
+            self._by_length[len(norm)].append(i)
+            for q in self.GRAM_SIZES:
+                for gram, count in _grams(norm, q).items():
+                    self._postings[q][gram].append((i, count))
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def _shared_gram_counts(self, norm: str, q: int) -> Dict[int, int]:
+        """Multiset count of q-grams each candidate shares with norm."""
+        counts: Dict[int, int] = defaultdict(int)
+        postings = self._postings[q]
+        for gram, query_count in _grams(norm, q).items():
+            for i, count in postings.get(gram, ()):
+                counts[i] += min(query_count, count)
+        return counts
+
+    def search_ids(self, target: str, threshold: float = 0.85) -> List[Tuple[int, float]]:
+        """
+        Find candidate indices scoring at least threshold against target.
+
+        Returns:
+            List of (candidate_index, similarity_score) tuples, sorted by
+            score (highest first) and then by candidate order
+        """
+        norm_target = normalize_tune_name(target)
+        target_len = len(norm_target)
+
+        scores: Dict[int, float] = {}
+        for i in self._exact.get(norm_target, ()):
+            scores[i] = 1.0
+
+        # Decide per candidate length: skip, scan fully, or filter by shared grams
+        scan_lengths = []
+        required: Dict[int, Dict[int, int]] = {q: {} for q in self.GRAM_SIZES}
+        for length in self._by_length:
+            total = target_len + length
+            if total == 0:
+                continue
+            if 2 * min(target_len, length) < (threshold - self.EPSILON) * total:
+                continue
+            min_matches = max(0, math.ceil(threshold * total / 2 - self.EPSILON))
+            max_unmatched = total - 2 * min_matches
+            for q in self.GRAM_SIZES:
+                needed = min_matches - (q - 1) * (max_unmatched + 1)
+                if needed > 0:
+                    required[q][length] = needed
+                    break
+            else:
+                scan_lengths.append(length)
+
+        to_check = set()
+        for length in scan_lengths:
+            to_check.update(self._by_length[length])
+        for q in self.GRAM_SIZES:
+            if not required[q]:
+                continue
+            for i, shared in self._shared_gram_counts(norm_target, q).items():
+                needed = required[q].get(len(self.normalized[i]))
+                if needed is not None and shared >= needed:
+                    to_check.add(i)
+
+        for i in to_check:
+            if i in scores:
+                continue
+            norm = self.normalized[i]
+            if norm == norm_target:
+                score = 1.0
+            else:
+                score = SequenceMatcher(None, norm_target, norm).ratio()
+            if score >= threshold:
+                scores[i] = score
+
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def search(
+        self,
+        target: str,
+        threshold: float = 0.85,
+        max_results: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Indexed equivalent of fuzzy_match_tune(target, candidates, threshold, max_results).
+        """
+        matches = [(self.candidates[i], score) for i, score in self.search_ids(target, threshold)]
+        if max_results:
+            matches = matches[:max_results]
+        return matches
+
+
+def _grams(text: str, q: int) -> Counter:
+    """Count the character q-grams in a string."""
+    return Counter(text[i:i + q] for i in range(len(text) - q + 1))
+
+
+# Ratios from the C backend are the Indel (longest common subsequence) ratio.
+# That is never lower than SequenceMatcher.ratio(), which matches greedily by
+# longest block. For tune names scoring >= 0.7 the two rarely differ, and when
+# they do the gap stays under this tolerance. Passing score_cutoff to
+# score_matrix() re-scores every cell at or above the cutoff with
+# SequenceMatcher, so thresholds like 0.8/0.85 keep their exact meaning.
+RATIO_TOLERANCE = 0.07
+
+# Upper bound on cells scored per chunk, to keep the matrix memory bounded
+MATRIX_CHUNK_CELLS = 4_000_000
+
+
+def has_fast_ratio_backend() -> bool:
+    """Check if the C-accelerated ratio backend (rapidfuzz) and NumPy are installed."""
+    try:
+        import numpy  # noqa: F401
+        from rapidfuzz import process  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _exact_ratio(norm1: str, norm2: str) -> float:
+    """calculate_similarity() for already-normalized strings."""
+    if norm1 == norm2:
+        return 1.0
+    return SequenceMatcher(None, norm1, norm2).ratio()
+
+
+def _normalized_score_matrix(norm_queries: List[str], norm_candidates: List[str],
+                             score_cutoff: Optional[float] = None):
+    """score_matrix() for already-normalized strings."""
+    import numpy as np
+
+    scores = np.zeros((len(norm_queries), len(norm_candidates)), dtype=np.float64)
+    if not norm_queries or not norm_candidates:
+        return scores
+
+    if has_fast_ratio_backend():
+        from rapidfuzz import fuzz, process
+
+        cutoff = None
+        if score_cutoff is not None:
+            # Indel ratio >= SequenceMatcher ratio, so this keeps every candidate
+            cutoff = max(0.0, score_cutoff * 100 - 1e-6)
+
+        chunk = max(1, MATRIX_CHUNK_CELLS // len(norm_candidates))
+        for start in range(0, len(norm_queries), chunk):
+            block = process.cdist(
+                norm_queries[start:start + chunk],
+                norm_candidates,
+                scorer=fuzz.ratio,
+                score_cutoff=cutoff,
+                dtype=np.float32,
+                workers=-1
+            )
+            scores[start:start + chunk] = block / 100.0
+
+        if score_cutoff is not None:
+            # Re-score the cells that matter with the real SequenceMatcher ratio
+            rows, cols = np.nonzero(scores >= score_cutoff - 1e-9)
+            for row, col in zip(rows.tolist(), cols.tolist()):
+                scores[row, col] = _exact_ratio(norm_queries[row], norm_candidates[col])
+        else:
+            # Identical normalized names are always an exact 1.0
+            columns = defaultdict(list)
+            for col, candidate in enumerate(norm_candidates):
+                columns[candidate].append(col)
+            for row, query in enumerate(norm_queries):
+                for col in columns.get(query, ()):
+                    scores[row, col] = 1.0
+        return scores
+
+    # Pure difflib fallback. SequenceMatcher caches details about the second
+    # sequence, so hold each candidate fixed while the queries vary.
+    matcher = SequenceMatcher(None)
+    for col, candidate in enumerate(norm_candidates):
+        matcher.set_seq2(candidate)
+        for row, query in enumerate(norm_queries):
+            if query == candidate:
+                scores[row, col] = 1.0
+                continue
+            matcher.set_seq1(query)
+            if score_cutoff is not None and (
+                matcher.real_quick_ratio() < score_cutoff or
+                matcher.quick_ratio() < score_cutoff
+            ):
+                continue
+            scores[row, col] = matcher.ratio()
+    return scores
+
+
+def score_matrix(
+    queries: List[str],
+    candidates: List[str],
+    score_cutoff: Optional[float] = None,
+    normalized: bool = False
+):
+    """
+    Score every query against every candidate in one call.
+    
+    Uses rapidfuzz's C-accelerated process.cdist when it is installed and
+    falls back to difflib otherwise.
+    
+    Args:
+        queries: Tune names to search for (rows)
+        candidates: Tune names to search in (columns)
+        score_cutoff: If set, every cell >= score_cutoff holds exactly
+                      calculate_similarity(query, candidate), and every other
+                      cell is below the cutoff (possibly 0)
+        normalized: Inputs are already passed through normalize_tune_name()
+    
+    Returns:
+        NumPy float64 array of shape (len(queries), len(candidates)). Without
+        score_cutoff and with the C backend, cells may exceed
+        calculate_similarity() by up to RATIO_TOLERANCE.
+    """
+    if not normalized:
+        queries = normalize_many(queries)
+        candidates = normalize_many(candidates)
+    return _normalized_score_matrix(list(queries), list(candidates), score_cutoff)
+
+
 def is_likely_match(name1: str, name2: str, threshold: float = 0.85) -> bool:
     """
     Quick check if two tune names are likely the same tune.
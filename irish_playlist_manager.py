@@ -1,7 +1,7 @@
 import re
 import os
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import subprocess
 
 @dataclass
@@ -129,36 +129,89 @@ Out on the Ocean / The Connaughtman's Rambles / Geese in the Bog
                     
         return matching_sets
     
-    def extract_audio_segments(self, input_file: str, output_dir: str, matching_sets: List[TuneSet]):
-        """Extract audio segments from MP3/audio file based on timestamps"""
+    def get_set_times(self, sets: Optional[List[TuneSet]] = None) -> List[Tuple[TuneSet, int, Optional[int]]]:
+        """
+        Get start and end seconds for sets in the recording.
+        A set ends where the next set in the source file starts; the last set
+        runs to the end of the recording (end None).
+        
+        Raises:
+            ValueError: If a set isn't one from the source file
+        """
+        starts = [self.parse_time_to_seconds(tune_set.start_time) for tune_set in self.all_sets]
+        ends = starts[1:] + [None]
+        positions = {id(tune_set): i for i, tune_set in enumerate(self.all_sets)}
+        
+        set_times = []
+        for tune_set in (sets if sets is not None else self.all_sets):
+            i = positions.get(id(tune_set))
+            if i is None:
+                # A copy rather than the parsed object; all_sets.index compares by value
+                try:
+                    i = self.all_sets.index(tune_set)
+                except ValueError:
+                    raise ValueError(f"{tune_set} is not in {self.source_file}") from None
+            set_times.append((tune_set, starts[i], ends[i]))
+        return set_times
+    
+    def analyse_set_tempos(self, input_file: str, sets: Optional[List[TuneSet]] = None) -> Dict[str, Optional[float]]:
+        """
+        Estimate the BPM of each set in a long recording in one streaming pass.
+        
+        Returns:
+            Dictionary mapping set description to BPM (None if undetermined)
+        """
+        from tempo_curve import analyse_recording
+        
+        set_times = self.get_set_times(sets)
+        _, tempos = analyse_recording(input_file, [(start, end) for _, start, end in set_times])
+        
+        return {str(tune_set): bpm for (tune_set, _, _), bpm in zip(set_times, tempos)}
+    
+    def extract_audio_segments(self, input_file: str, output_dir: str, matching_sets: List[TuneSet],
+                               max_workers: Optional[int] = None):
+        """
+        Extract audio segments from MP3/audio file based on timestamps.
+        
+        Segments are cut concurrently by up to max_workers ffmpeg processes
+        (default: CPU count, at most 4). -ss goes before -i so ffmpeg seeks in
+        the input instead of decoding everything before each set.
+        """
         os.makedirs(output_dir, exist_ok=True)
         
-        # Get duration of each set by looking at the next set's start time
-        for i, tune_set in enumerate(matching_sets):
-            start_seconds = self.parse_time_to_seconds(tune_set.start_time)
-            
-            # Find the end time by looking for the next set in the original list
-            end_seconds = None
-            original_index = self.all_sets.index(tune_set)
-            if original_index + 1 < len(self.all_sets):
-                end_seconds = self.parse_time_to_seconds(self.all_sets[original_index + 1].start_time)
-            
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        
+        jobs = []
+        for i, (tune_set, start_seconds, end_seconds) in enumerate(self.get_set_times(matching_sets)):
             # Create filename
             safe_name = re.sub(r'[^\w\s-]', '', str(tune_set))
             safe_name = re.sub(r'[-\s]+', '-', safe_name)
             output_file = os.path.join(output_dir, f"{i+1:02d}_{safe_name}.mp3")
             
-            # Build ffmpeg command
-            cmd = ['ffmpeg', '-i', input_file, '-ss', str(start_seconds)]
+            # Build ffmpeg command - input-side seek, then copy just this set's duration
+            cmd = ['ffmpeg', '-ss', str(start_seconds), '-i', input_file]
             
             if end_seconds:
                 duration = end_seconds - start_seconds
                 cmd.extend(['-t', str(duration)])
                 
             cmd.extend(['-acodec', 'copy', output_file, '-y'])
-            
-            print(f"Extracting: {tune_set}")
-            subprocess.run(cmd, capture_output=True)
+            jobs.append((tune_set, cmd))
+        
+        def extract(job):
+            tune_set, cmd = job
+            return tune_set, subprocess.run(cmd, capture_output=True)
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for tune_set, result in executor.map(extract, jobs):
+                if result.returncode == 0:
+                    print(f"Extracted: {tune_set}")
+                else:
+                    error = result.stderr.decode(errors='replace').strip().splitlines()
+                    print(f"Error extracting {tune_set}: {error[-1] if error else 'ffmpeg failed'}")
             
     def create_combined_audio(self, output_dir: str, final_output: str = "combined_sets.mp3"):
         """Combine all extracted audio segments into one file"""
@@ -185,6 +238,45 @@ Out on the Ocean / The Connaughtman's Rambles / Geese in the Bog
         # Clean up concat file
         os.remove(concat_file)
         
+    def create_combined_audio_direct(self, input_file: str, matching_sets: List[TuneSet],
+                                     final_output: str = "combined_sets.mp3"):
+        """
+        Build the combined file straight from the source recording in one ffmpeg pass.
+        
+        Uses the concat demuxer with inpoint/outpoint entries on the source file,
+        so the sets are stream-copied without writing per-set files first.
+        """
+        set_times = self.get_set_times(matching_sets)
+        if not set_times:
+            print("No sets to combine")
+            return
+        
+        source = os.path.abspath(input_file).replace("'", "'\\''")
+        lines = []
+        for _, start_seconds, end_seconds in set_times:
+            lines.append(f"file '{source}'")
+            lines.append(f"inpoint {start_seconds}")
+            if end_seconds:
+                lines.append(f"outpoint {end_seconds}")
+        
+        import tempfile
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('\n'.join(lines) + '\n')
+            concat_file = f.name
+        
+        try:
+            cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', concat_file,
+                   '-c', 'copy', final_output, '-y']
+            
+            print(f"Creating combined audio file: {final_output}")
+            result = subprocess.run(cmd, capture_output=True)
+            if result.returncode != 0:
+                error = result.stderr.decode(errors='replace').strip().splitlines()
+                print(f"Error creating {final_output}: {error[-1] if error else 'ffmpeg failed'}")
+        finally:
+            os.remove(concat_file)
+        
     def generate_spotify_playlist_info(self, matching_sets: List[TuneSet]) -> str:
         """Generate information for creating Spotify playlist"""
         playlist_info = "Spotify Playlist Order:\n\n"
@@ -225,6 +317,9 @@ def main():
     # Uncomment and modify when you have the audio file:
     # manager.extract_audio_segments("foinn1_audio.mp3", "extracted_sets", matching_sets)
     # manager.create_combined_audio("extracted_sets", "my_practice_sets.mp3")
+    # Or skip the per-set files:
+    # manager.create_combined_audio_direct("foinn1_audio.mp3", matching_sets, "my_practice_sets.mp3")
+    # print(manager.analyse_set_tempos("foinn1_audio.mp3", matching_sets))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
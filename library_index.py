@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk index of the local audio library.
+Stores every audio file with its size, mtime and pre-extracted tune name in
+SQLite so searches don't have to walk the whole tree on every query.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from audio_walker import AUDIO_EXTENSIONS
+from fuzzy_match import NORMALIZE_VERSION, normalize_tune_name
+
+
+CACHE_DIR = Path(".cache")
+LIBRARY_DB = CACHE_DIR / "library_index.sqlite"
+
+# Don't re-check the same root more than once per interval within a process
+REFRESH_INTERVAL = 60  # seconds
+
+# Bump whenever the stored rows change meaning, e.g. extract_tune_name_from_path
+# changes. Together with NORMALIZE_VERSION it decides when the index is rebuilt.
+LIBRARY_INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    root TEXT NOT NULL,
+    rel TEXT NOT NULL,
+    parent TEXT,
+    mtime_ns INTEGER,
+    PRIMARY KEY (root, rel)
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (root, parent);
+CREATE TABLE IF NOT EXISTS files (
+    root TEXT NOT NULL,
+    rel TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    tune_name TEXT,
+    normalized TEXT,
+    PRIMARY KEY (root, rel)
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (root, dir);
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _index_version() -> str:
+    return f"index={LIBRARY_INDEX_VERSION};normalize={NORMALIZE_VERSION}"
+
+
+@dataclass
+class LibraryFile:
+    path: Path
+    size: int
+    mtime: float
+    tune_name: str
+    normalized: str
+
+
+def _is_audio_file(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS
+
+
+class LibraryIndex:
+    """
+    SQLite-backed index of audio files under one or more library roots.
+
+    A directory's mtime only changes when entries are added, removed or
+    renamed inside it, so refresh() stats each known directory once and only
+    re-lists the ones whose mtime moved. An unchanged library costs one stat
+    per directory and no listings at all.
+    """
+
+    def __init__(self, db_path: Path = LIBRARY_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Searches may query the index from executor threads, which share this
+        # connection. Re-entrant because refresh() holds it across _rescan_dir().
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.executescript(SCHEMA)
+        self._check_version()
+        self._last_refresh: Dict[Tuple[str, bool], float] = {}
+
+    def _check_version(self):
+        """
+        Empty the index if it was built by a different tune name extractor or
+        normalizer. Rows are otherwise only rewritten when their directory
+        changes, so stale derived names would never be replaced.
+        """
+        version = _index_version()
+        row = self.conn.execute("SELECT value FROM index_meta WHERE key = 'version'").fetchone()
+        if row and row[0] == version:
+            return
+        with self.conn:
+            if row:
+                print("Library index: tune name extraction changed, rebuilding")
+            # With no known directories the next refresh re-lists everything
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM dirs")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('version', ?)", (version,)
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def refresh(self, directory: str, recursive: bool = True, force: bool = False) -> Optional[str]:
+        """
+        Bring the index for a library root up to date.
+
+        Args:
+            directory: Library root to index
+            recursive: Whether to index subdirectories
+            force: Ignore REFRESH_INTERVAL and check the tree now
+
+        Returns:
+            Absolute root path used as the index key, or None if missing
+        """
+        root = os.path.abspath(os.path.expanduser(directory))
+        if not os.path.isdir(root):
+            print(f"Warning: Directory '{directory}' does not exist")
+            return None
+
+        with self.lock:
+            return self._refresh_root(directory, root, recursive, force)
+
+    def _refresh_root(self, directory: str, root: str, recursive: bool, force: bool) -> str:
+        """refresh() for an existing root; the caller holds the lock."""
+        key = (root, recursive)
+        now = time.time()
+        if not force and now - self._last_refresh.get(key, 0) < REFRESH_INTERVAL:
+            return root
+
+        known: Dict[str, Optional[int]] = {}
+        children: Dict[str, List[str]] = {}
+        for rel, parent, mtime_ns in self.conn.execute(
+            "SELECT rel, parent, mtime_ns FROM dirs WHERE root = ?", (root,)
+        ):
+            known[rel] = mtime_ns
+            if parent is not None:
+                children.setdefault(parent, []).append(rel)
+
+        rescanned = 0
+        stack = ['']
+        with self.conn:
+            while stack:
+                rel = stack.pop()
+                full = os.path.join(root, rel) if rel else root
+                try:
+                    mtime_ns = os.stat(full).st_mtime_ns
+                except OSError:
+                    self._drop_dir(root, rel)
+                    continue
+
+                if rel in known and known[rel] == mtime_ns:
+                    # Unchanged listing - just descend into the known subdirectories
+                    if recursive:
+                        stack.extend(children.get(rel, []))
+                    continue
+
+                subdirs = self._rescan_dir(root, rel, full, mtime_ns, children.get(rel, []))
+                rescanned += 1
+                if rel not in known:
+                    known[rel] = mtime_ns
+                if recursive:
+                    stack.extend(subdirs)
+
+        if rescanned:
+            print(f"Library index: re-scanned {rescanned} changed director{'y' if rescanned == 1 else 'ies'} in {directory}")
+
+        self._last_refresh[key] = now
+        return root
+
+    def _rescan_dir(self, root: str, rel: str, full: str, mtime_ns: int, old_subdirs: List[str]) -> List[str]:
+        """Re-list a single directory and replace its rows. Returns subdirectory rels."""
+        from local_file_search import extract_tune_name_from_path
+
+        subdirs = []
+        file_rows = []
+        try:
+            with os.scandir(full) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(os.path.join(rel, entry.name) if rel else entry.name)
+                        elif entry.is_file() and _is_audio_file(entry.name):
+                            st = entry.stat()
+                            file_rel = os.path.join(rel, entry.name) if rel else entry.name
+                            tune_name = extract_tune_name_from_path(Path(entry.name))
+                            file_rows.append((
+                                root, file_rel, rel, st.st_size, st.st_mtime_ns,
+                                tune_name, normalize_tune_name(tune_name)
+                            ))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Warning: Could not read directory '{full}': {e}")
+            return []
+
+        # Drop subdirectories that disappeared, along with everything under them
+        current = set(subdirs)
+        for old in old_subdirs:
+            if old not in current:
+                self._drop_dir(root, old)
+
+        self.conn.execute("DELETE FROM files WHERE root = ? AND dir = ?", (root, rel))
+        self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", file_rows)
+
+        # New subdirectories get a NULL mtime so they are listed on first visit
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO dirs (root, rel, parent, mtime_ns) VALUES (?, ?, ?, NULL)",
+            [(root, sub, rel) for sub in subdirs]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO dirs (root, rel, parent, mtime_ns) VALUES (?, ?, ?, ?)",
+            (root, rel, os.path.dirname(rel) if rel else None, mtime_ns)
+        )
+        return subdirs
+
+    def _drop_dir(self, root: str, rel: str):
+        """Remove a directory and everything beneath it from the index."""
+        if not rel:
+            self.conn.execute("DELETE FROM dirs WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM files WHERE root = ?", (root,))
+            return
+        prefix = rel + os.sep
+        self.conn.execute(
+            "DELETE FROM dirs WHERE root = ? AND (rel = ? OR substr(rel, 1, ?) = ?)",
+            (root, rel, len(prefix), prefix)
+        )
+        self.conn.execute(
+            "DELETE FROM files WHERE root = ? AND (dir = ? OR substr(dir, 1, ?) = ?)",
+            (root, rel, len(prefix), prefix)
+        )
+
+    def files(self, directory: str, recursive: bool = True) -> List[LibraryFile]:
+        """
+        Get all indexed audio files under a directory, refreshing it first.
+
+        Paths are built from the directory as given, so results look the
+        same as a Path.rglob() over that directory.
+        """
+        root = self.refresh(directory, recursive)
+        if root is None:
+            return []
+
+        base = Path(directory).expanduser()
+        with self.lock:
+            if recursive:
+                rows = self.conn.execute(
+                    "SELECT rel, size, mtime_ns, tune_name, normalized FROM files WHERE root = ? ORDER BY rel",
+                    (root,)
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT rel, size, mtime_ns, tune_name, normalized FROM files WHERE root = ? AND dir = '' ORDER BY rel",
+                    (root,)
+                ).fetchall()
+
+        return [
+            LibraryFile(base / rel, size, mtime_ns / 1e9, tune_name, normalized)
+            for rel, size, mtime_ns, tune_name, normalized in rows
+        ]
+
+
+# Shared index for the process
+_library_index = None
+_library_index_lock = threading.Lock()
+
+
+def get_library_index() -> LibraryIndex:
+    """Get the process-wide library index, opening it on first use."""
+    global _library_index
+    with _library_index_lock:
+        if _library_index is None:
+            _library_index = LibraryIndex()
+    return _library_index
+
+
+def get_library_files(directories: List[str], recursive: bool = True) -> List[LibraryFile]:
+    """
+    Get indexed audio files for several directories, without duplicates.
+    """
+    index = get_library_index()
+    results = []
+    seen_paths = set()
+    for directory in directories:
+        for lib_file in index.files(directory, recursive):
+            abs_path = lib_file.path.absolute()
+            if abs_path not in seen_paths:
+                seen_paths.add(abs_path)
+                results.append(lib_file)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    directories = sys.argv[1:] or ["/Users/pk/Dropbox/Dreadlap"]
+    index = get_library_index()
+
+    for directory in directories:
+        start = time.time()
+        index.refresh(directory, force=True)
+        first = time.time() - start
+
+        start = time.time()
+        index.refresh(directory, force=True)
+        second = time.time() - start
+
+        files = index.files(directory)
+        print(f"{directory}: {len(files)} audio files")
+        print(f"  First refresh: {first*1000:.1f}ms")
+        print(f"  Unchanged refresh: {second*1000:.1f}ms")
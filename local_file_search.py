@@ -8,42 +8,34 @@ import os
 import re
 from pathlib import Path
 from typing import List, Dict, Optional, Set, Tuple
-from fuzzy_match import fuzzy_match_tune, normalize_tune_name
+from collections import defaultdict
+from fuzzy_match import (
+    fuzzy_match_tune, normalize_tune_name, normalize_many, TuneNameIndex,
+    has_fast_ratio_backend, score_matrix
+)
 from thesession_data import get_all_tune_variations
+from audio_walker import walk_audio_files
 
 
-# Supported audio file extensions
-AUDIO_EXTENSIONS = {'.mp3', '.mp4', '.m4a', '.flac', '.wav', '.ogg', '.opus', '.aac', '.wma'}
-
-
-def find_audio_files(directory: str, recursive: bool = True) -> List[Path]:
+def find_audio_files(directory: str, recursive: bool = True, max_workers: Optional[int] = None) -> List[Path]:
     """
     Find all audio files in a directory.
     
     Args:
         directory: Directory path to search
         recursive: Whether to search subdirectories
+        max_workers: Read directories in a thread pool (useful on network volumes)
     
     Returns:
         List of Path objects for audio files
     """
-    audio_files = []
     path = Path(directory).expanduser()
     
     if not path.exists():
         print(f"Warning: Directory '{directory}' does not exist")
-        return audio_files
+        return []
     
-    if recursive:
-        for ext in AUDIO_EXTENSIONS:
-            audio_files.extend(path.rglob(f"*{ext}"))
-            audio_files.extend(path.rglob(f"*{ext.upper()}"))
-    else:
-        for ext in AUDIO_EXTENSIONS:
-            audio_files.extend(path.glob(f"*{ext}"))
-            audio_files.extend(path.glob(f"*{ext.upper()}"))
-    
-    return audio_files
+    return list(walk_audio_files(path, recursive, max_workers=max_workers))
 
 
 def extract_tune_name_from_path(file_path: Path) -> str:
@@ -63,38 +55,241 @@ def extract_tune_name_from_path(file_path: Path) -> str:
     return name.strip()
 
 
-def is_tune_in_composite_name(tune_name: str, composite_name: str, threshold: float = 0.8) -> bool:
+# Common separators in composite track names
+COMPOSITE_SEPARATORS = [' _ ', ' / ', ' - ', ', ', ' & ', ' and ']
+
+
+def split_composite_name(composite_name: str) -> List[str]:
     """
-    Check if a tune name appears within a composite track name.
-    Handles cases like "Carraroe Jig _ Kesh Jig _ Leaf Reel" containing "Kesh Jig".
+    Split a composite track name like "Carraroe Jig _ Kesh Jig _ Leaf Reel"
+    into its individual tune names.
     """
-    # Common separators in composite track names
-    separators = [' _ ', ' / ', ' - ', ', ', ' & ', ' and ']
-    
-    # First check if tune name appears directly (case insensitive)
-    if tune_name.lower() in composite_name.lower():
-        return True
-    
-    # Split composite name by common separators
     parts = [composite_name]
-    for sep in separators:
+    for sep in COMPOSITE_SEPARATORS:
         new_parts = []
         for part in parts:
             new_parts.extend(part.split(sep))
         parts = new_parts
     
     # Clean up parts
-    parts = [p.strip() for p in parts if p.strip()]
+    return [p.strip() for p in parts if p.strip()]
+
+
+def is_tune_in_composite_name(tune_name: str, composite_name: str, threshold: float = 0.8) -> bool:
+    """
+    Check if a tune name appears within a composite track name.
+    Handles cases like "Carraroe Jig _ Kesh Jig _ Leaf Reel" containing "Kesh Jig".
+    """
+    # First check if tune name appears directly (case insensitive)
+    if tune_name.lower() in composite_name.lower():
+        return True
     
     # Check each part against the tune name
     from fuzzy_match import calculate_similarity
-    for part in parts:
+    for part in split_composite_name(composite_name):
         if calculate_similarity(tune_name, part) >= threshold:
             return True
     
     return False
 
 
+class CandidateNameIndex:
+    """
+    Indexes the extracted names of a library's files for repeated tune searches.
+    Holds one TuneNameIndex over the distinct file names and one over the
+    distinct composite-name parts, each mapping back to file positions.
+    """
+    
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        self.lower_names = [name.lower() for name in self.names]
+        
+        name_owners = defaultdict(list)
+        part_owners = defaultdict(list)
+        for i, name in enumerate(self.names):
+            name_owners[name].append(i)
+            for part in split_composite_name(name):
+                part_owners[part].append(i)
+        
+        self.name_index = TuneNameIndex(list(name_owners))
+        self.name_owners = list(name_owners.values())
+        self.part_index = TuneNameIndex(list(part_owners))
+        self.part_owners = list(part_owners.values())
+    
+    def _composite_substring_hits(self, search_term: str) -> List[int]:
+        """File positions whose name contains the term (case insensitive)."""
+        term_lower = search_term.lower()
+        return [i for i, name in enumerate(self.lower_names) if term_lower in name]
+    
+    def _term_scores_indexed(self, search_term: str, threshold: float) -> Dict[int, float]:
+        """Best score per file position for one term, via the n-gram indexes."""
+        scores: Dict[int, float] = {}
+        for name_id, score in self.name_index.search_ids(search_term, threshold):
+            for i in self.name_owners[name_id]:
+                scores[i] = score
+        
+        # Composite matches get a slightly lower score, and only count
+        # when that score itself clears the threshold
+        if threshold <= 0.9:
+            composite = set(self._composite_substring_hits(search_term))
+            for part_id, _ in self.part_index.search_ids(search_term, threshold):
+                composite.update(self.part_owners[part_id])
+            for i in composite:
+                if scores.get(i, 0.0) < 0.9:
+                    scores[i] = 0.9
+        return scores
+    
+    def _term_scores_matrix(self, search_terms: List[str], threshold: float) -> Dict[str, Dict[int, float]]:
+        """Best score per file position for many terms, via one score_matrix call per table."""
+        norm_terms = normalize_many(search_terms)
+        name_scores = score_matrix(norm_terms, self.name_index.normalized, threshold, normalized=True)
+        part_scores = None
+        if threshold <= 0.9:
+            part_scores = score_matrix(norm_terms, self.part_index.normalized, threshold, normalized=True)
+        
+        results = {}
+        for row, search_term in enumerate(search_terms):
+            scores: Dict[int, float] = {}
+            for name_id in (name_scores[row] >= threshold).nonzero()[0].tolist():
+                score = float(name_scores[row, name_id])
+                for i in self.name_owners[name_id]:
+                    scores[i] = score
+            
+            if part_scores is not None:
+                composite = set(self._composite_substring_hits(search_term))
+                for part_id in (part_scores[row] >= threshold).nonzero()[0].tolist():
+                    composite.update(self.part_owners[part_id])
+                for i in composite:
+                    if scores.get(i, 0.0) < 0.9:
+                        scores[i] = 0.9
+            results[search_term] = scores
+        return results
+    
+    def score_many(
+        self,
+        terms_by_tune: Dict[str, Set[str]],
+        threshold: float,
+        use_matrix: Optional[bool] = None
+    ) -> Dict[str, Dict[int, float]]:
+        """
+        Best score per file position for each tune, across that tune's search terms.
+        
+        Same result as running fuzzy_match_tune() and is_tune_in_composite_name()
+        for every (file, term) pair, keeping only files scoring >= threshold.
+        Terms shared between tunes are only scored once.
+        
+        Args:
+            terms_by_tune: Mapping of tune name to its search terms
+            threshold: Minimum score
+            use_matrix: Score every term in one batch with score_matrix().
+                        Defaults to on when the C ratio backend is installed.
+        """
+        all_terms = sorted({term for terms in terms_by_tune.values() for term in terms})
+        
+        if use_matrix is None:
+            use_matrix = has_fast_ratio_backend()
+        if use_matrix:
+            term_scores = self._term_scores_matrix(all_terms, threshold)
+        else:
+            term_scores = {term: self._term_scores_indexed(term, threshold) for term in all_terms}
+        
+        results = {}
+        for tune, terms in terms_by_tune.items():
+            best_scores: Dict[int, float] = {}
+            for term in terms:
+                for i, score in term_scores[term].items():
+                    if score > best_scores.get(i, 0.0):
+                        best_scores[i] = score
+            results[tune] = best_scores
+        return results
+    
+    def score(self, search_terms: Set[str], threshold: float) -> Dict[int, float]:
+        """Best score per file position across one tune's search terms."""
+        return self.score_many({'': search_terms}, threshold)['']
+
+
+# Most recently built candidate index, reused while the library is unchanged
+_candidate_index_cache = None
+
+
+def get_candidate_index(names: List[str]) -> CandidateNameIndex:
+    """Get a CandidateNameIndex for these names, reusing the last one if unchanged."""
+    global _candidate_index_cache
+    if _candidate_index_cache is None or _candidate_index_cache.names != names:
+        _candidate_index_cache = CandidateNameIndex(names)
+    return _candidate_index_cache
+
+
+def score_file_candidates(
+    search_terms: Set[str],
+    file_candidates: List[Tuple[Path, str]],
+    threshold: float
+) -> List[Tuple[Path, float]]:
+    """
+    Score (file_path, extracted_name) candidates against a tune's search terms.
+    
+    Returns:
+        List of (file_path, score) for files scoring >= threshold, in file order
+    """
+    return score_file_candidates_batch({'': search_terms}, file_candidates, threshold)['']
+
+
+def score_file_candidates_batch(
+    terms_by_tune: Dict[str, Set[str]],
+    file_candidates: List[Tuple[Path, str]],
+    threshold: float
+) -> Dict[str, List[Tuple[Path, float]]]:
+    """
+    Score file candidates against every tune's search terms in one pass.
+    
+    Returns:
+        Dictionary mapping each tune to its (file_path, score) list, in file order
+    """
+    names = [name for _, name in file_candidates]
+    scores_by_tune = get_candidate_index(names).score_many(terms_by_tune, threshold)
+    
+    return {
+        tune: [
+            (file_candidates[i][0], best_scores[i])
+            for i in sorted(best_scores)
+            if best_scores[i] >= threshold
+        ]
+        for tune, best_scores in scores_by_tune.items()
+    }
+
+
+def get_search_terms(tune_name: str, use_aliases: bool = True) -> Set[str]:
+    """Get all names to search for a tune, optionally including TheSession aliases."""
+    if use_aliases:
+        return get_all_tune_variations(tune_name)
+    from fuzzy_match import find_common_variations
+    return set(find_common_variations(tune_name))
+
+
+def rank_matches(
+    matches: List[Tuple[Path, float]],
+    max_results: Optional[int] = None
+) -> List[Tuple[Path, float]]:
+    """Dedupe matches by absolute path, sort by score and apply max_results."""
+    # Remove duplicate files (same file path appearing multiple times)
+    unique_matches = {}
+    for file_path, score in matches:
+        abs_path = file_path.absolute()
+        if abs_path not in unique_matches or unique_matches[abs_path][1] < score:
+            unique_matches[abs_path] = (file_path, score)
+    
+    # Convert back to list
+    matches = [(path, score) for path, score in unique_matches.values()]
+    
+    # Sort by score (highest first)
+    matches.sort(key=lambda x: x[1], reverse=True)
+    
+    if max_results:
+        matches = matches[:max_results]
+    
+    return matches
+
+
 def search_local_files(
     tune_name: str,
     directories: List[str],
@@ -118,70 +313,19 @@ def search_local_files(
         List of (file_path, match_score) tuples, sorted by score
     """
     # Get all variations of the tune name
-    if use_aliases:
-        search_terms = get_all_tune_variations(tune_name)
-    else:
-        from fuzzy_match import find_common_variations
-        search_terms = set(find_common_variations(tune_name))
-    
-    # Collect all audio files
-    all_files = []
-    for directory in directories:
-        all_files.extend(find_audio_files(directory, recursive))
-    
-    # Remove duplicates by converting paths to absolute and using a set
-    unique_files = []
-    seen_paths = set()
-    for file_path in all_files:
-        abs_path = file_path.absolute()
-        if abs_path not in seen_paths:
-            seen_paths.add(abs_path)
-            unique_files.append(file_path)
-    all_files = unique_files
+    search_terms = get_search_terms(tune_name, use_aliases)
     
-    # Extract filenames for matching
-    file_candidates = [(f, extract_tune_name_from_path(f)) for f in all_files]
+    # Collect all audio files from the persistent library index
+    from library_index import get_library_files
+    library_files = get_library_files(directories, recursive)
     
-    # Find matches
-    matches = []
-    for file_path, extracted_name in file_candidates:
-        best_score = 0.0
-        
-        # Try matching against all search terms
-        for search_term in search_terms:
-            # First try exact matching
-            candidates = [extracted_name]
-            results = fuzzy_match_tune(search_term, candidates, threshold=0)
-            
-            if results:
-                score = results[0][1]
-                best_score = max(best_score, score)
-            
-            # Also check if this tune appears within a composite track name
-            if is_tune_in_composite_name(search_term, extracted_name, threshold):
-                # Give a slightly lower score for composite matches
-                best_score = max(best_score, 0.9)
-        
-        if best_score >= threshold:
-            matches.append((file_path, best_score))
-    
-    # Remove duplicate files (same file path appearing multiple times)
-    unique_matches = {}
-    for file_path, score in matches:
-        abs_path = file_path.absolute()
-        if abs_path not in unique_matches or unique_matches[abs_path][1] < score:
-            unique_matches[abs_path] = (file_path, score)
+    # Tune names were pre-extracted when the files were indexed
+    file_candidates = [(f.path, f.tune_name) for f in library_files]
     
-    # Convert back to list
-    matches = [(path, score) for path, score in unique_matches.values()]
-    
-    # Sort by score (highest first)
-    matches.sort(key=lambda x: x[1], reverse=True)
-    
-    if max_results:
-        matches = matches[:max_results]
+    # Find matches
+    matches = score_file_candidates(search_terms, file_candidates, threshold)
     
-    return matches
+    return rank_matches(matches, max_results)
 
 
 def find_tunes_for_set(
@@ -205,18 +349,17 @@ def find_tunes_for_set(
         Dictionary mapping tune names to lists of matching file paths
     """
     results = {}
+    max_results = overload if overload else 1
+    
+    # Collect the library once and score the whole set of tunes in one batch
+    from library_index import get_library_files
+    file_candidates = [(f.path, f.tune_name) for f in get_library_files(directories)]
+    terms_by_tune = {tune: get_search_terms(tune, use_aliases) for tune in tunes}
+    matches_by_tune = score_file_candidates_batch(terms_by_tune, file_candidates, threshold)
     
     for tune in tunes:
         print(f"Searching for: {tune}")
-        max_results = overload if overload else 1
-        
-        matches = search_local_files(
-            tune,
-            directories,
-            use_aliases=use_aliases,
-            threshold=threshold,
-            max_results=max_results
-        )
+        matches = rank_matches(matches_by_tune[tune], max_results)
         
         if matches:
             results[tune] = [match[0] for match in matches]
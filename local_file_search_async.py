@@ -7,40 +7,14 @@ import os
 import re
 import asyncio
 from pathlib import Path
-from typing import List, Dict, Optional, Set, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from functools import lru_cache
 import multiprocessing
+import tempfile
 
-from fuzzy_match import fuzzy_match_tune, normalize_tune_name
-from thesession_data import get_all_tune_variations
-
-
-# Supported audio file extensions
-AUDIO_EXTENSIONS = {'.mp3', '.mp4', '.m4a', '.flac', '.wav', '.ogg', '.opus', '.aac', '.wma'}
-
-
-def find_audio_files(directory: str, recursive: bool = True) -> List[Path]:
-    """
-    Find all audio files in a directory.
-    """
-    audio_files = []
-    path = Path(directory).expanduser()
-    
-    if not path.exists():
-        print(f"Warning: Directory '{directory}' does not exist")
-        return audio_files
-    
-    if recursive:
-        for ext in AUDIO_EXTENSIONS:
-            audio_files.extend(path.rglob(f"*{ext}"))
-            audio_files.extend(path.rglob(f"*{ext.upper()}"))
-    else:
-        for ext in AUDIO_EXTENSIONS:
-            audio_files.extend(path.glob(f"*{ext}"))
-            audio_files.extend(path.glob(f"*{ext.upper()}"))
-    
-    return audio_files
+from fuzzy_match import normalize_tune_name
+from local_file_search import find_audio_files
 
 
 @lru_cache(maxsize=10000)
@@ -59,140 +33,282 @@ def extract_tune_name_from_path_cached(file_path_str: str) -> str:
     return name.strip()
 
 
+# Candidate table loaded once per worker process by init_search_worker()
+_worker_candidates: Optional[List[Tuple[Path, str]]] = None
+
+
+def write_candidate_table(file_candidates: List[Tuple[Path, str]], table_path: str):
+    """
+    Write (file_path, extracted_name) candidates to a table file for workers.
+    Fields are NUL-separated since neither paths nor names can contain NUL.
+    """
+    with open(table_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+        for file_path, name in file_candidates:
+            f.write(f"{file_path}\0{name}\0")
+
+
+def read_candidate_table(table_path: str) -> List[Tuple[Path, str]]:
+    """Read a table written by write_candidate_table()."""
+    with open(table_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        fields = f.read().split('\0')
+    return [(Path(fields[i]), fields[i + 1]) for i in range(0, len(fields) - 1, 2)]
+
+
+def init_search_worker(table_path: str):
+    """
+    ProcessPoolExecutor initializer: load the candidate table once per worker,
+    so tasks only carry tune names and search terms.
+    """
+    global _worker_candidates
+    _worker_candidates = read_candidate_table(table_path)
+
+
 def search_single_tune(
-    tune_data: Tuple[str, Set[str], List[Tuple[Path, str]], float, int]
+    tune_data: Tuple[str, Set[str], float, int]
 ) -> Tuple[str, List[Tuple[Path, float]]]:
     """
-    Search for a single tune. Designed to be run in parallel.
+    Search for a single tune against the worker's candidate table.
+    Designed to be run in parallel.
     
     Args:
-        tune_data: Tuple of (tune_name, search_terms, file_candidates, threshold, max_results)
+        tune_data: Tuple of (tune_name, search_terms, threshold, max_results)
     
     Returns:
         Tuple of (tune_name, matches)
     """
-    tune_name, search_terms, file_candidates, threshold, max_results = tune_data
+    tune_name, search_terms, threshold, max_results = tune_data
     
     # Import here to avoid issues with multiprocessing
-    from local_file_search import is_tune_in_composite_name
+    from local_file_search import score_file_candidates, rank_matches
     
-    matches = []
-    for file_path, extracted_name in file_candidates:
-        best_score = 0.0
-        
-        # Try matching against all search terms
-        for search_term in search_terms:
-            # First try exact matching
-            candidates = [extracted_name]
-            results = fuzzy_match_tune(search_term, candidates, threshold=0)
-            
-            if results:
-                score = results[0][1]
-                best_score = max(best_score, score)
-            
-            # Also check if this tune appears within a composite track name
-            if is_tune_in_composite_name(search_term, extracted_name, threshold):
-                # Give a slightly lower score for composite matches
-                best_score = max(best_score, 0.9)
-        
-        if best_score >= threshold:
-            matches.append((file_path, best_score))
+    # The candidate index is cached per worker, so it is built once and
+    # reused for every tune this worker handles
+    matches = score_file_candidates(search_terms, _worker_candidates, threshold)
     
-    # Remove duplicate files
-    unique_matches = {}
-    for file_path, score in matches:
-        abs_path = file_path.absolute()
-        if abs_path not in unique_matches or unique_matches[abs_path][1] < score:
-            unique_matches[abs_path] = (file_path, score)
+    return tune_name, rank_matches(matches, max_results)
+
+
+def search_file_shard(
+    shard_data: Tuple[int, int, Dict[str, Set[str]], float]
+) -> Tuple[int, Dict[str, List[Tuple[Path, float]]]]:
+    """
+    Score one shard of the worker's candidate table against every tune.
+    Designed to be run in parallel.
     
-    # Convert back to list and sort
-    matches = [(path, score) for path, score in unique_matches.values()]
-    matches.sort(key=lambda x: x[1], reverse=True)
+    Args:
+        shard_data: Tuple of (start, end, terms_by_tune, threshold)
     
-    if max_results:
-        matches = matches[:max_results]
+    Returns:
+        Tuple of (start, {tune_name: matches in file order})
+    """
+    start, end, terms_by_tune, threshold = shard_data
     
-    return tune_name, matches
+    from local_file_search import score_file_candidates_batch
+    
+    shard = _worker_candidates[start:end]
+    return start, score_file_candidates_batch(terms_by_tune, shard, threshold)
 
 
-async def find_tunes_for_set_async(
+def _print_tune_result(tune_name: str, matches: List[Tuple[Path, float]]):
+    if matches:
+        print(f"  Found {len(matches)} match(es) for: {tune_name}")
+        for path, score in matches[:3]:
+            print(f"    - {path.name} (score: {score:.2f})")
+        if len(matches) > 3:
+            print(f"    ... and {len(matches) - 3} more")
+    else:
+        print(f"  No matches found for: {tune_name}")
+
+
+def _collect_file_candidates(directories: List[str]) -> List[Tuple[Path, str]]:
+    """Walk stage: get (file_path, extracted_name) for every file in the library index."""
+    from library_index import get_library_files
+    library_files = get_library_files(directories, recursive=True)
+    print(f"Found {len(library_files)} unique audio files")
+    return [(f.path, f.tune_name) for f in library_files]
+
+
+async def stream_tunes_for_set(
     tunes: List[str],
     directories: List[str],
     use_aliases: bool = True,
     threshold: float = 0.85,
     overload: Optional[int] = None,
-    max_workers: Optional[int] = None
-) -> Dict[str, List[Path]]:
+    max_workers: Optional[int] = None,
+    queue_size: int = 8
+) -> AsyncIterator[Tuple[str, List[Tuple[Path, float]]]]:
     """
-    Async version of find_tunes_for_set using parallel processing.
+    Search for tunes as an asyncio pipeline, yielding each tune's matches as it completes.
+    
+    The stages overlap instead of running one after another:
+    - walk: the library index refresh runs in a thread
+    - aliases: TheSession alias resolution runs in another thread and feeds a
+      bounded queue, so it keeps going while the walk is still in progress
+    - scoring: once the walk is done, workers pull tunes off the queue and
+      score them in a process pool
+    
+    Yields:
+        (tune_name, matches) tuples in completion order, where matches are
+        (file_path, score) tuples sorted by score
     """
+    from local_file_search import get_search_terms
+    
+    tunes = list(dict.fromkeys(tunes))
+    if not tunes:
+        return
+    
     if max_workers is None:
         max_workers = min(multiprocessing.cpu_count(), len(tunes))
+    max_results = overload if overload else 1
     
-    print(f"Searching with {max_workers} parallel workers...")
+    loop = asyncio.get_running_loop()
+    walk_executor = ThreadPoolExecutor(max_workers=1)
+    # One thread so the aliases map is only ever loaded once
+    alias_executor = ThreadPoolExecutor(max_workers=1)
     
-    # Pre-collect all audio files (this is I/O bound, so do it once)
-    print("Collecting audio files...")
-    all_files = []
-    for directory in directories:
-        all_files.extend(find_audio_files(directory, recursive=True))
+    tune_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    result_queue: asyncio.Queue = asyncio.Queue()
+    tasks = []
+    
+    async def resolve_aliases():
+        try:
+            for tune in tunes:
+                terms = await loop.run_in_executor(alias_executor, get_search_terms, tune, use_aliases)
+                await tune_queue.put((tune, terms))
+        except Exception as e:
+            await result_queue.put(e)
+        for _ in range(max_workers):
+            await tune_queue.put(None)
     
-    # Remove duplicates
-    unique_files = []
-    seen_paths = set()
-    for file_path in all_files:
-        abs_path = file_path.absolute()
-        if abs_path not in seen_paths:
-            seen_paths.add(abs_path)
-            unique_files.append(file_path)
-    all_files = unique_files
+    async def score_tunes(executor):
+        while True:
+            item = await tune_queue.get()
+            if item is None:
+                return
+            tune, terms = item
+            try:
+                result = await loop.run_in_executor(
+                    executor, search_single_tune, (tune, terms, threshold, max_results)
+                )
+            except Exception as e:
+                result = e
+            await result_queue.put(result)
     
-    print(f"Found {len(all_files)} unique audio files")
+    try:
+        print("Collecting audio files...")
+        walk = loop.run_in_executor(walk_executor, _collect_file_candidates, directories)
+        tasks.append(asyncio.ensure_future(resolve_aliases()))
+        file_candidates = await walk
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            table_path = os.path.join(tmp_dir, "candidates.tbl")
+            write_candidate_table(file_candidates, table_path)
+            
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=init_search_worker,
+                initargs=(table_path,)
+            ) as executor:
+                tasks.extend(asyncio.ensure_future(score_tunes(executor)) for _ in range(max_workers))
+                
+                for _ in range(len(tunes)):
+                    result = await result_queue.get()
+                    if isinstance(result, Exception):
+                        raise result
+                    yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        walk_executor.shutdown(wait=False)
+        alias_executor.shutdown(wait=False)
+
+
+async def find_tunes_for_set_async(
+    tunes: List[str],
+    directories: List[str],
+    use_aliases: bool = True,
+    threshold: float = 0.85,
+    overload: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    partition: str = "tunes"
+) -> Dict[str, List[Path]]:
+    """
+    Async version of find_tunes_for_set using parallel processing.
     
-    # Pre-extract all filenames (cache them)
-    file_candidates = [(f, extract_tune_name_from_path_cached(str(f))) for f in all_files]
+    The candidate table is written to a temporary file and loaded once by
+    each worker, instead of being pickled into every task. With the "tunes"
+    partition, results stream in through stream_tunes_for_set().
     
-    # Prepare search data for each tune
-    search_tasks = []
+    Args:
+        partition: "tunes" sends each worker whole tunes to score against the
+                   full library; "files" gives each worker a shard of the
+                   library to score against all tunes, which scales better
+                   for large libraries
+    """
+    if partition not in ("tunes", "files"):
+        raise ValueError(f"Unknown partition mode: {partition}")
+    
+    results = {}
+    
+    if partition == "tunes":
+        if max_workers is None:
+            max_workers = min(multiprocessing.cpu_count(), len(tunes))
+        print(f"Searching with {max_workers} parallel workers...")
+        
+        async for tune_name, matches in stream_tunes_for_set(
+            tunes, directories, use_aliases, threshold, overload, max_workers
+        ):
+            results[tune_name] = [match[0] for match in matches]
+            _print_tune_result(tune_name, matches)
+        return results
+    
+    if max_workers is None:
+        max_workers = multiprocessing.cpu_count()
+    
+    print(f"Searching with {max_workers} parallel workers...")
+    
+    # Walk the library while the aliases are resolved
+    from local_file_search import get_search_terms, rank_matches
+    loop = asyncio.get_running_loop()
+    print("Collecting audio files...")
+    walk = loop.run_in_executor(None, _collect_file_candidates, directories)
+    terms_by_tune = {}
     for tune in tunes:
         print(f"Preparing search for: {tune}")
-        
-        # Get search terms
-        if use_aliases:
-            search_terms = get_all_tune_variations(tune)
-        else:
-            from fuzzy_match import find_common_variations
-            search_terms = set(find_common_variations(tune))
-        
-        max_results = overload if overload else 1
-        search_tasks.append((tune, search_terms, file_candidates, threshold, max_results))
+        terms_by_tune[tune] = await loop.run_in_executor(None, get_search_terms, tune, use_aliases)
+    file_candidates = await walk
+    
+    max_results = overload if overload else 1
     
     # Run searches in parallel
-    print("\nSearching in parallel...")
-    results = {}
+    print(f"\nSearching in parallel (partitioned by {partition})...")
     
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_tune = {
-            executor.submit(search_single_tune, task): task[0] 
-            for task in search_tasks
-        }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        table_path = os.path.join(tmp_dir, "candidates.tbl")
+        write_candidate_table(file_candidates, table_path)
         
-        # Collect results as they complete
-        import concurrent.futures
-        for future in concurrent.futures.as_completed(future_to_tune):
-            tune_name, matches = future.result()
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_search_worker,
+            initargs=(table_path,)
+        ) as executor:
+            shard_size = max(1, -(-len(file_candidates) // max_workers))
+            futures = [
+                loop.run_in_executor(executor, search_file_shard, (start, start + shard_size, terms_by_tune, threshold))
+                for start in range(0, len(file_candidates), shard_size)
+            ]
             
-            if matches:
-                results[tune_name] = [match[0] for match in matches]
-                print(f"  Found {len(matches)} match(es) for: {tune_name}")
-                for path, score in matches[:3]:
-                    print(f"    - {path.name} (score: {score:.2f})")
-                if len(matches) > 3:
-                    print(f"    ... and {len(matches) - 3} more")
-            else:
-                results[tune_name] = []
-                print(f"  No matches found for: {tune_name}")
+            # Stitch shards back together in file order before ranking
+            shard_results = sorted(await asyncio.gather(*futures), key=lambda x: x[0])
+    
+    for tune_name in terms_by_tune:
+        all_matches = []
+        for _, shard_matches in shard_results:
+            all_matches.extend(shard_matches[tune_name])
+        matches = rank_matches(all_matches, max_results)
+        results[tune_name] = [match[0] for match in matches]
+        _print_tune_result(tune_name, matches)
     
     return results
 
@@ -204,7 +320,8 @@ def find_tunes_for_set_optimized(
     threshold: float = 0.85,
     overload: Optional[int] = None,
     use_async: bool = False,
-    max_workers: Optional[int] = None
+    max_workers: Optional[int] = None,
+    partition: str = "tunes"
 ) -> Dict[str, List[Path]]:
     """
     Optimized version with optional async support.
@@ -212,7 +329,7 @@ def find_tunes_for_set_optimized(
     if use_async and len(tunes) > 1:
         # Use async version for multiple tunes
         return asyncio.run(find_tunes_for_set_async(
-            tunes, directories, use_aliases, threshold, overload, max_workers
+            tunes, directories, use_aliases, threshold, overload, max_workers, partition
         ))
     else:
         # Fall back to synchronous version
@@ -261,6 +378,7 @@ def get_cached_audio_files(directories: List[str], recursive: bool = True) -> Li
 
 
 if __name__ == "__main__":
+    import sys
     import time
     
     # Test async vs sync performance
@@ -272,7 +390,7 @@ if __name__ == "__main__":
         "The Kesh Jig"
     ]
     
-    test_dir = "/Users/pk/Dropbox/Dreadlap"
+    test_dir = sys.argv[1] if len(sys.argv) > 1 else "/Users/pk/Dropbox/Dreadlap"
     
     print("Testing sync version...")
     start = time.time()
@@ -283,12 +401,17 @@ if __name__ == "__main__":
     
     print("\n" + "="*60 + "\n")
     
-    print("Testing async version...")
-    start = time.time()
-    async_results = find_tunes_for_set_optimized(
-        test_tunes, [test_dir], overload=3, use_async=True
-    )
-    async_time = time.time() - start
-    print(f"Async time: {async_time:.2f} seconds")
+    # Back-to-back runs reuse the shared library index from executor threads
+    async_times = []
+    for partition in ("tunes", "files"):
+        print(f"Testing async version (partition={partition})...")
+        start = time.time()
+        async_results = find_tunes_for_set_optimized(
+            test_tunes, [test_dir], overload=3, use_async=True, partition=partition
+        )
+        async_times.append(time.time() - start)
+        print(f"Async time: {async_times[-1]:.2f} seconds")
+        assert async_results == sync_results, f"partition={partition} results differ from sync"
+        print()
     
-    print(f"\nSpeedup: {sync_time/async_time:.2f}x")
\ No newline at end of file
+    print(f"Speedup: {sync_time/min(async_times):.2f}x (results match)")
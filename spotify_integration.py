@@ -4,6 +4,8 @@ from spotipy.oauth2 import SpotifyOAuth
 from irish_playlist_manager import IrishPlaylistManager
 import time
 from dotenv import load_dotenv
+from spotify_matching import TrackMatcher
+from spotify_search_executor import SpotifySearchExecutor
 
 class SpotifyPlaylistCreator:
     def __init__(self, client_id, client_secret, redirect_uri="http://127.0.0.1:8888/callback"):
@@ -20,6 +22,12 @@ class SpotifyPlaylistCreator:
             open_browser=True
         ))
         
+        # Cached, rate-limited searches that can run on several threads
+        self.searcher = SpotifySearchExecutor(self.sp)
+        
+        # Same track scoring as the other Spotify creators
+        self.matcher = TrackMatcher()
+        
     def search_tune(self, tune_name):
         """Search for a tune on Spotify"""
         # Try different search strategies
@@ -31,21 +39,12 @@ class SpotifyPlaylistCreator:
         ]
         
         for search_query in searches:
-            results = self.sp.search(q=search_query, type='track', limit=10)
+            results = self.searcher.search(search_query, limit=10)
             
-            if results['tracks']['items']:
-                # Look for traditional/irish music in results
-                for track in results['tracks']['items']:
-                    # Check if it's likely traditional Irish music
-                    track_name = track['name'].lower()
-                    artist_name = track['artists'][0]['name'].lower() if track['artists'] else ""
-                    
-                    # Prioritize tracks that mention the tune name
-                    if tune_name.lower() in track_name:
-                        return track['uri']
-                
-                # If no exact match, return first result
-                return results['tracks']['items'][0]['uri']
+            # Best match on the page, scored like the other Spotify creators
+            scored_tracks = self.matcher.rank_page(tune_name, results['tracks']['items'])
+            if scored_tracks:
+                return scored_tracks[0][1]['uri']
                 
         return None
     
@@ -69,12 +68,16 @@ class SpotifyPlaylistCreator:
         track_uris = []
         not_found = []
         
+        # Search all tunes concurrently - the executor keeps within Spotify's rate limit
+        all_tunes = [tune for tune_set in matching_sets for tune in tune_set.tunes]
+        search_results = iter(self.searcher.map(lambda tune: self.search_tune(tune.name), all_tunes))
+        
         for i, tune_set in enumerate(matching_sets, 1):
             print(f"\nProcessing {tune_set}...")
             
             for tune in tune_set.tunes:
                 print(f"  Searching for: {tune.name}")
-                uri = self.search_tune(tune.name)
+                uri = next(search_results)
                 
                 if uri:
                     track_uris.append(uri)
@@ -83,8 +86,6 @@ class SpotifyPlaylistCreator:
                 else:
                     not_found.append(f"{tune_set.set_type} set {tune_set.set_number}: {tune.name}")
                     print(f"    ✗ Not found: {tune.name}")
-                
-                time.sleep(0.1)  # Be nice to Spotify API
         
         # Add tracks to playlist in batches
         if track_uris:
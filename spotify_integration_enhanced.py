@@ -4,7 +4,8 @@ from spotipy.oauth2 import SpotifyOAuth
 from irish_playlist_manager import IrishPlaylistManager
 import time
 from dotenv import load_dotenv
-from fuzzy_match import normalize_tune_name, calculate_similarity
+from spotify_matching import TrackMatcher
+from spotify_search_executor import SpotifySearchExecutor
 from thesession_data import get_tune_aliases
 from typing import List, Optional, Dict, Tuple
 
@@ -24,19 +25,12 @@ class EnhancedSpotifyPlaylistCreator:
             open_browser=True
         ))
         
-    def fuzzy_match_track(self, tune_name: str, track_name: str, threshold: float = 0.85) -> bool:
-        """Check if a track name matches the tune name using fuzzy matching."""
-        # Normalize both names
-        norm_tune = normalize_tune_name(tune_name)
-        norm_track = normalize_tune_name(track_name)
+        # Cached, rate-limited searches that can run on several threads
+        self.searcher = SpotifySearchExecutor(self.sp)
         
-        # Direct substring match
-        if norm_tune in norm_track or norm_track in norm_tune:
-            return True
+        # Same track scoring as the other Spotify creators
+        self.matcher = TrackMatcher()
         
-        # Check similarity
-        return calculate_similarity(norm_tune, norm_track) >= threshold
-    
     def search_tune_with_aliases(self, tune_name: str, overload: int = 1) -> List[str]:
         """
         Search for a tune on Spotify using fuzzy matching and aliases.
@@ -64,59 +58,18 @@ class EnhancedSpotifyPlaylistCreator:
                     break
                     
                 try:
-                    results = self.sp.search(q=search_query, type='track', limit=20)
+                    results = self.searcher.search(search_query, limit=20)
                     
-                    if results['tracks']['items']:
-                        # Score and rank results
-                        scored_tracks = []
-                        
-                        for track in results['tracks']['items']:
-                            track_name = track['name']
-                            artist_name = track['artists'][0]['name'] if track['artists'] else ""
-                            track_uri = track['uri']
-                            
-                            # Skip if we've already found this track
-                            if track_uri in seen_tracks:
-                                continue
-                            
-                            # Calculate match score
-                            score = 0
-                            
-                            # Check if tune name matches using fuzzy matching
-                            if self.fuzzy_match_track(alias, track_name):
-                                score += 10
-                            
-                            # Bonus for Irish/traditional keywords
-                            lower_track = track_name.lower()
-                            lower_artist = artist_name.lower()
-                            
-                            irish_keywords = ['irish', 'traditional', 'trad', 'celtic', 'reel', 'jig', 'hornpipe']
-                            for keyword in irish_keywords:
-                                if keyword in lower_track or keyword in lower_artist:
-                                    score += 2
-                            
-                            # Penalty for non-traditional indicators
-                            modern_keywords = ['remix', 'cover', 'rock', 'pop', 'jazz', 'metal']
-                            for keyword in modern_keywords:
-                                if keyword in lower_track or keyword in lower_artist:
-                                    score -= 3
+                    # Score and rank the whole page at once
+                    scored_tracks = self.matcher.rank_page(alias, results['tracks']['items'], seen_tracks)
+                    
+                    for score, track in scored_tracks[:overload - len(found_tracks)]:
+                        if track['uri'] not in seen_tracks:
+                            found_tracks.append(track['uri'])
+                            seen_tracks.add(track['uri'])
                             
-                            if score > 0:
-                                scored_tracks.append((score, track))
-                        
-                        # Sort by score and add best matches
-                        scored_tracks.sort(key=lambda x: x[0], reverse=True)
-                        
-                        for score, track in scored_tracks[:overload - len(found_tracks)]:
-                            if track['uri'] not in seen_tracks:
-                                found_tracks.append(track['uri'])
-                                seen_tracks.add(track['uri'])
-                                
                 except Exception as e:
                     print(f"    Search error: {e}")
-                    time.sleep(1)  # Back off on error
-                
-                time.sleep(0.1)  # Be nice to Spotify API
                 
             if len(found_tracks) >= overload:
                 break
@@ -144,6 +97,12 @@ class EnhancedSpotifyPlaylistCreator:
         not_found = []
         stats = {'exact': 0, 'fuzzy': 0, 'alias': 0}
         
+        # Search all tunes concurrently - the executor keeps within Spotify's rate limit
+        all_tunes = [tune for tune_set in matching_sets for tune in tune_set.tunes]
+        search_results = iter(self.searcher.map(
+            lambda tune: self.search_tune_with_aliases(tune.name, overload), all_tunes
+        ))
+        
         for i, tune_set in enumerate(matching_sets, 1):
             print(f"\nProcessing {tune_set}...")
             
@@ -151,7 +110,7 @@ class EnhancedSpotifyPlaylistCreator:
                 print(f"  Searching for: {tune.name}")
                 
                 # Search with aliases and fuzzy matching
-                uris = self.search_tune_with_aliases(tune.name, overload)
+                uris = next(search_results)
                 
                 if uris:
                     all_track_uris.extend(uris)
@@ -204,6 +163,8 @@ class EnhancedSpotifyPlaylistCreator:
                 print(f"  - {tune}")
             if len(not_found) > 10:
                 print(f"  ... and {len(not_found) - 10} more")
+        
+        self.searcher.print_stats()
                 
         return playlist['external_urls']['spotify']
 
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Shared track scoring for the Spotify playlist creators.
+Scores a whole page of search results against a tune name at once: track,
+artist and album strings are lowercased once per track, keyword lists are
+compiled into single-pass matchers, and the fuzzy name comparison runs over
+the page in one batch.
+"""
+
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from fuzzy_match import has_fast_ratio_backend, normalize_tune_name, score_matrix
+
+
+# Score components
+NAME_MATCH_SCORE = 10       # track name matches the tune (or alias)
+TYPE_KEYWORD_SCORE = 3      # per tune type keyword in the track or album name
+IRISH_KEYWORD_SCORE = 2     # per Irish/traditional keyword in track, artist or album
+MODERN_KEYWORD_PENALTY = 3  # per non-traditional keyword in track or artist
+
+IRISH_KEYWORDS = ['irish', 'traditional', 'trad', 'celtic', 'session']
+MODERN_KEYWORDS = ['remix', 'cover', 'rock', 'pop', 'jazz', 'metal', 'techno']
+
+# Plural forms also searched and scored for a tune type
+TYPE_KEYWORD_VARIANTS = {
+    'reel': ['reels'],
+    'jig': ['jigs'],
+}
+
+
+class KeywordMatcher:
+    """
+    Finds which of a fixed set of keywords occur as substrings of a text.
+
+    The keywords are compiled into one regex that is tried at every position
+    (longest keyword first), so a text is scanned once however many keywords
+    there are. A keyword found at a position also implies every keyword it
+    contains, e.g. 'traditional' implies 'trad'.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(k.lower() for k in keywords if k))
+        alternatives = '|'.join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+        self.pattern = re.compile(f"(?=({alternatives}))") if self.keywords else None
+        self.implied = {
+            keyword: frozenset(other for other in self.keywords if other in keyword)
+            for keyword in self.keywords
+        }
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Keywords that occur in text (which should already be lowercase)."""
+        if self.pattern is None:
+            return frozenset()
+        found = set()
+        for match in self.pattern.finditer(text):
+            found |= self.implied[match.group(1)]
+        return frozenset(found)
+
+    def count(self, text: str) -> int:
+        return len(self.find(text))
+
+
+@lru_cache(maxsize=None)
+def keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Shared compiled matcher for a keyword tuple."""
+    return KeywordMatcher(keywords)
+
+
+def type_keywords_for(tune_type: Optional[str]) -> List[str]:
+    """Keywords for a tune type, e.g. 'Reel' -> ['reel', 'reels']."""
+    if not tune_type:
+        return []
+    tune_type = tune_type.lower()
+    return [tune_type] + TYPE_KEYWORD_VARIANTS.get(tune_type, [])
+
+
+def _track_fields(track: Dict) -> Tuple[str, str, str]:
+    """Lowercased (track, artist, album) names; artist is the first listed."""
+    artists = track.get('artists')
+    album = track.get('album')
+    return (
+        track['name'].lower(),
+        artists[0]['name'].lower() if artists else "",
+        album['name'].lower() if album else ""
+    )
+
+
+class TrackMatcher:
+    """
+    Scores Spotify search results as versions of a tune.
+
+    A track scores NAME_MATCH_SCORE if its normalized name contains, or is
+    contained in, the normalized tune name, or is at least `threshold`
+    similar to it. Keyword bonuses and penalties are added on top; only
+    tracks scoring above zero count as matches.
+    """
+
+    def __init__(self, threshold: float = 0.85, type_keywords: Optional[List[str]] = None):
+        """
+        Args:
+            threshold: Minimum name similarity for a fuzzy match
+            type_keywords: Tune type keywords to reward (see type_keywords_for)
+        """
+        self.threshold = threshold
+        self.type_keywords = list(type_keywords or [])
+        self.type_matcher = keyword_matcher(tuple(self.type_keywords))
+        self.irish_matcher = keyword_matcher(tuple(IRISH_KEYWORDS))
+        self.modern_matcher = keyword_matcher(tuple(MODERN_KEYWORDS))
+
+    def name_matches(self, tune_name: str, track_names: List[str]) -> List[bool]:
+        """Check each track name against the tune name."""
+        norm_tune = normalize_tune_name(tune_name)
+        norm_tracks = [normalize_tune_name(name) for name in track_names]
+
+        matches = [norm_tune in norm or norm in norm_tune for norm in norm_tracks]
+        pending = [i for i, matched in enumerate(matches) if not matched]
+        if not pending:
+            return matches
+
+        # The similarity has always been calculate_similarity() on the
+        # normalized names, which normalizes them again. That isn't a no-op
+        # for a leading "The" ("star, the" becomes "star the"), so do the same.
+        sim_tune = normalize_tune_name(norm_tune)
+        sim_tracks = [normalize_tune_name(norm_tracks[i]) for i in pending]
+
+        if has_fast_ratio_backend():
+            scores = score_matrix([sim_tune], sim_tracks,
+                                  score_cutoff=self.threshold, normalized=True)[0]
+            for i, score in zip(pending, scores.tolist()):
+                matches[i] = score >= self.threshold
+            return matches
+
+        # difflib fallback, skipping the full ratio when its upper bounds already fail
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(sim_tune)
+        for i, sim_track in zip(pending, sim_tracks):
+            if sim_track == sim_tune:
+                matches[i] = True
+                continue
+            matcher.set_seq2(sim_track)
+            matches[i] = (
+                matcher.real_quick_ratio() >= self.threshold
+                and matcher.quick_ratio() >= self.threshold
+                and matcher.ratio() >= self.threshold
+            )
+        return matches
+
+    def score_page(self, tune_name: str, tracks: List[Dict]) -> List[int]:
+        """Score every track on a search result page against the tune name."""
+        if not tracks:
+            return []
+        fields = [_track_fields(track) for track in tracks]
+        name_matches = self.name_matches(tune_name, [track['name'] for track in tracks])
+
+        scores = []
+        for (name, artist, album), name_match in zip(fields, name_matches):
+            score = NAME_MATCH_SCORE if name_match else 0
+            # Fields are joined with a newline so no keyword can span two of them
+            score += TYPE_KEYWORD_SCORE * self.type_matcher.count(f"{name}\n{album}")
+            score += IRISH_KEYWORD_SCORE * self.irish_matcher.count(f"{name}\n{artist}\n{album}")
+            score -= MODERN_KEYWORD_PENALTY * self.modern_matcher.count(f"{name}\n{artist}")
+            scores.append(score)
+        return scores
+
+    def rank_page(self, tune_name: str, tracks: List[Dict],
+                  exclude: Iterable[str] = ()) -> List[Tuple[int, Dict]]:
+        """
+        Matching tracks on a page, best first.
+
+        Args:
+            tune_name: Tune name or alias the page was searched for
+            tracks: Search result items
+            exclude: Track URIs already chosen
+
+        Returns:
+            (score, track) for tracks scoring above zero, highest score first
+            (ties keep search result order)
+        """
+        exclude = set(exclude)
+        tracks = [track for track in tracks if track['uri'] not in exclude]
+        scored = [(score, track) for score, track in zip(self.score_page(tune_name, tracks), tracks)
+                  if score > 0]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return scored
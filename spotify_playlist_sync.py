@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Incremental sync of an existing Spotify playlist to a list of track URIs.
+Fetches the playlist once, works out the removes, adds and moves that turn it
+into the target list, and applies just those as batched API calls. Positions
+are pinned to the playlist's snapshot id so edits made elsewhere are detected.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+# Spotify accepts at most 100 items per add or remove call
+PLAYLIST_BATCH_SIZE = 100
+
+
+@dataclass
+class SyncPlan:
+    """Edits that turn a playlist into the target list, in the order to apply them."""
+    # uri -> positions in the original playlist
+    removes: Dict[str, List[int]] = field(default_factory=dict)
+    # After the removes: ('add', position, uris) and
+    # ('move', range_start, insert_before, range_length), in order
+    edits: List[Tuple] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.removes or self.edits)
+
+    def summary(self) -> str:
+        removed = sum(len(positions) for positions in self.removes.values())
+        added = sum(len(edit[2]) for edit in self.edits if edit[0] == 'add')
+        moved = sum(edit[3] for edit in self.edits if edit[0] == 'move')
+        return f"{removed} removed, {added} added, {moved} moved"
+
+
+def fetch_playlist_tracks(sp, playlist_id: str) -> Tuple[List[str], str]:
+    """
+    Get a playlist's track URIs and current snapshot id.
+
+    Returns:
+        (uris in playlist order, snapshot_id). Unavailable tracks are None.
+    """
+    playlist = sp.playlist(
+        playlist_id,
+        fields='snapshot_id,tracks(items(track(uri)),next)',
+        additional_types=['track']
+    )
+    uris = []
+    page = playlist['tracks']
+    while page:
+        uris.extend((item.get('track') or {}).get('uri') for item in page['items'])
+        page = sp.next(page) if page.get('next') else None
+    return uris, playlist['snapshot_id']
+
+
+def _longest_increasing_subsequence(values: List[int]) -> set:
+    """Indexes into values of one longest strictly increasing subsequence."""
+    import bisect
+
+    tails = []  # values[i] of the smallest tail for each length
+    tail_indexes = []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        length = bisect.bisect_left(tails, value)
+        if length == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[length] = value
+            tail_indexes[length] = i
+        previous[i] = tail_indexes[length - 1] if length else -1
+
+    keep = set()
+    i = tail_indexes[-1] if tail_indexes else -1
+    while i != -1:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+def plan_sync(current: List[Optional[str]], target: List[str]) -> SyncPlan:
+    """
+    Work out the edits that turn the current playlist into target.
+
+    Tracks not in target (and extra copies of ones that are) are removed,
+    apart from local files and unavailable tracks, which are left in place.
+    The longest run of remaining tracks already in target order stays put;
+    every other track is moved next to its predecessor in target, and missing
+    tracks are inserted there, grouping neighbours into one call.
+
+    Args:
+        current: URIs in the playlist now
+        target: URIs the playlist should have, without duplicates
+    """
+    plan = SyncPlan()
+    target_index = {uri: i for i, uri in enumerate(target)}
+
+    # Removes, by position in the current playlist. Local files and
+    # unavailable tracks can't be removed through the API, so stay where they are.
+    kept = []
+    seen = set()
+    for position, uri in enumerate(current):
+        if uri in target_index and uri not in seen:
+            seen.add(uri)
+            kept.append(uri)
+        elif uri is None or uri.startswith('spotify:local:'):
+            kept.append(uri)
+        else:
+            plan.removes.setdefault(uri, []).append(position)
+
+    # Tracks on the longest in-order run are anchors and never move
+    in_target = [uri for uri in kept if uri in target_index]
+    anchor_positions = _longest_increasing_subsequence([target_index[uri] for uri in in_target])
+    anchors = {in_target[i] for i in anchor_positions}
+
+    # Place everything else after its predecessor, simulating the playlist
+    playlist = list(kept)
+    i = 0
+    while i < len(target):
+        uri = target[i]
+        if uri in anchors:
+            i += 1
+            continue
+        insert_at = playlist.index(target[i - 1]) + 1 if i else 0
+
+        if uri not in seen:
+            # Insert this and any following missing tracks in one call
+            run = [uri]
+            while (i + len(run) < len(target) and target[i + len(run)] not in seen
+                   and len(run) < PLAYLIST_BATCH_SIZE):
+                run.append(target[i + len(run)])
+            plan.edits.append(('add', insert_at, run))
+            playlist[insert_at:insert_at] = run
+            i += len(run)
+            continue
+
+        # Move this and any following tracks that already sit behind it in order
+        start = playlist.index(uri)
+        length = 1
+        while (i + length < len(target) and start + length < len(playlist)
+               and target[i + length] not in anchors
+               and playlist[start + length] == target[i + length]):
+            length += 1
+        if start != insert_at:
+            plan.edits.append(('move', start, insert_at, length))
+            block = playlist[start:start + length]
+            del playlist[start:start + length]
+            if insert_at > start:
+                insert_at -= length
+            playlist[insert_at:insert_at] = block
+        i += length
+
+    return plan
+
+
+def apply_sync(sp, playlist_id: str, plan: SyncPlan, snapshot_id: str) -> str:
+    """
+    Apply a sync plan made against snapshot_id.
+
+    Returns:
+        Snapshot id after the last edit
+    """
+    # Removes are resolved against the snapshot they were planned from
+    removes = [{'uri': uri, 'positions': positions} for uri, positions in plan.removes.items()]
+    for i in range(0, len(removes), PLAYLIST_BATCH_SIZE):
+        result = sp.playlist_remove_specific_occurrences_of_items(
+            playlist_id, removes[i:i + PLAYLIST_BATCH_SIZE], snapshot_id=snapshot_id
+        )
+    if removes:
+        snapshot_id = result['snapshot_id']
+
+    for edit in plan.edits:
+        if edit[0] == 'add':
+            _, position, uris = edit
+            snapshot_id = sp.playlist_add_items(playlist_id, uris, position=position)['snapshot_id']
+        else:
+            _, range_start, insert_before, range_length = edit
+            snapshot_id = sp.playlist_reorder_items(
+                playlist_id, range_start, insert_before,
+                range_length=range_length, snapshot_id=snapshot_id
+            )['snapshot_id']
+
+    return snapshot_id
+
+
+def sync_playlist(sp, playlist_id: str, uris: List[str], dry_run: bool = False) -> SyncPlan:
+    """
+    Make an existing playlist contain exactly uris, in order, with the fewest edits.
+
+    After applying, the playlist's snapshot id is checked against the one the
+    last edit returned. If they differ the playlist was changed elsewhere in
+    the meantime, so it is fetched and diffed again once more.
+
+    Args:
+        sp: Authenticated spotipy.Spotify client
+        playlist_id: Playlist to update
+        uris: Track URIs the playlist should have
+        dry_run: Only work out the edits
+
+    Returns:
+        The plan that was applied (or would be, for a dry run)
+    """
+    # Duplicates in the target would be removed again on the next sync
+    target = list(dict.fromkeys(uris))
+
+    current, snapshot_id = fetch_playlist_tracks(sp, playlist_id)
+    plan = plan_sync(current, target)
+    if dry_run or plan.is_empty:
+        return plan
+
+    snapshot_id = apply_sync(sp, playlist_id, plan, snapshot_id)
+
+    latest = sp.playlist(playlist_id, fields='snapshot_id')['snapshot_id']
+    if latest != snapshot_id:
+        print("Warning: Playlist changed during sync, re-syncing")
+        current, snapshot_id = fetch_playlist_tracks(sp, playlist_id)
+        retry = plan_sync(current, target)
+        if not retry.is_empty:
+            apply_sync(sp, playlist_id, retry, snapshot_id)
+        plan = retry
+
+    return plan
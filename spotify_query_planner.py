@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Query planning for Spotify tune searches.
+Expands a tune's aliases into search queries, drops equivalent and redundant
+ones, and orders phrasings by how often they have found a match before
+(tracked in a local stats file).
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional
+
+from library_index import CACHE_DIR
+
+
+QUERY_STATS_FILE = CACHE_DIR / "spotify_query_stats.json"
+
+# Phrasings in their original order, which is also the order used before any
+# stats exist. {alias} is the tune name, {type} a tune type keyword.
+TYPE_PHRASINGS = [
+    ('quoted_type', '"{alias}" {type} irish'),
+    ('type', '{alias} {type} irish'),
+]
+STANDARD_PHRASINGS = [
+    ('quoted_traditional', '"{alias}" irish traditional'),
+    ('traditional', '{alias} irish traditional'),
+    ('trad', '{alias} irish trad'),
+    ('irish', '{alias} irish'),
+    ('bare', '{alias}'),
+]
+
+_PUNCTUATION = re.compile(r"[^\w\s\"]")
+_WHITESPACE = re.compile(r'\s+')
+_PHRASE = re.compile(r'"([^"]*)"')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query. Spotify search ignores case and punctuation,
+    so queries that normalize the same return the same results.
+    """
+    query = _PUNCTUATION.sub(' ', query.casefold())
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def query_constraints(normalized: str):
+    """
+    Terms and quoted phrases a query requires.
+
+    Returns:
+        (words, phrases) frozensets
+    """
+    phrases = frozenset(p.strip() for p in _PHRASE.findall(normalized) if p.strip())
+    words = frozenset(normalized.replace('"', ' ').split())
+    return words, phrases
+
+
+@dataclass
+class PlannedQuery:
+    alias: str
+    phrasing: str
+    query: str
+    key: str
+    words: FrozenSet[str] = field(default_factory=frozenset)
+    phrases: FrozenSet[str] = field(default_factory=frozenset)
+
+    def narrows(self, other: "PlannedQuery") -> bool:
+        """
+        True if this query requires everything `other` does, so matches a
+        subset of its tracks. Only compares queries for the same alias, since
+        tracks are scored against the alias that found them.
+        """
+        return (self.alias == other.alias
+                and other.words <= self.words and other.phrases <= self.phrases)
+
+
+class QueryStats:
+    """Per-phrasing counts of queries run and queries that found a matching track."""
+
+    def __init__(self, stats_file: Path = QUERY_STATS_FILE):
+        self.stats_file = Path(stats_file)
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+        if self.stats_file.exists():
+            try:
+                with open(self.stats_file, 'r') as f:
+                    self.counts = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Warning: Could not read query stats {self.stats_file}: {e}")
+
+    def hit_rate(self, phrasing: str) -> float:
+        """Smoothed hit rate, so unseen phrasings start at 0.5."""
+        counts = self.counts.get(phrasing, {})
+        return (counts.get('hits', 0) + 1) / (counts.get('tries', 0) + 2)
+
+    def record(self, phrasing: str, hit: bool):
+        with self.lock:
+            counts = self.counts.setdefault(phrasing, {'tries': 0, 'hits': 0})
+            counts['tries'] += 1
+            if hit:
+                counts['hits'] += 1
+
+    def save(self):
+        with self.lock:
+            self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.stats_file, 'w') as f:
+                json.dump(self.counts, f, indent=2, sort_keys=True)
+
+
+class QueryPlanner:
+    """
+    Plans the searches for a tune.
+
+    - Queries that normalize the same (across aliases) are run once.
+    - Within each alias, phrasings are tried in order of historical hit rate.
+    - A query is skipped when an earlier query it narrows returned its
+      complete result set: its results can only be a subset of tracks that
+      were already scored.
+    """
+
+    def __init__(self, stats: Optional[QueryStats] = None):
+        self.stats = stats or QueryStats()
+        self.lock = threading.Lock()
+        self.planned = 0
+        self.run = 0
+        self.skipped = 0
+
+    def plan(self, aliases: List[str], type_keywords: Optional[List[str]] = None) -> List[PlannedQuery]:
+        """Build the ordered, de-duplicated query list for a tune."""
+        templates = []
+        for tk in type_keywords or []:
+            templates.extend((phrasing, template.replace('{type}', tk)) for phrasing, template in TYPE_PHRASINGS)
+        templates.extend(STANDARD_PHRASINGS)
+
+        # Stable sort keeps the original order for equal rates
+        templates.sort(key=lambda t: -self.stats.hit_rate(t[0]))
+
+        queries = []
+        seen_keys = set()
+        for alias in aliases:
+            for phrasing, template in templates:
+                query = template.format(alias=alias)
+                key = normalize_query(query)
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                words, phrases = query_constraints(key)
+                queries.append(PlannedQuery(alias, phrasing, query, key, words, phrases))
+
+        with self.lock:
+            self.planned += len(queries)
+        return queries
+
+    def is_redundant(self, query: PlannedQuery, complete: List[PlannedQuery]) -> bool:
+        """Check a query against earlier queries that returned every result they match."""
+        if any(query.narrows(previous) for previous in complete):
+            with self.lock:
+                self.skipped += 1
+            return True
+        return False
+
+    def record(self, query: PlannedQuery, hit: bool):
+        """Record that a query was run, and whether it found a matching track."""
+        with self.lock:
+            self.run += 1
+        self.stats.record(query.phrasing, hit)
+
+    def print_stats(self):
+        if self.planned:
+            print(f"Query planner: {self.run} queries run, {self.skipped} skipped as redundant, "
+                  f"{self.planned - self.run - self.skipped} not needed "
+                  f"(of {self.planned} planned)")
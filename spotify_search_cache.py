@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of Spotify search results.
+Stores query -> response in SQLite with a TTL so re-running the playlist
+creators on the same target list doesn't repeat the same API calls, and
+dry runs can work entirely offline from earlier results. Searches go through
+spotify_search_executor, which reads and fills this cache.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from library_index import CACHE_DIR
+
+
+SEARCH_CACHE_DB = CACHE_DIR / "spotify_search.sqlite"
+
+# How long a cached search result stays valid
+SEARCH_CACHE_TTL = 7 * 24 * 3600  # 7 days
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT NOT NULL,
+    search_type TEXT NOT NULL,
+    search_limit INTEGER NOT NULL,
+    response TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    PRIMARY KEY (query, search_type, search_limit)
+);
+"""
+
+
+def trim_track(track: Dict) -> Dict:
+    """Keep only the track fields the playlist creators use."""
+    return {
+        'name': track['name'],
+        'uri': track['uri'],
+        'artists': [{'name': artist['name']} for artist in track.get('artists') or []],
+        'album': {'name': track['album']['name']} if track.get('album') else None
+    }
+
+
+def trim_response(response: Dict, search_type: str = 'track') -> Dict:
+    """Shrink a search response to what is cached (full track objects are large)."""
+    key = f"{search_type}s"
+    items = (response.get(key) or {}).get('items') or []
+    if search_type == 'track':
+        items = [trim_track(item) for item in items if item]
+    return {key: {'items': items}}
+
+
+class SpotifySearchCache:
+    """SQLite store of trimmed Spotify search responses with a TTL."""
+
+    def __init__(self, db_path: Path = SEARCH_CACHE_DB, ttl: float = SEARCH_CACHE_TTL):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        # Searches run on several threads, which share this connection
+        self.lock = threading.Lock()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, query: str, search_type: str = 'track', limit: int = 10,
+            allow_expired: bool = False) -> Optional[Dict]:
+        """
+        Look up a cached search response.
+
+        Args:
+            allow_expired: Return results past the TTL too (for offline runs)
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, fetched FROM searches WHERE query = ? AND search_type = ? AND search_limit = ?",
+                (query, search_type, limit)
+            ).fetchone()
+            if row is None or (not allow_expired and time.time() - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, query: str, search_type: str, limit: int, response: Dict):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?)",
+                (query, search_type, limit, json.dumps(response), time.time())
+            )
+
+    def purge_expired(self) -> int:
+        """Delete results older than the TTL. Returns the number removed."""
+        with self.lock, self.conn:
+            return self.conn.execute(
+                "DELETE FROM searches WHERE fetched < ?", (time.time() - self.ttl,)
+            ).rowcount
+
+
+# Shared cache for the process
+_search_cache = None
+
+
+def get_search_cache() -> SpotifySearchCache:
+    """Get the process-wide Spotify search cache, opening it on first use."""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SpotifySearchCache()
+    return _search_cache
+
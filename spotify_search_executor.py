@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Shared executor for Spotify searches.
+Runs searches concurrently on a pooled HTTP session, paced by a token-bucket
+rate limiter, and honours Retry-After when Spotify answers 429. Results are
+read from and written to the persistent search cache.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from spotify_query_planner import normalize_query
+from spotify_search_cache import SpotifySearchCache, get_search_cache, trim_response
+
+
+# Spotify rate-limits over a rolling 30 second window. 5 requests/second with
+# bursts of 10 stays well inside it for an app in development mode.
+SEARCH_RATE = 5.0
+SEARCH_BURST = 10
+
+# Concurrent searches (and pooled HTTP connections)
+SEARCH_WORKERS = 8
+
+# How often to retry one search after a 429 before giving up
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Wait used when a 429 comes without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+
+SPOTIFY_API_PREFIX = "https://api.spotify.com/v1/"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill at `rate` per second up to `capacity`; each request takes
+    one. pause() empties the bucket and blocks everyone until a Retry-After
+    has passed.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be made."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+def _retry_after(headers) -> float:
+    """Seconds to wait from a 429 response's Retry-After header."""
+    try:
+        return max(0.0, float((headers or {}).get('Retry-After')))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class SpotifySearchExecutor:
+    """
+    Runs Spotify searches for the playlist creators.
+
+    Each search is answered from the cache when possible, keyed on the
+    normalized query so equivalent queries share results. Concurrent
+    identical searches wait on a single API call. Live searches share one
+    rate limiter and one pooled HTTP session, so any number of threads can
+    search at once without exceeding the rate limit.
+    """
+
+    def __init__(
+        self,
+        sp=None,
+        offline: bool = False,
+        max_workers: int = SEARCH_WORKERS,
+        rate: float = SEARCH_RATE,
+        burst: int = SEARCH_BURST,
+        auth: Optional[str] = None,
+        api_prefix: Optional[str] = None,
+        cache: Optional[SpotifySearchCache] = None
+    ):
+        """
+        Args:
+            sp: Authenticated spotipy.Spotify client; its auth manager is reused
+            offline: Only answer from the cache, never call the API
+            max_workers: Concurrent searches in map()
+            rate: Sustained live searches per second
+            burst: Live searches allowed back to back
+            auth: Bearer token to use instead of sp (e.g. for a stub server)
+            api_prefix: API base URL (default: Spotify's)
+            cache: Search cache (default: the shared one)
+        """
+        self.offline = offline
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(rate, burst)
+        self.cache = cache or get_search_cache()
+        self.client = None
+        if not offline and (sp is not None or auth):
+            self.client = self._pooled_client(sp, auth, api_prefix)
+
+        # Searches currently being fetched, so duplicates wait instead of calling again
+        self.inflight: Dict[tuple, Future] = {}
+        self.inflight_lock = threading.Lock()
+
+        self.stats_lock = threading.Lock()
+        self.api_calls = 0
+        self.rate_limited = 0
+
+    def _pooled_client(self, sp, auth: Optional[str], api_prefix: Optional[str]):
+        """A spotipy client on a session with one pooled connection per worker and no built-in retries."""
+        import requests
+        import spotipy
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        client = spotipy.Spotify(
+            auth=auth,
+            auth_manager=None if auth else sp.auth_manager,
+            requests_session=session,
+            retries=0,
+            status_retries=0,
+            requests_timeout=10
+        )
+        client.prefix = api_prefix or SPOTIFY_API_PREFIX
+        return client
+
+    def search(self, query: str, search_type: str = 'track', limit: int = 10) -> Dict:
+        """
+        Search Spotify. Safe to call from several threads.
+
+        Returns:
+            Search response shaped like sp.search(), trimmed to the cached
+            fields. Empty if offline and not cached.
+
+        Raises:
+            spotipy.SpotifyException: On API errors, or 429s past MAX_RATE_LIMIT_RETRIES
+        """
+        key = normalize_query(query)
+        response = self.cache.get(key, search_type, limit, allow_expired=self.offline)
+        if response is not None:
+            return response
+        if self.client is None:
+            return {f"{search_type}s": {'items': []}}
+
+        inflight_key = (key, search_type, limit)
+        with self.inflight_lock:
+            future = self.inflight.get(inflight_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.inflight[inflight_key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            # Another thread may have finished this search since the cache check
+            response = self.cache.get(key, search_type, limit)
+            if response is None:
+                response = self._fetch(query, search_type, limit)
+                self.cache.put(key, search_type, limit, response)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.inflight_lock:
+                del self.inflight[inflight_key]
+
+    def _fetch(self, query: str, search_type: str, limit: int) -> Dict:
+        """Call the search API, waiting out 429s."""
+        from spotipy.exceptions import SpotifyException
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.limiter.acquire()
+            with self.stats_lock:
+                self.api_calls += 1
+            try:
+                raw = self.client.search(q=query, type=search_type, limit=limit)
+                break
+            except SpotifyException as e:
+                if e.http_status != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                with self.stats_lock:
+                    self.rate_limited += 1
+                self.limiter.pause(_retry_after(getattr(e, 'headers', None)))
+
+        return trim_response(raw, search_type)
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        """
+        Run func over items concurrently (e.g. one tune's searches per item).
+
+        Returns:
+            Results in the order of items
+        """
+        items = list(items)
+        if len(items) <= 1 or self.max_workers <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, items))
+
+    def print_stats(self):
+        """Print cache hits, live API calls and rate-limit responses for this run."""
+        cache = self.cache
+        total = cache.hits + cache.misses
+        if total:
+            print(f"\nSearch cache: {cache.hits}/{total} searches answered from cache")
+        if self.api_calls:
+            print(f"Spotify API: {self.api_calls} search calls, {self.rate_limited} rate-limited (429)")
+
+
+def run_stub_server(rate_limit_every: int = 7, retry_after: int = 1):
+    """
+    Start a local stand-in for the Spotify search endpoint.
+
+    Every rate_limit_every-th request gets a 429 with Retry-After, the rest
+    get one track named after the query.
+
+    Returns:
+        (server, api prefix) - call server.shutdown() when done
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    counter = {'requests': 0}
+    counter_lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with counter_lock:
+                counter['requests'] += 1
+                limited = counter['requests'] % rate_limit_every == 0
+
+            if limited:
+                self.send_response(429)
+                self.send_header('Retry-After', str(retry_after))
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({'error': {'status': 429, 'message': 'API rate limit exceeded'}}).encode())
+                return
+
+            query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+            body = {'tracks': {'items': [{
+                'name': query,
+                'uri': f"spotify:track:stub{abs(hash(query)) % 10**8}",
+                'artists': [{'name': 'Stub Artist'}],
+                'album': {'name': 'Stub Album'}
+            }]}}
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(body).encode())
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/"
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    # Exercise the executor offline against the stub server
+    server, prefix = run_stub_server()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = SpotifySearchCache(Path(tmp_dir) / "search.sqlite")
+        executor = SpotifySearchExecutor(auth='stub-token', api_prefix=prefix, cache=cache)
+        queries = [f"tune {i} irish traditional" for i in range(40)]
+
+        start = time.time()
+        results = executor.map(lambda q: executor.search(q, limit=30), queries)
+        elapsed = time.time() - start
+
+        assert all(r['tracks']['items'][0]['name'] == q for r, q in zip(results, queries))
+        print(f"{len(queries)} searches in {elapsed:.2f}s "
+              f"(rate {SEARCH_RATE}/s, burst {SEARCH_BURST}, {executor.max_workers} workers)")
+
+        start = time.time()
+        executor.map(lambda q: executor.search(q, limit=30), queries)
+        print(f"Repeat from cache in {(time.time() - start)*1000:.1f}ms")
+        executor.print_stats()
+        cache.close()
+    server.shutdown()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Streaming tempo analysis for long recordings.
+Decodes a recording block by block, building its onset envelope as it goes,
+then estimates a tempo curve over overlapping windows and a BPM for each
+segment (e.g. each set of a session recording) - all in one decoding pass
+with memory bounded by the block size.
+"""
+
+import argparse
+import csv
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+from audio_decode import DEFAULT_SAMPLE_RATE, stream_audio
+
+
+N_FFT = 2048
+HOP_LENGTH = 512
+
+# Audio decoded per step; bounds memory regardless of recording length
+BLOCK_SECONDS = 60.0
+
+# Tempo curve windows
+WINDOW_SECONDS = 30.0
+WINDOW_HOP_SECONDS = 10.0
+
+
+def stream_onset_envelope(
+    file_path,
+    sr: int = DEFAULT_SAMPLE_RATE,
+    block_seconds: float = BLOCK_SECONDS
+) -> "np.ndarray":
+    """
+    Compute a recording's onset strength envelope from streamed audio blocks.
+
+    Uses the same features as librosa.onset.onset_strength (log-power mel
+    spectrogram, first-order positive difference, mean over mel bands), but
+    frames are computed without centering and carried across block
+    boundaries, so the envelope doesn't depend on the block size. Frame i
+    covers samples [i * HOP_LENGTH, i * HOP_LENGTH + N_FFT).
+
+    Returns:
+        Onset envelope with one value per HOP_LENGTH samples
+    """
+    import librosa
+    import numpy as np
+
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=N_FFT)
+    window = librosa.filters.get_window('hann', N_FFT, fftbins=True)
+
+    envelope_blocks = []
+    carry = np.zeros(0, dtype=np.float32)
+    previous_frame = None
+
+    for block in stream_audio(file_path, sr=sr, block_seconds=block_seconds):
+        signal = np.concatenate([carry, block])
+        if len(signal) < N_FFT:
+            carry = signal
+            continue
+
+        num_frames = 1 + (len(signal) - N_FFT) // HOP_LENGTH
+        stft = librosa.stft(signal[:(num_frames - 1) * HOP_LENGTH + N_FFT],
+                            n_fft=N_FFT, hop_length=HOP_LENGTH, window=window, center=False)
+        # No top_db clipping: it depends on each block's peak and would break stitching
+        mel_db = librosa.power_to_db(mel_basis @ (np.abs(stft) ** 2), top_db=None)
+
+        if previous_frame is not None:
+            mel_db = np.concatenate([previous_frame, mel_db], axis=1)
+            onset = np.maximum(0.0, np.diff(mel_db, axis=1)).mean(axis=0)
+        else:
+            onset = np.concatenate([[0.0], np.maximum(0.0, np.diff(mel_db, axis=1)).mean(axis=0)])
+
+        envelope_blocks.append(onset.astype(np.float32))
+        previous_frame = mel_db[:, -1:]
+        carry = signal[num_frames * HOP_LENGTH:]
+
+    if not envelope_blocks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(envelope_blocks)
+
+
+def frame_to_time(frame: int, sr: int = DEFAULT_SAMPLE_RATE) -> float:
+    """Centre time in seconds of an (uncentered) envelope frame."""
+    return (frame * HOP_LENGTH + N_FFT / 2) / sr
+
+
+def time_to_frame(seconds: float, sr: int = DEFAULT_SAMPLE_RATE) -> int:
+    return max(0, int(round((seconds * sr - N_FFT / 2) / HOP_LENGTH)))
+
+
+def envelope_tempo(envelope, sr: int = DEFAULT_SAMPLE_RATE) -> Optional[float]:
+    """Estimate one tempo for a slice of the onset envelope."""
+    import librosa
+    import numpy as np
+
+    # Need a few seconds of envelope for a meaningful autocorrelation
+    if len(envelope) < time_to_frame(4.0, sr) or not np.any(envelope):
+        return None
+
+    tempo = librosa.beat.tempo(onset_envelope=envelope, sr=sr, hop_length=HOP_LENGTH)
+    if isinstance(tempo, np.ndarray):
+        tempo = tempo[0]
+    return float(tempo)
+
+
+def tempo_curve(
+    envelope,
+    sr: int = DEFAULT_SAMPLE_RATE,
+    window_seconds: float = WINDOW_SECONDS,
+    hop_seconds: float = WINDOW_HOP_SECONDS
+) -> List[Tuple[float, Optional[float]]]:
+    """
+    Estimate tempo over overlapping windows of the onset envelope.
+
+    Returns:
+        List of (window centre time in seconds, BPM or None) tuples
+    """
+    frames_per_second = sr / HOP_LENGTH
+    window_frames = int(window_seconds * frames_per_second)
+    hop_frames = max(1, int(hop_seconds * frames_per_second))
+
+    curve = []
+    start = 0
+    while start < len(envelope):
+        segment = envelope[start:start + window_frames]
+        centre = frame_to_time(start + len(segment) // 2, sr)
+        curve.append((centre, envelope_tempo(segment, sr)))
+        if start + window_frames >= len(envelope):
+            break
+        start += hop_frames
+    return curve
+
+
+def segment_tempos(
+    envelope,
+    boundaries: Sequence[Tuple[float, Optional[float]]],
+    sr: int = DEFAULT_SAMPLE_RATE
+) -> List[Optional[float]]:
+    """
+    Estimate one tempo per segment of the recording.
+
+    Args:
+        envelope: Onset envelope from stream_onset_envelope
+        boundaries: (start seconds, end seconds or None for end of recording) per segment
+
+    Returns:
+        BPM (or None) for each segment, in order
+    """
+    tempos = []
+    for start, end in boundaries:
+        start_frame = time_to_frame(start, sr)
+        end_frame = time_to_frame(end, sr) if end is not None else len(envelope)
+        tempos.append(envelope_tempo(envelope[start_frame:end_frame], sr))
+    return tempos
+
+
+def analyse_recording(
+    file_path,
+    boundaries: Optional[Sequence[Tuple[float, Optional[float]]]] = None,
+    sr: int = DEFAULT_SAMPLE_RATE
+) -> Tuple[List[Tuple[float, Optional[float]]], List[Optional[float]]]:
+    """
+    Get the tempo curve and per-segment tempos of a recording in one decoding pass.
+
+    Returns:
+        (tempo curve, segment tempos) tuple
+    """
+    envelope = stream_onset_envelope(file_path, sr=sr)
+    curve = tempo_curve(envelope, sr)
+    tempos = segment_tempos(envelope, boundaries, sr) if boundaries else []
+    return curve, tempos
+
+
+def save_tempo_curve(curve: List[Tuple[float, Optional[float]]], output_file: str):
+    """Write a tempo curve as CSV (time_seconds, bpm)."""
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['time_seconds', 'bpm'])
+        for time_seconds, bpm in curve:
+            writer.writerow([f"{time_seconds:.2f}", f"{bpm:.2f}" if bpm else ''])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Tempo curve and per-set BPM for a long recording',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s foinn1_audio.mp3                          # Tempo curve only
+  %(prog)s foinn1_audio.mp3 --sets foinn1-sets.md    # Plus BPM per set
+  %(prog)s foinn1_audio.mp3 -o foinn1_tempo.csv      # Save the curve as CSV
+        """
+    )
+    parser.add_argument('file', help='Recording to analyse')
+    parser.add_argument('--sets', help='Set list with start times (e.g. foinn1-sets.md)')
+    parser.add_argument('-o', '--output', help='Save the tempo curve to this CSV file')
+
+    args = parser.parse_args()
+
+    if args.sets:
+        from irish_playlist_manager import IrishPlaylistManager
+        manager = IrishPlaylistManager(args.sets)
+        set_times = manager.get_set_times()
+        boundaries = [(start, end) for _, start, end in set_times]
+    else:
+        set_times = []
+        boundaries = None
+
+    print(f"Analysing {args.file}...", file=sys.stderr)
+    curve, tempos = analyse_recording(args.file, boundaries)
+
+    if args.output:
+        save_tempo_curve(curve, args.output)
+        print(f"Tempo curve saved to {args.output}")
+    else:
+        for time_seconds, bpm in curve:
+            minutes, seconds = divmod(int(time_seconds), 60)
+            print(f"{minutes:3d}:{seconds:02d}  {f'{bpm:6.1f}' if bpm else '   N/A'} BPM")
+
+    if set_times:
+        print("\nBPM per set:")
+        for (tune_set, _, _), bpm in zip(set_times, tempos):
+            print(f"  {tune_set.start_time:>8}  {f'{bpm:6.1f}' if bpm else '   N/A'} BPM  {tune_set}")
+
+
+if __name__ == '__main__':
+    main()
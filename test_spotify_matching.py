@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Checks that TrackMatcher scores search results exactly as the per-track loop
+it replaced in the playlist creators did.
+
+Run with: python -m unittest test_spotify_matching
+"""
+
+import random
+import unittest
+
+from fuzzy_match import calculate_similarity, normalize_tune_name
+from spotify_matching import TrackMatcher, type_keywords_for
+
+
+def old_score(tune_name, track, threshold, type_keywords):
+    """The scoring loop from create_spotify_playlist_direct.py before TrackMatcher."""
+    track_name = track['name']
+    artist_name = track['artists'][0]['name'] if track['artists'] else ""
+    album_name = track['album']['name'] if track['album'] else ""
+
+    norm_tune = normalize_tune_name(tune_name)
+    norm_track = normalize_tune_name(track_name)
+
+    score = 0
+    if (norm_tune in norm_track or norm_track in norm_tune
+            or calculate_similarity(norm_tune, norm_track) >= threshold):
+        score += 10
+
+    for keyword in type_keywords:
+        if keyword in track_name.lower() or keyword in album_name.lower():
+            score += 3
+
+    for keyword in ['irish', 'traditional', 'trad', 'celtic', 'session']:
+        if (keyword in track_name.lower() or keyword in artist_name.lower()
+                or keyword in album_name.lower()):
+            score += 2
+
+    for keyword in ['remix', 'cover', 'rock', 'pop', 'jazz', 'metal', 'techno']:
+        if keyword in track_name.lower() or keyword in artist_name.lower():
+            score -= 3
+
+    return score
+
+
+def make_track(name, artist="", album=""):
+    return {
+        'name': name,
+        'uri': f"spotify:track:{random.getrandbits(64):016x}",
+        'artists': [{'name': artist}] if artist else [],
+        'album': {'name': album} if album else None,
+    }
+
+
+WORDS = ['the', 'morning', 'star', 'spear', 'kesh', 'jig', 'reel', 'reels',
+         'cook', 'in', 'kitchen', 'blarney', 'pilgrim', 'silver', 'spire',
+         'irish', 'traditional', 'trad', 'celtic', 'session', 'remix', 'cover',
+         'pop', 'popular', 'jazz', 'rock', 'a', 'an']
+TUNE_TYPES = [None, 'Reel', 'Jig', 'Hornpipe', 'Polka']
+
+
+def random_name(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(1, 4))]
+    if rng.random() < 0.4:
+        words.insert(0, rng.choice(['The', 'the', 'A', 'An']))
+    return ' '.join(words).title() if rng.random() < 0.5 else ' '.join(words)
+
+
+class TrackMatcherParityTest(unittest.TestCase):
+
+    def assert_same_scores(self, tune_name, tracks, threshold, tune_type):
+        type_keywords = type_keywords_for(tune_type)
+        expected = [old_score(tune_name, track, threshold, type_keywords) for track in tracks]
+        actual = TrackMatcher(threshold, type_keywords).score_page(tune_name, tracks)
+        self.assertEqual(actual, expected, msg=f"{tune_name!r} at {threshold}")
+
+    def test_leading_the_is_normalized_twice(self):
+        # Normalized once these are 0.85 similar; the old matcher compared
+        # 'morning star spear the' and 'morning star the' (0.84) instead
+        tracks = [make_track("The morning star spear")]
+        self.assert_same_scores("The morning star", tracks, 0.85, None)
+        self.assertEqual(TrackMatcher(0.85).score_page("The morning star", tracks), [0])
+
+    def test_random_pages(self):
+        rng = random.Random(1234)
+        for _ in range(2000):
+            tune_name = random_name(rng)
+            tracks = [
+                make_track(random_name(rng),
+                           random_name(rng) if rng.random() < 0.8 else "",
+                           random_name(rng) if rng.random() < 0.8 else "")
+                for _ in range(rng.randint(1, 10))
+            ]
+            threshold = rng.choice([0.6, 0.75, 0.8, 0.85, 0.9])
+            self.assert_same_scores(tune_name, tracks, threshold, rng.choice(TUNE_TYPES))
+
+    def test_rank_page_keeps_positive_scores_best_first(self):
+        tracks = [
+            make_track("Kesh Jig", "Irish Session Band", "Trad Jigs"),
+            make_track("Kesh Jig (Rock Remix)", "Pop Covers"),
+            make_track("The Kesh", "Celtic Collective"),
+        ]
+        ranked = TrackMatcher(0.85, type_keywords_for('Jig')).rank_page("The Kesh", tracks)
+        # Equal scores keep search result order; the remix scores below zero
+        self.assertEqual([track['name'] for _, track in ranked], ["Kesh Jig", "The Kesh"])
+        self.assertEqual([score for score, _ in ranked], [12, 12])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ Uses the weekly updated data from https://github.com/adactio/TheSession-data
 import csv
 import json
 import os
+import pickle
 import subprocess
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -18,12 +19,19 @@ DATA_DIR = Path("TheSession-data")
 ALIASES_FILE = DATA_DIR / "csv" / "aliases.csv"
 TUNES_FILE = DATA_DIR / "csv" / "tunes.csv"
 
+# Compiled alias map, rebuilt whenever the TheSession data revision changes
+CACHE_DIR = Path(".cache")
+ALIASES_SNAPSHOT = CACHE_DIR / "aliases_snapshot.pickle"
+SNAPSHOT_VERSION = 2
+
 
 def update_thesession_data() -> bool:
     """
     Update TheSession data from GitHub.
     Returns True if successful, False otherwise.
     """
+    global _aliases_cache, _cache_time
+    
     try:
         if DATA_DIR.exists():
             # Pull latest changes
@@ -49,6 +57,11 @@ def update_thesession_data() -> bool:
                 print(f"Error cloning: {result.stderr}")
                 return False
         
+        # Drop the in-process alias map; the on-disk snapshot is keyed on the
+        # data revision, so it is rebuilt on next use if the pull changed anything
+        _aliases_cache = None
+        _cache_time = None
+        
         print("TheSession data updated successfully")
         return True
         
@@ -101,6 +114,109 @@ def load_aliases_data() -> Dict[str, List[str]]:
         return {}
 
 
+def _read_git_revision(repo_dir: Path) -> Optional[str]:
+    """
+    Read the commit a git checkout is on straight from .git, without
+    spawning git. Returns None if it can't be determined.
+    """
+    git_dir = repo_dir / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head  # Detached HEAD
+        ref = head[5:]
+        ref_file = git_dir / ref
+        if ref_file.exists():
+            return ref_file.read_text().strip()
+        packed = git_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text().splitlines():
+                if line.endswith(" " + ref):
+                    return line.split(" ", 1)[0]
+    except OSError:
+        pass
+    return None
+
+
+def get_data_revision(source_file: Path = ALIASES_FILE) -> Optional[str]:
+    """
+    Identify the current TheSession data: git revision plus the source CSV's
+    size and mtime (in case the CSV was changed outside of git).
+    """
+    try:
+        stat = source_file.stat()
+    except OSError:
+        return None
+    revision = _read_git_revision(DATA_DIR) or "unknown"
+    return f"{revision}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def read_snapshot(snapshot_path: Path, revision: Optional[str]):
+    """
+    Load a compiled snapshot if it was built from this data revision.
+    Returns None if it is missing, stale or unreadable.
+    """
+    if revision is None or not snapshot_path.exists():
+        return None
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+        if (snapshot.get('version') == SNAPSHOT_VERSION and
+                snapshot.get('revision') == revision):
+            return snapshot['data']
+    except Exception as e:
+        print(f"Warning: Could not read snapshot {snapshot_path}, rebuilding: {e}")
+    return None
+
+
+def write_snapshot(snapshot_path: Path, revision: Optional[str], data):
+    """Atomically write a compiled snapshot tagged with its data revision."""
+    try:
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'version': SNAPSHOT_VERSION,
+                'revision': revision,
+                'data': data
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except OSError as e:
+        print(f"Warning: Could not write snapshot {snapshot_path}: {e}")
+
+
+def build_aliases_snapshot() -> Dict[str, List[str]]:
+    """
+    Parse aliases.csv and write the compiled alias map to ALIASES_SNAPSHOT.
+    Keys with the same alias group share one list, which keeps the snapshot small.
+    """
+    aliases_map = load_aliases_data()
+    if not aliases_map:
+        return aliases_map
+    
+    shared = {}
+    for key, aliases in aliases_map.items():
+        group = frozenset(aliases)
+        if group not in shared:
+            shared[group] = aliases
+        aliases_map[key] = shared[group]
+    
+    write_snapshot(ALIASES_SNAPSHOT, get_data_revision(), aliases_map)
+    return aliases_map
+
+
+def load_aliases_snapshot() -> Dict[str, List[str]]:
+    """
+    Load the alias map from the compiled snapshot, rebuilding it from the CSV
+    if it is missing or was built from a different data revision.
+    """
+    aliases_map = read_snapshot(ALIASES_SNAPSHOT, get_data_revision())
+    if aliases_map is not None:
+        return aliases_map
+    
+    return build_aliases_snapshot()
+
+
 # Cache the loaded data
 _aliases_cache = None
 _cache_time = None
@@ -118,7 +234,7 @@ def get_aliases_map() -> Dict[str, List[str]]:
         _cache_time is None or 
         now - _cache_time > CACHE_DURATION):
         
-        _aliases_cache = load_aliases_data()
+        _aliases_cache = load_aliases_snapshot()
         _cache_time = now
     
     return _aliases_cache
@@ -170,39 +286,105 @@ def get_all_tune_variations(tune_name: str) -> Set[str]:
     return variations
 
 
-def search_tunes(query: str, max_results: int = 10) -> List[Dict[str, str]]:
+class TunesIndex:
     """
-    Search for tunes by name in TheSession data.
-    Returns a list of matching tunes with their IDs and names.
+    In-memory copy of tunes.csv, indexed by normalized name.
+    
+    Each name is indexed both as written and with a leading "The" moved to
+    the end ("X, the"), matching how TheSession lists many tunes.
     """
+    
+    def __init__(self, rows: List[Dict[str, str]]):
+        self.rows = rows
+        self.by_name: Dict[str, List[int]] = defaultdict(list)
+        
+        for position, row in enumerate(rows):
+            for key in tune_name_keys(row['name']):
+                self.by_name[key].append(position)
+    
+    def lookup(self, keys: Set[str]) -> List[Dict[str, str]]:
+        """Rows whose name matches any of the keys, in file order."""
+        positions = set()
+        for key in keys:
+            positions.update(self.by_name.get(key, ()))
+        return [self.rows[position] for position in sorted(positions)]
+
+
+def tune_name_keys(name: str) -> Set[str]:
+    """Lowercased name plus its "X, the" form if it starts with "The"."""
+    name_lower = name.lower().strip()
+    keys = {name_lower}
+    if name_lower.startswith('the '):
+        keys.add(name_lower[4:] + ', the')
+    return keys
+
+
+# Cache the tunes index, keyed on the CSV's mtime
+_tunes_index = None
+_tunes_index_mtime = None
+
+
+def get_tunes_index() -> Optional[TunesIndex]:
+    """
+    Get the tunes.csv index, parsing the CSV only on first use or after it changes.
+    """
+    global _tunes_index, _tunes_index_mtime
+    
     if not TUNES_FILE.exists():
         print("Tunes file not found. Attempting to download TheSession data...")
         if not update_thesession_data():
-            return []
-    
-    results = []
-    query_lower = query.lower()
+            return None
     
     try:
+        mtime = TUNES_FILE.stat().st_mtime_ns
+        if _tunes_index is not None and _tunes_index_mtime == mtime:
+            return _tunes_index
+        
+        rows = []
         with open(TUNES_FILE, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
-            
             for row in reader:
-                if query_lower in row['name'].lower():
-                    results.append({
-                        'id': row['tune_id'],
-                        'name': row['name'],
-                        'type': row.get('type', 'unknown')
-                    })
-                    
-                    if len(results) >= max_results:
-                        break
+                rows.append({
+                    'tune_id': row['tune_id'],
+                    'name': row['name'],
+                    'type': row.get('type', 'unknown'),
+                    'meter': row.get('meter', ''),
+                    'key': row.get('key', '')
+                })
         
-        return results
+        _tunes_index = TunesIndex(rows)
+        _tunes_index_mtime = mtime
+        return _tunes_index
         
     except Exception as e:
-        print(f"Error searching tunes: {e}")
+        print(f"Error loading tunes data: {e}")
+        return None
+
+
+def search_tunes(query: str, max_results: int = 10) -> List[Dict[str, str]]:
+    """
+    Search for tunes by name in TheSession data.
+    Returns a list of matching tunes with their IDs and names.
+    """
+    tunes_index = get_tunes_index()
+    if tunes_index is None:
         return []
+    
+    results = []
+    query_lower = query.lower()
+    
+    for row in tunes_index.rows:
+        if query_lower in row['name'].lower():
+            results.append({
+                'id': row['tune_id'],
+                'name': row['name'],
+                'type': row['type']
+            })
+            
+            if len(results) >= max_results:
+                break
+    
+    return results
 
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ import csv
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from collections import defaultdict
+from thesession_data import get_tunes_index
 
 
 TUNES_FILE = Path("TheSession-data/csv/tunes.csv")
@@ -20,50 +21,29 @@ def get_tune_types(tune_name: str) -> List[Dict[str, str]]:
     if not TUNES_FILE.exists():
         return []
     
-    matches = []
+    tunes_index = get_tunes_index()
+    if tunes_index is None:
+        return []
+    
     tune_name_lower = tune_name.lower().strip()
+    keys = {tune_name_lower}
     
     # Also try with "The" moved to the end
-    tune_name_alt = None
     if tune_name_lower.startswith('the '):
-        tune_name_alt = tune_name_lower[4:] + ', the'
+        keys.add(tune_name_lower[4:] + ', the')
     elif not tune_name_lower.endswith(', the'):
         # Try adding ", the" if it might need it
-        tune_name_alt = tune_name_lower + ', the'
-    
-    try:
-        with open(TUNES_FILE, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                # Normalize both for comparison
-                row_name = row['name'].lower().strip()
-                # Remove "the" at beginning for comparison
-                if row_name.startswith('the '):
-                    row_name_alt = row_name[4:] + ', the'
-                else:
-                    row_name_alt = row_name
-                
-                if row_name == tune_name_lower or row_name_alt == tune_name_lower or \
-                   (tune_name_alt and (row_name == tune_name_alt or row_name_alt == tune_name_alt)):
-                    # Get unique tune IDs (first column is the unique ID)
-                    tune_id = row['tune_id']
-                    
-                    # Check if we already have this tune_id
-                    if not any(m['tune_id'] == tune_id for m in matches):
-                        matches.append({
-                            'tune_id': tune_id,
-                            'name': row['name'],
-                            'type': row['type'],
-                            'meter': row.get('meter', ''),
-                            'key': row.get('key', '')
-                        })
-        
-        return matches
-        
-    except Exception as e:
-        print(f"Error reading tunes data: {e}")
-        return []
+        keys.add(tune_name_lower + ', the')
+    
+    # Get unique tune IDs, keeping the first row for each in file order
+    matches = []
+    seen_ids = set()
+    for row in tunes_index.lookup(keys):
+        if row['tune_id'] not in seen_ids:
+            seen_ids.add(row['tune_id'])
+            matches.append(dict(row))
+    
+    return matches
 
 
 def format_tune_type_info(tune_info: Dict[str, str]) -> str:
@@ -32,34 +32,42 @@ def create_m3u_playlist(
     output_path = Path(output_file)
     
     with open(output_path, 'w', encoding='utf-8') as f:
-        # Write M3U header
-        f.write("#EXTM3U\n")
-        
-        if playlist_name:
-            f.write(f"#PLAYLIST:{playlist_name}\n")
-        
+        _write_m3u_header(f, playlist_name)
         for file_path in file_paths:
-            # Get file info
-            if file_path.exists():
-                # Write extended info (duration is -1 for unknown)
-                filename = file_path.stem
-                f.write(f"#EXTINF:-1,{filename}\n")
-            
-            # Write file path
-            if use_absolute_paths:
-                f.write(f"{file_path.absolute()}\n")
-            else:
-                # Try to make relative to playlist location
-                try:
-                    rel_path = file_path.relative_to(output_path.parent)
-                    f.write(f"{rel_path}\n")
-                except ValueError:
-                    # Can't make relative, use absolute
-                    f.write(f"{file_path.absolute()}\n")
+            _write_m3u_entry(f, file_path, output_path, use_absolute_paths)
     
     return output_path.absolute()
 
 
+def _write_m3u_header(f, playlist_name: Optional[str] = None):
+    """Write the M3U header lines."""
+    f.write("#EXTM3U\n")
+    
+    if playlist_name:
+        f.write(f"#PLAYLIST:{playlist_name}\n")
+
+
+def _write_m3u_entry(f, file_path: Path, output_path: Path, use_absolute_paths: bool = True):
+    """Write one M3U entry (extended info plus path)."""
+    # Get file info
+    if file_path.exists():
+        # Write extended info (duration is -1 for unknown)
+        filename = file_path.stem
+        f.write(f"#EXTINF:-1,{filename}\n")
+    
+    # Write file path
+    if use_absolute_paths:
+        f.write(f"{file_path.absolute()}\n")
+    else:
+        # Try to make relative to playlist location
+        try:
+            rel_path = file_path.relative_to(output_path.parent)
+            f.write(f"{rel_path}\n")
+        except ValueError:
+            # Can't make relative, use absolute
+            f.write(f"{file_path.absolute()}\n")
+
+
 def create_xspf_playlist(
     file_paths: List[Path],
     output_file: str,
@@ -220,6 +228,103 @@ def create_playlist_from_sets(
         )
 
 
+class StreamingSetPlaylist:
+    """
+    Builds a set playlist while tune search results are still arriving.
+    
+    For M3U, each set is written as soon as all of its tunes (and every set
+    before it) have results, so the file grows in playlist order while the
+    search runs. It is written next to the output as <name>.partial and
+    renamed into place by close(), so an interrupted search never replaces
+    an existing playlist; call abort() to discard it instead. The finished
+    file is identical to create_playlist_from_sets(). XSPF is an XML
+    document, so it is written once in close().
+    """
+    
+    def __init__(
+        self,
+        sets_data: List[dict],
+        output_file: str,
+        playlist_format: str = "m3u",
+        use_absolute_paths: bool = True
+    ):
+        self.sets_data = sets_data
+        self.output_path = Path(output_file)
+        self.partial_path = self.output_path.with_name(self.output_path.name + ".partial")
+        self.playlist_format = playlist_format
+        self.use_absolute_paths = use_absolute_paths
+        self.file_results = {}
+        self.written = 0
+        self._next_set = 0
+        self._seen_files = set()
+        self._handle = None
+    
+    def add_tune_result(self, tune: str, file_paths: List[Path]):
+        """Record a tune's files and write any sets that are now complete."""
+        self.file_results[tune] = file_paths
+        if self.playlist_format == "m3u":
+            self._flush(final=False)
+    
+    def _flush(self, final: bool):
+        while self._next_set < len(self.sets_data):
+            tunes = self.sets_data[self._next_set].get('tunes', [])
+            if not final and not all(tune in self.file_results for tune in tunes):
+                break
+            
+            for tune in tunes:
+                for file_path in self.file_results.get(tune) or []:
+                    abs_path = file_path.absolute()
+                    if abs_path in self._seen_files:
+                        continue
+                    self._seen_files.add(abs_path)
+                    
+                    if self._handle is None:
+                        self._handle = open(self.partial_path, 'w', encoding='utf-8')
+                        _write_m3u_header(self._handle, "Irish Music Practice Sets")
+                    _write_m3u_entry(self._handle, file_path, self.output_path, self.use_absolute_paths)
+                    self.written += 1
+            
+            if self._handle is not None:
+                self._handle.flush()
+            self._next_set += 1
+    
+    def close(self) -> Optional[Path]:
+        """
+        Finish the playlist.
+        
+        Returns:
+            Path to created playlist or None if no files found
+        """
+        if self.playlist_format != "m3u":
+            return create_playlist_from_sets(
+                self.sets_data,
+                self.file_results,
+                str(self.output_path),
+                playlist_format=self.playlist_format,
+                use_absolute_paths=self.use_absolute_paths
+            )
+        
+        self._flush(final=True)
+        if self._handle is None:
+            return None
+        
+        self._handle.close()
+        self._handle = None
+        os.replace(self.partial_path, self.output_path)
+        return self.output_path.absolute()
+    
+    def abort(self):
+        """Discard a partly written playlist, leaving any existing one untouched."""
+        if self._handle is None:
+            return
+        self._handle.close()
+        self._handle = None
+        try:
+            self.partial_path.unlink()
+        except OSError:
+            pass
+
+
 if __name__ == "__main__":
     # Test playlist creation
     test_files = [